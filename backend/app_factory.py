@@ -1,9 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 import os
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    from modules.quizzes.pregeneration import shutdown_quiz_pregenerator
+    from services.openai_client_registry import get_client_registry
+
+    shutdown_quiz_pregenerator()
+    await get_client_registry().aclose()
+
+
 def configure_rate_limiter(app: FastAPI) -> None:
     from slowapi import _rate_limit_exceeded_handler
     from slowapi.errors import RateLimitExceeded
@@ -62,7 +73,7 @@ def register_routes(app: FastAPI) -> None:
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     configure_rate_limiter(app)
     configure_middlewares(app)
     register_routes(app)
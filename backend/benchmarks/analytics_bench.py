@@ -0,0 +1,305 @@
+"""
+Analytics benchmark suite on a seeded synthetic history (SQLite).
+
+Usage (from backend/):
+    python -m benchmarks.analytics_bench                                  # sizes 1k, 10k, 100k
+    python -m benchmarks.analytics_bench --sizes 10000 1000000 --repeat 3
+    python -m benchmarks.analytics_bench --output new.json --compare baseline.json
+
+For every history size (QuestionAnalytics rows of the measured student) a
+fresh database is generated from --seed, so runs are comparable across
+commits. Results are written as JSON; --compare exits with status 1 when a
+benchmark's median got slower than the baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from migrations import run_migrations
+from models import Concept, QuestionAnalytics, QuizResult, Student, StudyMaterial, Topic
+from modules.analytics import columnar
+from modules.analytics.calculator import AnalyticsCalculator
+from modules.analytics.repository import (
+    AnalyticsRepository, ConceptMasteryRepository, HourlyRollupRepository, LearningTrendRepository
+)
+from modules.analytics.service import AnalyticsService
+from modules.materials.repository import MaterialConceptRepository
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+QUIZ_TYPE_WEIGHTS = [("multiple-choice", 0.6), ("short_answer", 0.25), ("open-ended", 0.15)]
+ANSWERS_PER_QUIZ = 10
+_INSERT_CHUNK = 50_000
+
+
+def generate_history(
+    db: Session,
+    seed: int,
+    answers: int,
+    students: int = 1,
+    materials: int = 2,
+    topics: int = 6,
+    concepts_per_topic: int = 5,
+    days: int = 120,
+    now: datetime | None = None
+) -> dict:
+    """
+    Inserts `students` students, each with `materials` materials of
+    `topics` x `concepts_per_topic` concepts and `answers` answered questions
+    spread over the last `days` days. Same seed, same rows (ids included).
+    About 10% of answers are legacy name-only rows and 2% orphan concepts.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    quiz_types = [qt for qt, _ in QUIZ_TYPE_WEIGHTS]
+    quiz_weights = [w for _, w in QUIZ_TYPE_WEIGHTS]
+
+    student_rows, material_rows, topic_rows, concept_rows = [], [], [], []
+    quiz_rows, answer_rows = [], []
+    concepts_by_material: dict[int, list[tuple[int, str]]] = {}
+
+    for s in range(students):
+        student_id = s + 1
+        student_rows.append({"id": student_id, "name": f"bench-{seed}-{student_id}", "hashed_password": "x"})
+        for m in range(materials):
+            material_id = len(material_rows) + 1
+            material_rows.append({
+                "id": material_id,
+                "student_id": student_id,
+                "source": f"material-{m}.txt",
+                "text": f"synthetic material {m}",
+                "is_active": m == materials - 1,
+                "last_accessed": now,
+            })
+            concepts_by_material[material_id] = []
+            for t in range(topics):
+                topic_id = len(topic_rows) + 1
+                topic_rows.append({"id": topic_id, "study_material_id": material_id, "name": f"Topic {t}"})
+                for c in range(concepts_per_topic):
+                    concept_id = len(concept_rows) + 1
+                    name = f"Concept {t}.{c}"
+                    concept_rows.append({"id": concept_id, "topic_id": topic_id, "name": name})
+                    concepts_by_material[material_id].append((concept_id, name))
+
+        material_ids = [row["id"] for row in material_rows if row["student_id"] == student_id]
+        span_seconds = days * 86400
+        remaining = answers
+        while remaining > 0:
+            quiz_id = len(quiz_rows) + 1
+            size = min(ANSWERS_PER_QUIZ, remaining)
+            remaining -= size
+            material_id = rng.choice(material_ids)
+            quiz_type = rng.choices(quiz_types, quiz_weights)[0]
+            quiz_rows.append({
+                "id": quiz_id,
+                "student_id": student_id,
+                "study_material_id": material_id,
+                "score": 0,
+                "total_questions": size,
+                "quiz_type": quiz_type,
+                "duration_seconds": rng.randint(60, 900),
+                "active_seconds": rng.randint(30, 600),
+                "created_at": now - timedelta(seconds=rng.randint(0, span_seconds)),
+            })
+            for _ in range(size):
+                concept_id, name = rng.choice(concepts_by_material[material_id])
+                roll = rng.random()
+                if roll < 0.02:
+                    concept_id, name = None, f"Orphan {rng.randint(0, 9)}"
+                elif roll < 0.12:
+                    concept_id, name = None, name.lower()
+                answer_rows.append({
+                    "quiz_result_id": quiz_id,
+                    "concept_id": concept_id,
+                    "topic": name,
+                    "is_correct": rng.random() < 0.65,
+                })
+
+    for model, rows in (
+        (Student, student_rows), (StudyMaterial, material_rows), (Topic, topic_rows),
+        (Concept, concept_rows), (QuizResult, quiz_rows), (QuestionAnalytics, answer_rows),
+    ):
+        for start in range(0, len(rows), _INSERT_CHUNK):
+            db.execute(insert(model), rows[start:start + _INSERT_CHUNK])
+    db.commit()
+
+    return {
+        "students": students,
+        "materials": len(material_rows),
+        "concepts": len(concept_rows),
+        "quiz_results": len(quiz_rows),
+        "question_analytics": len(answer_rows),
+    }
+
+
+def _time(fn: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> dict:
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "runs": repeat,
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def run_size(size: int, seed: int, repeat: int, students: int, db_dir: str) -> list[dict]:
+    path = os.path.join(db_dir, f"analytics_bench_{seed}_{size}.db")
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _fast_writes(dbapi_connection, _):
+        # Throwaway database: durability does not matter, generation speed does
+        dbapi_connection.execute("PRAGMA synchronous=OFF")
+        dbapi_connection.execute("PRAGMA journal_mode=MEMORY")
+
+    run_migrations(engine, log=lambda _: None)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    student_id = 1
+    results = []
+
+    def record(name: str, stats: dict) -> None:
+        results.append({"size": size, "benchmark": name, **stats})
+        print(f"{size:>10} {name:<48} median {stats['median_ms']:>10.2f} ms")
+
+    try:
+        start = time.perf_counter()
+        counts = generate_history(db, seed, size, students=students)
+        generation_ms = round((time.perf_counter() - start) * 1000, 3)
+        print(f"{size:>10} generated {counts} in {generation_ms:.0f} ms")
+
+        mastery_repo = ConceptMasteryRepository(db)
+        trend_repo = LearningTrendRepository(db)
+        analytics_repo = AnalyticsRepository(db)
+        material_repo = MaterialConceptRepository(db)
+        history = AnalyticsService(analytics_repo, material_repo)
+        service = AnalyticsService(analytics_repo, material_repo, mastery_repo, trend_repo)
+        rollup_repo = HourlyRollupRepository(db)
+        rolled_up = AnalyticsService(analytics_repo, material_repo, mastery_repo, trend_repo, rollup_repo=rollup_repo)
+
+        record("mastery.rebuild", _time(lambda: mastery_repo.rebuild(student_id), 1))
+
+        pairs = material_repo.get_concept_pairs_for_student(student_id)
+        records = analytics_repo.fetch_question_analytics(student_id)
+        record("repository.fetch_question_analytics", _time(
+            lambda: analytics_repo.fetch_question_analytics(student_id), repeat
+        ))
+        record("calculator.build_results[rows]", _time(
+            lambda: AnalyticsCalculator._build_results_rows(pairs, records), repeat
+        ))
+        if columnar.np is not None:
+            record("calculator.build_results[columnar]", _time(
+                lambda: columnar.build_results_columnar(pairs, records), repeat
+            ))
+        record("service.get_weak_points[history]", _time(lambda: history.get_weak_points(student_id), repeat))
+        record("service.get_weak_points[mastery]", _time(lambda: service.get_weak_points(student_id), repeat))
+        record("service.get_recent_metrics", _time(lambda: service.get_recent_metrics(student_id, days=30), repeat))
+        record("rollup.rebuild", _time(lambda: rollup_repo.rebuild(student_id), 1))
+        record("service.get_recent_metrics[rollup]", _time(
+            lambda: rolled_up.get_recent_metrics(student_id, days=30), repeat
+        ))
+        record("service.get_learning_trend[full]", _time(
+            lambda: history.get_learning_trend(student_id, days=30), repeat
+        ))
+        record("service.get_learning_trend[cold]", _time(
+            lambda: service.get_learning_trend(student_id, days=30), repeat,
+            setup=lambda: trend_repo.reset(student_id)
+        ))
+        service.get_learning_trend(student_id, days=30)
+        record("service.get_learning_trend[warm]", _time(
+            lambda: service.get_learning_trend(student_id, days=30), repeat
+        ))
+        record("service.check_short_answer_readiness", _time(
+            lambda: service.check_short_answer_readiness(student_id), repeat
+        ))
+
+        # Builders on a prepared snapshot: only the selection logic is timed
+        snapshot = service.build_snapshot(student_id)
+        for builder in ("build_mcq_quiz_concepts", "build_short_quiz_concepts", "build_open_quiz_concepts"):
+            method = getattr(service, builder)
+            record(f"service.{builder}", _time(lambda: method(student_id, snapshot=snapshot), repeat))
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(path)
+    return results
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    """Benchmarks whose median regressed by more than `tolerance` (0.25 = 25%)."""
+    previous = {(r["size"], r["benchmark"]): r["median_ms"] for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result["size"], result["benchmark"]))
+        if before and result["median_ms"] > before * (1 + tolerance):
+            regressions.append(
+                f"{result['benchmark']} @ {result['size']}: {before:.2f} -> {result['median_ms']:.2f} ms"
+            )
+    return regressions
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--students", type=int, default=1, help="students with the same history size")
+    parser.add_argument("--db-dir", default=None, help="where the temporary SQLite files go")
+    parser.add_argument("--output", default="analytics_bench.json")
+    parser.add_argument("--compare", default=None, help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    db_dir = args.db_dir or tempfile.mkdtemp(prefix="analytics_bench_")
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args.seed, args.repeat, args.students, db_dir))
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "students": args.students,
+            "sizes": args.sizes,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "numpy": columnar.np is not None,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,261 @@
+"""
+Versioned schema migrations (SQLite and PostgreSQL).
+
+Usage (from backend/):
+    python migrations.py            # apply pending migrations
+    python migrations.py status     # list applied / pending versions
+
+Each migration runs in its own transaction and is recorded in
+schema_migrations. Steps are idempotent so databases created by the old
+create_all-at-import startup can be brought under version control.
+"""
+import sys
+from datetime import datetime, timezone
+from typing import Callable
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _create_tables(connection: Connection) -> None:
+    import models
+
+    models.Base.metadata.create_all(bind=connection)
+
+
+def _quiz_result_time_columns(connection: Connection) -> None:
+    existing = {col["name"] for col in inspect(connection).get_columns("quiz_results")}
+    if "duration_seconds" not in existing:
+        connection.execute(text("ALTER TABLE quiz_results ADD COLUMN duration_seconds INTEGER DEFAULT 0"))
+    if "active_seconds" not in existing:
+        connection.execute(text("ALTER TABLE quiz_results ADD COLUMN active_seconds INTEGER DEFAULT 0"))
+
+
+_HOT_PATH_INDEXES = [
+    ("ix_quiz_results_student_created", "quiz_results", "student_id, created_at"),
+    ("ix_quiz_results_student_material", "quiz_results", "student_id, study_material_id"),
+    ("ix_question_analytics_quiz_result_id", "question_analytics", "quiz_result_id"),
+    ("ix_question_analytics_concept_id", "question_analytics", "concept_id"),
+    ("ix_topics_study_material_id", "topics", "study_material_id"),
+    ("ix_study_materials_student_active", "study_materials", "student_id, is_active"),
+]
+
+
+def _hot_path_indexes(connection: Connection) -> None:
+    for name, table, columns in _HOT_PATH_INDEXES:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _material_content_hash(connection: Connection) -> None:
+    from modules.materials.upsert import material_content_hash
+
+    existing = {col["name"] for col in inspect(connection).get_columns("study_materials")}
+    if "content_hash" not in existing:
+        connection.execute(text("ALTER TABLE study_materials ADD COLUMN content_hash VARCHAR(64)"))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_study_materials_content_hash ON study_materials (content_hash)"
+    ))
+    rows = connection.execute(text("SELECT id, text FROM study_materials WHERE content_hash IS NULL")).all()
+    for material_id, material_text in rows:
+        connection.execute(
+            text("UPDATE study_materials SET content_hash = :hash WHERE id = :id"),
+            {"hash": material_content_hash(material_text), "id": material_id},
+        )
+
+
+def _analytics_hourly_rollup(connection: Connection) -> None:
+    import models
+
+    # Filled lazily per student on first read, so no backfill here
+    models.Base.metadata.create_all(bind=connection, tables=[
+        models.HourlyActivityRollup.__table__,
+        models.HourlyActivityRollupStatus.__table__,
+    ])
+
+
+def _concept_mastery_decay_columns(connection: Connection) -> None:
+    existing = {col["name"] for col in inspect(connection).get_columns("concept_mastery")}
+    added = False
+    for column in ("decayed_correct", "decayed_weight", "decayed_at"):
+        if column not in existing:
+            connection.execute(text(f"ALTER TABLE concept_mastery ADD COLUMN {column} FLOAT"))
+            added = True
+    if added:
+        # Existing rows have no decayed sums yet: rebuild every student lazily
+        connection.execute(text("DELETE FROM concept_mastery_status"))
+
+
+def _concept_review_schedule(connection: Connection) -> None:
+    import models
+
+    # Built lazily per student from the history, like the other derived tables
+    models.Base.metadata.create_all(bind=connection, tables=[
+        models.ConceptReviewSchedule.__table__,
+        models.ConceptReviewStatus.__table__,
+    ])
+
+
+def _canonical_concepts(connection: Connection) -> None:
+    import models
+
+    models.Base.metadata.create_all(bind=connection, tables=[models.CanonicalConcept.__table__])
+    existing = {col["name"] for col in inspect(connection).get_columns("concepts")}
+    if "canonical_concept_id" not in existing:
+        connection.execute(text(
+            "ALTER TABLE concepts ADD COLUMN canonical_concept_id INTEGER "
+            "REFERENCES canonical_concepts (id) ON DELETE SET NULL"
+        ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_concepts_canonical_concept_id ON concepts (canonical_concept_id)"
+    ))
+
+    rows = connection.execute(text(
+        "SELECT c.id, c.name, t.name, m.student_id FROM concepts c "
+        "JOIN topics t ON c.topic_id = t.id JOIN study_materials m ON t.study_material_id = m.id "
+        "WHERE c.canonical_concept_id IS NULL AND m.student_id IS NOT NULL ORDER BY c.id"
+    )).all()
+    canonical_ids = {
+        (student_id, norm_name): canonical_id
+        for canonical_id, student_id, norm_name in connection.execute(
+            text("SELECT id, student_id, norm_name FROM canonical_concepts")
+        )
+    }
+    for concept_id, name, topic_name, student_id in rows:
+        norm_name = (name or "").strip().lower()
+        if not norm_name:
+            continue
+        canonical_id = canonical_ids.get((student_id, norm_name))
+        if canonical_id is None:
+            canonical_id = connection.execute(
+                models.CanonicalConcept.__table__.insert().values(
+                    student_id=student_id, norm_name=norm_name, name=name.strip(), topic_name=topic_name
+                )
+            ).inserted_primary_key[0]
+            canonical_ids[(student_id, norm_name)] = canonical_id
+        connection.execute(
+            text("UPDATE concepts SET canonical_concept_id = :canonical_id WHERE id = :id"),
+            {"canonical_id": canonical_id, "id": concept_id},
+        )
+    # Trend windows are now keyed by canonical id: re-create snapshots lazily
+    connection.execute(text("DELETE FROM learning_trend_snapshots"))
+    connection.execute(text("DELETE FROM learning_trend_checkpoints"))
+
+
+def _concept_mastery_unique_key(connection: Connection) -> None:
+    duplicates = connection.execute(text(
+        "SELECT 1 FROM concept_mastery "
+        "GROUP BY student_id, study_material_id, concept_id, raw_concept, quiz_type HAVING COUNT(*) > 1 LIMIT 1"
+    )).first()
+    if duplicates:
+        # Derived rows: drop them and let every student rebuild lazily
+        connection.execute(text("DELETE FROM concept_mastery"))
+        connection.execute(text("DELETE FROM concept_mastery_status"))
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_concept_mastery_key ON concept_mastery "
+        "(student_id, study_material_id, concept_id, raw_concept, quiz_type)"
+    ))
+
+
+def _concept_canonical_foreign_key(connection: Connection) -> None:
+    # Databases that ran 008 before it declared the foreign key
+    connection.execute(text(
+        "UPDATE concepts SET canonical_concept_id = NULL WHERE canonical_concept_id IS NOT NULL "
+        "AND canonical_concept_id NOT IN (SELECT id FROM canonical_concepts)"
+    ))
+    if any(fk["referred_table"] == "canonical_concepts" for fk in inspect(connection).get_foreign_keys("concepts")):
+        return
+    if connection.dialect.name != "sqlite":
+        connection.execute(text(
+            "ALTER TABLE concepts ADD CONSTRAINT fk_concepts_canonical_concept_id FOREIGN KEY "
+            "(canonical_concept_id) REFERENCES canonical_concepts (id) ON DELETE SET NULL"
+        ))
+        return
+
+    # SQLite can't add a constraint: copy into a table created from the model, then swap
+    import models
+
+    metadata = MetaData()
+    for table in (models.Topic.__table__, models.CanonicalConcept.__table__):
+        table.to_metadata(metadata)
+    concepts_new = models.Concept.__table__.to_metadata(metadata, name="concepts_new")
+    concepts_new.indexes.clear()
+    concepts_new.create(bind=connection)
+    connection.execute(text(
+        "INSERT INTO concepts_new (id, topic_id, name, canonical_concept_id) "
+        "SELECT id, topic_id, name, canonical_concept_id FROM concepts"
+    ))
+    connection.execute(text("DROP TABLE concepts"))
+    connection.execute(text("ALTER TABLE concepts_new RENAME TO concepts"))
+    for index in models.Concept.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create_tables", _create_tables),
+    (2, "quiz_result_time_columns", _quiz_result_time_columns),
+    (3, "hot_path_indexes", _hot_path_indexes),
+    (4, "material_content_hash", _material_content_hash),
+    (5, "analytics_hourly_rollup", _analytics_hourly_rollup),
+    (6, "concept_mastery_decay_columns", _concept_mastery_decay_columns),
+    (7, "concept_review_schedule", _concept_review_schedule),
+    (8, "canonical_concepts", _canonical_concepts),
+    (9, "concept_mastery_unique_key", _concept_mastery_unique_key),
+    (10, "concept_canonical_foreign_key", _concept_canonical_foreign_key),
+]
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    _metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        return {row[0] for row in connection.execute(select(schema_migrations.c.version))}
+
+
+def run_migrations(engine: Engine, log: Callable[[str], None] = print) -> list[int]:
+    """Applies pending migrations in order; returns the versions applied now."""
+    done = applied_versions(engine)
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as connection:
+            step(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.now(timezone.utc)
+            ))
+        log(f"Applied migration {version:03d} {name}")
+        applied.append(version)
+    return applied
+
+
+def main(argv: list[str]) -> int:
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=Path(__file__).resolve().with_name(".env"))
+    from database import engine
+
+    command = argv[0] if argv else "upgrade"
+    if command == "status":
+        done = applied_versions(engine)
+        for version, name, _ in MIGRATIONS:
+            print(f"{version:03d} {name}: {'applied' if version in done else 'pending'}")
+        return 0
+    if command == "upgrade":
+        applied = run_migrations(engine)
+        if not applied:
+            print("Schema is up to date")
+        return 0
+    print(f"Unknown command: {command} (use 'upgrade' or 'status')")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
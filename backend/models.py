@@ -1,5 +1,9 @@
 from database import Base
 from modules.auth.models import Student
-from modules.materials.models import StudyMaterial, Topic, Concept
+from modules.materials.models import StudyMaterial, Topic, Concept, CanonicalConcept
 from modules.quizzes.models import QuizResult, QuestionAnalytics
 from modules.usage.models import DailyUsage
+from modules.analytics.models import (
+    ConceptMastery, ConceptMasteryStatus, LearningTrendSnapshot, LearningTrendCheckpoint,
+    HourlyActivityRollup, HourlyActivityRollupStatus, ConceptReviewSchedule, ConceptReviewStatus
+)
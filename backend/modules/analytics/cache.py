@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+_MISSING = object()
+
+
+class AnalyticsResultCache:
+    """
+    Bounded LRU + TTL cache for per-student analytics results.
+
+    Keys start with the student id so a student's entries can be dropped on
+    write; the data version inside the key keeps entries from other processes'
+    writes from being served. Values are shared: callers must treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get_or_compute(self, key: tuple[Hashable, ...], compute: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return compute()
+        value = self._get(key)
+        if value is not _MISSING:
+            return value
+        # Computed outside the lock: concurrent misses may both compute, last write wins
+        value = compute()
+        self._put(key, value)
+        return value
+
+    def _get(self, key: tuple) -> Any:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _put(self, key: tuple, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_student(self, student_id: int) -> None:
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == student_id]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_analytics_cache: AnalyticsResultCache | None = None
+
+
+def get_analytics_cache() -> AnalyticsResultCache:
+    """Process-wide cache; ANALYTICS_CACHE_SIZE=0 disables it."""
+    global _analytics_cache
+    if _analytics_cache is None:
+        _analytics_cache = AnalyticsResultCache(
+            max_entries=int(os.getenv("ANALYTICS_CACHE_SIZE", "1024") or 0),
+            ttl_seconds=float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300") or 0),
+        )
+    return _analytics_cache
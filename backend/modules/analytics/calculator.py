@@ -1,5 +1,6 @@
 from typing import Iterable
-from datetime import datetime
+from modules.analytics import decay
+from modules.analytics.records import AnalyticsRecord, as_records
 from modules.analytics.constants import QUIZ_TYPES, CONFIDENCE_WINDOW, EXPLORING_THRESHOLD_MCQ, EXPLORING_THRESHOLD_SHORT, EXPLORING_THRESHOLD_BLOOM
 
 
@@ -23,20 +24,8 @@ def _get_established_status(mastery: float) -> tuple[str, str]:
         return ("needs_practice", "Precisa de Prática")
 
 
-def _calculate_mastery_simple(items: list[dict], window_size: int = 7) -> float:
-    """
-    Simple mastery calculation for learning trend.
-    Returns mastery score 0.0-1.0 based on last N items.
-    """
-    if not items:
-        return 0.0
-    
-    window = items[:window_size]
-    if not window:
-        return 0.0
-    
-    correct = sum(1 for i in window if i.get("is_correct"))
-    return correct / len(window)
+def _sort_epoch(record: AnalyticsRecord) -> float:
+    return record.epoch if record.epoch is not None else 0.0
 
 
 class AnalyticsCalculator:
@@ -54,10 +43,37 @@ class AnalyticsCalculator:
         - status_key: str
         - status_label: str (PT-PT)
         """
-        count = len(items) if items else 0
-        
+        window = (items or [])[:CONFIDENCE_WINDOW]
+        correct = sum(1 for i in window if i.get("is_correct"))
+        return AnalyticsCalculator._score_data_from_window(len(window), correct, exploring_threshold)
+
+    @staticmethod
+    def _score_data_from_window(actual_count: int, correct: int, exploring_threshold: int = EXPLORING_THRESHOLD_MCQ) -> dict:
+        """Score data from the newest-window size and its correct answers."""
+        mastery = correct / actual_count if actual_count else 0.0
+        return AnalyticsCalculator._score_data(actual_count, mastery, exploring_threshold)
+
+    @staticmethod
+    def _score_data_from_decayed(
+        attempts: int,
+        weight: float,
+        correct: float,
+        exploring_threshold: int = EXPLORING_THRESHOLD_MCQ
+    ) -> dict:
+        """
+        Score data from time-decayed sums: mastery is the decayed accuracy and the
+        decayed weight stands in for the attempt count, so stale concepts drop back
+        to building/exploring until they are practised again.
+        """
+        if attempts == 0:
+            return AnalyticsCalculator._score_data(0, 0.0, exploring_threshold)
+        mastery = correct / weight if weight > 0 else 0.0
+        return AnalyticsCalculator._score_data(max(1, int(weight + 0.5)), mastery, exploring_threshold)
+
+    @staticmethod
+    def _score_data(actual_count: int, mastery: float, exploring_threshold: int) -> dict:
         # State: Not seen
-        if count == 0:
+        if actual_count == 0:
             return {
                 "score": None,
                 "confidence_level": "not_seen",
@@ -68,9 +84,6 @@ class AnalyticsCalculator:
                 "status_label": "Não Visto"
             }
 
-        window = items[:CONFIDENCE_WINDOW]
-        actual_count = len(window)
-
         # State: Exploring
         if actual_count < exploring_threshold:
             return {
@@ -83,9 +96,6 @@ class AnalyticsCalculator:
                 "status_label": "Em Exploração"
             }
         
-        # Calculate mastery
-        correct = sum(1 for i in window if i.get("is_correct"))
-        mastery = correct / actual_count
         score_pct = round(mastery * 100)
         
         # State: Building (5-6 attempts)
@@ -114,15 +124,9 @@ class AnalyticsCalculator:
         }
 
     @staticmethod
-    def build_results(
-        concept_pairs: Iterable[tuple[str, str]],
-        analytics_items: Iterable[dict]
-    ) -> list[dict]:
-        """
-        Build per-concept results with score_data per quiz type.
-        """
-        # 1. Initialize Skeleton (Group by Concept)
-        concept_groups: dict[tuple[str, str], list[dict]] = {}
+    def _init_groups(concept_pairs: Iterable[tuple[str, str]]) -> tuple[dict, dict[str, tuple[str, str]]]:
+        """Skeleton of (topic, concept) groups plus a lowercase concept-name lookup."""
+        concept_groups: dict[tuple[str, str], list] = {}
         concept_lookup: dict[str, tuple[str, str]] = {}
 
         for topic_name, concept_name in concept_pairs:
@@ -131,77 +135,202 @@ class AnalyticsCalculator:
             norm = concept_name.strip().lower()
             if norm and norm not in concept_lookup:
                 concept_lookup[norm] = key
+        return concept_groups, concept_lookup
+
+    @staticmethod
+    def _resolve_key(
+        t_name: str | None,
+        c_name: str | None,
+        raw_concept: str | None,
+        concept_lookup: dict[str, tuple[str, str]]
+    ) -> tuple[str, str] | None:
+        # Try direct match
+        if t_name and c_name:
+            return (t_name, c_name)
+
+        # Try fallback lookup
+        if raw_concept:
+            match = concept_lookup.get(raw_concept.strip().lower())
+            if match:
+                return match
+            # Orphan concept
+            return ("Outros", raw_concept)
+        return None
+
+    @staticmethod
+    def _build_entry(
+        t_name: str,
+        c_name: str,
+        windows: list[tuple[int, int]],
+        counts: tuple[int, int, int, int],
+        score_data: list[dict] | None = None
+    ) -> dict:
+        """
+        windows: (size, correct) of the newest window per QUIZ_TYPES; counts: (mcq, short, bloom, total).
+        score_data: precomputed per-type score data (decay mode) instead of the windows.
+        """
+        if score_data is None:
+            (mcq_len, mcq_ok), (short_len, short_ok), (bloom_len, bloom_ok) = windows
+            score_data = [
+                AnalyticsCalculator._score_data_from_window(mcq_len, mcq_ok),
+                AnalyticsCalculator._score_data_from_window(short_len, short_ok, EXPLORING_THRESHOLD_SHORT),
+                AnalyticsCalculator._score_data_from_window(bloom_len, bloom_ok, EXPLORING_THRESHOLD_BLOOM),
+            ]
+        return {
+            "topic": t_name,
+            "concept": c_name,
+            # Score data per type
+            "score_data_mcq": score_data[0],
+            "score_data_short": score_data[1],
+            "score_data_bloom": score_data[2],
+            # Counts for convenience
+            "total_questions_mcq": counts[0],
+            "total_questions_short": counts[1],
+            "total_questions_bloom": counts[2],
+            "total_questions": counts[3],
+        }
+
+    @staticmethod
+    def build_results(
+        concept_pairs: Iterable[tuple[str, str]],
+        analytics_items: Iterable[AnalyticsRecord | dict]
+    ) -> list[dict]:
+        """
+        Build per-concept results with score_data per quiz type.
+        Large histories go through the NumPy engine when it is available (same output).
+        """
+        from modules.analytics import columnar
+
+        records = as_records(analytics_items)
+        if len(records) >= columnar.COLUMNAR_MIN_ROWS and columnar.np is not None:
+            return columnar.build_results_columnar(concept_pairs, records)
+        return AnalyticsCalculator._build_results_rows(concept_pairs, records)
 
-        # 2. Group Analytics Items
-        for item in analytics_items:
-            t_name = item.get("topic_name")
-            c_name = item.get("concept_name")
-            raw_concept = item.get("raw_concept")
-
-            key = None
-
-            # Try direct match
-            if t_name and c_name:
-                key = (t_name, c_name)
-            
-            # Try fallback lookup
-            if not key and raw_concept:
-                match = concept_lookup.get(raw_concept.strip().lower())
-                if match:
-                    key = match
-                else:
-                    # Orphan concept
-                    key = ("Outros", raw_concept)
+    @staticmethod
+    def _build_results_rows(
+        concept_pairs: Iterable[tuple[str, str]],
+        records: list[AnalyticsRecord]
+    ) -> list[dict]:
+        # 1. Initialize Skeleton (Group by Concept)
+        concept_groups, concept_lookup = AnalyticsCalculator._init_groups(concept_pairs)
 
+        # 2. Group Analytics Records
+        for record in records:
+            key = AnalyticsCalculator._resolve_key(
+                record.topic_name, record.concept_name, record.raw_concept, concept_lookup
+            )
             if key:
                 if key not in concept_groups:
                     concept_groups[key] = []
-                concept_groups[key].append(item)
+                concept_groups[key].append(record)
 
         results = []
 
         # 3. Process Each Group
-        def _created_at_key(item: dict) -> float:
-            value = item.get("created_at")
-            if isinstance(value, datetime):
-                return value.timestamp()
-            if isinstance(value, str):
-                try:
-                    return datetime.fromisoformat(value).timestamp()
-                except ValueError:
-                    return 0.0
-            return 0.0
-
-        for (t_name, c_name), items in concept_groups.items():
-            # Sort by created_at descending (newest first)
-            sorted_items = sorted(
-                items,
-                key=_created_at_key,
-                reverse=True
+        for (t_name, c_name), group in concept_groups.items():
+            # Sort newest first (stable; unknown timestamps last)
+            ordered = sorted(group, key=_sort_epoch, reverse=True)
+
+            windows = []
+            type_counts = []
+            for code in range(len(QUIZ_TYPES)):
+                typed = [r for r in ordered if r.type_code == code]
+                window = typed[:CONFIDENCE_WINDOW]
+                windows.append((len(window), sum(1 for r in window if r.is_correct)))
+                type_counts.append(len(typed))
+
+            counts = (type_counts[0], type_counts[1], type_counts[2], len(ordered))
+            results.append(AnalyticsCalculator._build_entry(t_name, c_name, windows, counts))
+
+        return sorted(results, key=lambda x: (x["topic"], x["concept"]))
+
+    @staticmethod
+    def build_results_from_mastery(
+        concept_pairs: Iterable[tuple[str, str]],
+        mastery_rows: Iterable[dict]
+    ) -> list[dict]:
+        """
+        Same output as build_results, computed from concept_mastery rows
+        (newest-first windows + attempt counts) instead of the raw history.
+        """
+        concept_groups, concept_lookup = AnalyticsCalculator._init_groups(concept_pairs)
+
+        for row in mastery_rows:
+            key = AnalyticsCalculator._resolve_key(
+                row.get("topic_name"), row.get("concept_name"), row.get("raw_concept"), concept_lookup
             )
+            if key:
+                if key not in concept_groups:
+                    concept_groups[key] = []
+                concept_groups[key].append(row)
+
+        results = []
+        for (t_name, c_name), rows in concept_groups.items():
+            windows: dict[str, list] = {qt: [] for qt in QUIZ_TYPES}
+            type_counts: dict[str, int] = {qt: 0 for qt in QUIZ_TYPES}
+            total = 0
+            for row in rows:
+                total += row.get("attempts_count", 0)
+                quiz_type = row.get("quiz_type")
+                if quiz_type in windows:
+                    windows[quiz_type].extend(row.get("recent_results") or [])
+                    type_counts[quiz_type] += row.get("attempts_count", 0)
+
+            per_type = []
+            for qt in QUIZ_TYPES:
+                # Several rows can map to one concept (e.g. across materials): merge newest first
+                entries = sorted(windows[qt], key=lambda e: e[0], reverse=True)[:CONFIDENCE_WINDOW]
+                per_type.append((len(entries), sum(1 for _, correct in entries if correct)))
+
+            counts = (
+                type_counts["multiple-choice"],
+                type_counts["short_answer"],
+                type_counts["open-ended"],
+                total,
+            )
+            results.append(AnalyticsCalculator._build_entry(t_name, c_name, per_type, counts))
+
+        return sorted(results, key=lambda x: (x["topic"], x["concept"]))
+
+    @staticmethod
+    def build_results_from_decayed(
+        concept_pairs: Iterable[tuple[str, str]],
+        mastery_rows: Iterable[dict],
+        now_epoch: float
+    ) -> list[dict]:
+        """
+        Same entries as build_results_from_mastery, scored from the rows'
+        time-decayed sums (decayed_state) as of `now_epoch`. O(rows), no windows.
+        """
+        concept_groups, concept_lookup = AnalyticsCalculator._init_groups(concept_pairs)
+
+        for row in mastery_rows:
+            key = AnalyticsCalculator._resolve_key(
+                row.get("topic_name"), row.get("concept_name"), row.get("raw_concept"), concept_lookup
+            )
+            if key:
+                concept_groups.setdefault(key, []).append(row)
+
+        thresholds = (EXPLORING_THRESHOLD_MCQ, EXPLORING_THRESHOLD_SHORT, EXPLORING_THRESHOLD_BLOOM)
+        results = []
+        for (t_name, c_name), rows in concept_groups.items():
+            sums = {qt: [0, 0.0, 0.0] for qt in QUIZ_TYPES}  # attempts, weight, correct
+            total = 0
+            for row in rows:
+                total += row.get("attempts_count", 0)
+                quiz_type = row.get("quiz_type")
+                if quiz_type in sums:
+                    correct, weight = decay.value_at(row.get("decayed_state") or decay.EMPTY_STATE, now_epoch)
+                    entry = sums[quiz_type]
+                    entry[0] += row.get("attempts_count", 0)
+                    entry[1] += weight
+                    entry[2] += correct
 
-            # Filter by quiz type (preserves sort order)
-            mcq_items = [i for i in sorted_items if i.get("quiz_type") == "multiple-choice"]
-            short_items = [i for i in sorted_items if i.get("quiz_type") == "short_answer"]
-            bloom_items = [i for i in sorted_items if i.get("quiz_type") == "open-ended"]
-
-            # Calculate score_data for each type
-            score_data_mcq = AnalyticsCalculator._calculate_score_data(mcq_items)
-            score_data_short = AnalyticsCalculator._calculate_score_data(short_items, EXPLORING_THRESHOLD_SHORT)
-            score_data_bloom = AnalyticsCalculator._calculate_score_data(bloom_items, EXPLORING_THRESHOLD_BLOOM)
-
-            results.append({
-                "topic": t_name,
-                "concept": c_name,
-                # Score data per type
-                "score_data_mcq": score_data_mcq,
-                "score_data_short": score_data_short,
-                "score_data_bloom": score_data_bloom,
-                # Counts for convenience
-                "total_questions_mcq": len(mcq_items),
-                "total_questions_short": len(short_items),
-                "total_questions_bloom": len(bloom_items),
-                "total_questions": len(sorted_items),
-            })
+            score_data = [
+                AnalyticsCalculator._score_data_from_decayed(*sums[qt], threshold)
+                for qt, threshold in zip(QUIZ_TYPES, thresholds)
+            ]
+            counts = tuple(sums[qt][0] for qt in QUIZ_TYPES) + (total,)
+            results.append(AnalyticsCalculator._build_entry(t_name, c_name, [], counts, score_data))
 
         return sorted(results, key=lambda x: (x["topic"], x["concept"]))
@@ -0,0 +1,136 @@
+import math
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from modules.analytics.calculator import AnalyticsCalculator
+from modules.analytics.errors import AnalyticsServiceError
+from modules.analytics.ports import CohortAnalyticsRepositoryPort
+from modules.materials.ports import MaterialConceptPairsRepositoryPort
+
+# Not exposed over HTTP: a cohort is every account holding the same material text,
+# and Student has no teacher/class scope, so any student could read other students'
+# mastery (and beat the size threshold with extra accounts). Route it only behind a
+# real role check or an explicit class/group membership.
+
+# Below this many students no concept distribution is returned (privacy)
+COHORT_MIN_STUDENTS = 3
+# Cohorts at least this large are split across COHORT_WORKERS processes
+COHORT_PARALLEL_MIN_STUDENTS = 200
+
+_SCORE_KEYS = {"mcq": "score_data_mcq", "short": "score_data_short", "bloom": "score_data_bloom"}
+
+
+def _empty_level() -> dict:
+    return {"confidence": {}, "status": {}, "scores": []}
+
+
+def aggregate_students(concept_pairs: list[tuple[str, str]], rows_by_student: dict[int, list[dict]]) -> dict:
+    """
+    Folds per-student results into mergeable per-concept counters.
+    Module-level (picklable) so chunks can run in worker processes.
+    """
+    _, concept_lookup = AnalyticsCalculator._init_groups(concept_pairs)
+    reference = set(concept_pairs)
+    totals: dict[tuple[str, str], dict] = {}
+
+    for rows in rows_by_student.values():
+        for row in rows:
+            # Each student's copy has its own Concept rows: align them on the reference names
+            if row.get("concept_name"):
+                match = concept_lookup.get(row["concept_name"].strip().lower())
+                if match:
+                    row["topic_name"], row["concept_name"] = match
+
+        for result in AnalyticsCalculator.build_results_from_mastery(concept_pairs, rows):
+            key = (result["topic"], result["concept"])
+            if key not in reference:
+                continue
+            entry = totals.setdefault(key, {level: _empty_level() for level in _SCORE_KEYS})
+            for level, score_key in _SCORE_KEYS.items():
+                score_data = result[score_key]
+                bucket = entry[level]
+                confidence = score_data["confidence_level"]
+                bucket["confidence"][confidence] = bucket["confidence"].get(confidence, 0) + 1
+                bucket["status"][score_data["status_key"]] = bucket["status"].get(score_data["status_key"], 0) + 1
+                if score_data["score"] is not None:
+                    bucket["scores"].append(score_data["score"])
+    return totals
+
+
+def merge_aggregates(parts: list[dict]) -> dict:
+    merged: dict[tuple[str, str], dict] = {}
+    for part in parts:
+        for key, entry in part.items():
+            target = merged.setdefault(key, {level: _empty_level() for level in _SCORE_KEYS})
+            for level, bucket in entry.items():
+                into = target[level]
+                for field in ("confidence", "status"):
+                    for name, count in bucket[field].items():
+                        into[field][name] = into[field].get(name, 0) + count
+                into["scores"].extend(bucket["scores"])
+    return merged
+
+
+class CohortAnalyticsService:
+    """Per-concept mastery distributions for all students sharing a material."""
+
+    def __init__(
+        self,
+        cohort_repo: CohortAnalyticsRepositoryPort,
+        material_repo: MaterialConceptPairsRepositoryPort,
+        workers: int | None = None
+    ):
+        self.cohort_repo = cohort_repo
+        self.material_repo = material_repo
+        self.workers = workers if workers is not None else int(os.getenv("COHORT_WORKERS", "0") or 0)
+
+    def get_material_cohort(self, owner_id: int, material_id: int) -> dict:
+        material_ids = self.cohort_repo.find_cohort_material_ids(owner_id, material_id)
+        if material_ids is None:
+            raise AnalyticsServiceError("Material not found", status_code=404)
+
+        concept_pairs = self.material_repo.get_concept_pairs(material_id)
+        rows_by_student: dict[int, list[dict]] = {}
+        for row in self.cohort_repo.fetch_cohort_windows(material_ids):
+            rows_by_student.setdefault(row["student_id"], []).append(row)
+
+        students = len(rows_by_student)
+        response = {
+            "material_id": material_id,
+            "materials": len(material_ids),
+            "students": students,
+            "min_students": COHORT_MIN_STUDENTS,
+            "concepts": [],
+        }
+        if students < COHORT_MIN_STUDENTS:
+            return response
+
+        totals = self._aggregate(concept_pairs, rows_by_student)
+        for (topic, concept), entry in sorted(totals.items()):
+            item = {"topic": topic, "concept": concept}
+            for level, bucket in entry.items():
+                scores = bucket["scores"]
+                item[level] = {
+                    "confidence": bucket["confidence"],
+                    "status": bucket["status"],
+                    "scored_students": len(scores),
+                    # fsum/median: independent of how students were chunked across workers
+                    "mean_score": math.fsum(scores) / len(scores) if scores else None,
+                    "median_score": statistics.median(scores) if scores else None,
+                }
+            response["concepts"].append(item)
+        return response
+
+    def _aggregate(self, concept_pairs: list[tuple[str, str]], rows_by_student: dict[int, list[dict]]) -> dict:
+        if self.workers <= 1 or len(rows_by_student) < COHORT_PARALLEL_MIN_STUDENTS:
+            return aggregate_students(concept_pairs, rows_by_student)
+
+        student_ids = sorted(rows_by_student)
+        chunk_size = -(-len(student_ids) // self.workers)
+        chunks = [
+            {sid: rows_by_student[sid] for sid in student_ids[i:i + chunk_size]}
+            for i in range(0, len(student_ids), chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            parts = list(pool.map(aggregate_students, [concept_pairs] * len(chunks), chunks))
+        return merge_aggregates(parts)
@@ -10,3 +10,6 @@ EXPLORING_THRESHOLD_BLOOM = 3
 
 # Quiz types
 QUIZ_TYPES = ["multiple-choice", "short_answer", "open-ended"]
+
+# Half-life of an answer in the time-decayed mastery mode (rebuild after changing)
+MASTERY_HALF_LIFE_DAYS = 14
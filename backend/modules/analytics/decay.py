@@ -0,0 +1,36 @@
+"""
+Exponentially time-decayed mastery state.
+
+A state is (correct, weight, at): the decayed sums of correct answers and of
+all answers, both expressed at epoch `at`. Folding an answer or reading the
+state at another time is O(1), whatever the history size.
+"""
+from modules.analytics.constants import MASTERY_HALF_LIFE_DAYS
+
+HALF_LIFE_SECONDS = MASTERY_HALF_LIFE_DAYS * 86400.0
+
+DecayState = tuple[float, float, float | None]
+EMPTY_STATE: DecayState = (0.0, 0.0, None)
+
+
+def decay_factor(elapsed_seconds: float) -> float:
+    return 0.5 ** (max(0.0, elapsed_seconds) / HALF_LIFE_SECONDS)
+
+
+def fold(state: DecayState, epoch: float, is_correct: bool) -> DecayState:
+    """Adds one answer given at `epoch`; answers older than `at` enter already decayed."""
+    correct, weight, at = state
+    if at is None or epoch >= at:
+        factor = decay_factor(epoch - at) if at is not None else 1.0
+        return (correct * factor + (1.0 if is_correct else 0.0), weight * factor + 1.0, epoch)
+    factor = decay_factor(at - epoch)
+    return (correct + (factor if is_correct else 0.0), weight + factor, at)
+
+
+def value_at(state: DecayState, now_epoch: float) -> tuple[float, float]:
+    """(correct, weight) decayed to `now_epoch`."""
+    correct, weight, at = state
+    if at is None:
+        return (0.0, 0.0)
+    factor = decay_factor(now_epoch - at)
+    return (correct * factor, weight * factor)
@@ -1,7 +1,13 @@
+import os
 from fastapi import Depends
 from sqlalchemy.orm import Session
 from database import get_db
-from modules.analytics.repository import AnalyticsRepository
+from modules.analytics.cache import AnalyticsResultCache, get_analytics_cache
+from modules.analytics.repository import (
+    AnalyticsRepository, ConceptMasteryRepository, ConceptWindowRepository,
+    DecayedMasteryRepository, HourlyRollupRepository, LearningTrendRepository, ReviewScheduleRepository
+)
+from modules.analytics.ports import ConceptMasteryReaderPort
 from modules.analytics.service import AnalyticsService
 from modules.materials.repository import MaterialConceptRepository
 from modules.materials.ports import MaterialConceptPairsRepositoryPort
@@ -15,8 +21,43 @@ def get_analytics_repo(db: Session = Depends(get_db)):
     return AnalyticsRepository(db)
 
 
+def get_mastery_repo(db: Session = Depends(get_db)):
+    # "window": compute per-concept windows on the fly (ROW_NUMBER) instead of the maintained table
+    # "decay": score the maintained table's time-decayed sums instead of the newest-answer windows
+    source = os.getenv("ANALYTICS_MASTERY_SOURCE", "table").strip().lower()
+    if source == "window":
+        return ConceptWindowRepository(db)
+    if source == "decay":
+        return DecayedMasteryRepository(db)
+    return ConceptMasteryRepository(db)
+
+
+def get_trend_repo(db: Session = Depends(get_db)):
+    return LearningTrendRepository(db)
+
+
+def get_rollup_repo(db: Session = Depends(get_db)):
+    return HourlyRollupRepository(db)
+
+
+def get_review_repo(db: Session = Depends(get_db)):
+    # "due": pick quiz concepts from the spaced-repetition due-queue instead of the weak-point buckets
+    if os.getenv("QUIZ_CONCEPT_SELECTION", "adaptive").strip().lower() == "due":
+        return ReviewScheduleRepository(db)
+    return None
+
+
+def get_result_cache() -> AnalyticsResultCache:
+    return get_analytics_cache()
+
+
 def get_analytics_service(
     material_repo: MaterialConceptPairsRepositoryPort = Depends(get_material_repo),
-    analytics_repo: AnalyticsRepository = Depends(get_analytics_repo)
+    analytics_repo: AnalyticsRepository = Depends(get_analytics_repo),
+    mastery_repo: ConceptMasteryReaderPort = Depends(get_mastery_repo),
+    trend_repo: LearningTrendRepository = Depends(get_trend_repo),
+    cache: AnalyticsResultCache = Depends(get_result_cache),
+    rollup_repo: HourlyRollupRepository = Depends(get_rollup_repo)
 ):
-    return AnalyticsService(analytics_repo, material_repo)
+    return AnalyticsService(analytics_repo, material_repo, mastery_repo, trend_repo, cache, rollup_repo)
+
@@ -0,0 +1,4 @@
+class AnalyticsServiceError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
@@ -0,0 +1,48 @@
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+EXPORT_COLUMNS = [
+    "quiz_result_id", "created_at", "quiz_type", "study_material_id",
+    "concept_id", "concept_name", "topic_name", "raw_concept", "is_correct",
+]
+# Rows are joined into chunks of about this size before being sent
+_CHUNK_BYTES = 64 * 1024
+
+
+def _chunked(lines: Iterable[str]) -> Iterator[str]:
+    buffer: list[str] = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= _CHUNK_BYTES:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def ndjson_chunks(rows: Iterable[dict]) -> Iterator[str]:
+    return _chunked(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+
+def csv_chunks(rows: Iterable[dict]) -> Iterator[str]:
+    def _lines():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return _chunked(_lines())
@@ -0,0 +1,134 @@
+from sqlalchemy import Column, Integer, Float, String, Text, ForeignKey, DateTime, Date, Index, UniqueConstraint
+from database import Base
+from datetime import datetime, timezone
+
+
+class ConceptMastery(Base):
+    """
+    Derived per-(student, material, concept, quiz_type) state.
+    Keeps only the newest CONFIDENCE_WINDOW answers plus the total attempt count,
+    and the time-decayed sums read by the "decay" scoring mode (see decay.py).
+    """
+    __tablename__ = "concept_mastery"
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    study_material_id = Column(Integer, ForeignKey("study_materials.id"), nullable=True)
+    concept_id = Column(Integer, nullable=True) # Not a FK: concepts are replaced on re-analysis
+    raw_concept = Column(String, nullable=True) # QuestionAnalytics.topic (fallback name)
+    quiz_type = Column(String, nullable=True)
+    recent_results = Column(Text, default="[]", nullable=False) # JSON [[epoch, 0|1], ...] newest first
+    attempts_count = Column(Integer, default=0, nullable=False)
+    decayed_correct = Column(Float, default=0.0, nullable=True)
+    decayed_weight = Column(Float, default=0.0, nullable=True)
+    decayed_at = Column(Float, nullable=True) # UTC epoch the decayed sums refer to
+
+    __table_args__ = (
+        Index("ix_concept_mastery_student_material", "student_id", "study_material_id"),
+        # One row per key: a save racing a rebuild fails instead of duplicating mastery
+        Index(
+            "uq_concept_mastery_key",
+            "student_id", "study_material_id", "concept_id", "raw_concept", "quiz_type",
+            unique=True,
+        ),
+    )
+
+
+class ConceptMasteryStatus(Base):
+    """Marks students whose concept_mastery rows are complete (built from their full history)."""
+    __tablename__ = "concept_mastery_status"
+
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    rebuilt_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class LearningTrendSnapshot(Base):
+    """
+    Learning-trend levels of one closed local day (only days with answers).
+    by_level: JSON {quiz_type: {"value": int | null, "questions": int}} before min_questions.
+    """
+    __tablename__ = "learning_trend_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    tz_offset_minutes = Column(Integer, nullable=False, default=0)
+    day = Column(Date, nullable=False)
+    by_level = Column(Text, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("student_id", "tz_offset_minutes", "day", name="uq_learning_trend_snapshot_day"),
+    )
+
+
+class LearningTrendCheckpoint(Base):
+    """Trend engine state (per-concept windows) after the last snapshotted local day."""
+    __tablename__ = "learning_trend_checkpoints"
+
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    tz_offset_minutes = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    state = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class HourlyActivityRollup(Base):
+    """
+    Per (student, UTC hour, quiz_type) totals of saved quizzes. Local days for
+    any whole-hour offset are sums of 24 of these rows.
+    """
+    __tablename__ = "analytics_hourly_rollup"
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    hour_utc = Column(DateTime, nullable=False) # naive UTC, truncated to the hour
+    quiz_type = Column(String, nullable=True)
+    sessions = Column(Integer, default=0, nullable=False)
+    active_seconds = Column(Integer, default=0, nullable=False)
+    duration_seconds = Column(Integer, default=0, nullable=False)
+    answers_correct = Column(Integer, default=0, nullable=False)
+    answers_total = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("student_id", "hour_utc", "quiz_type", name="uq_analytics_hourly_rollup_hour"),
+    )
+
+
+class HourlyActivityRollupStatus(Base):
+    """Marks students whose hourly rollup is complete (built from their full history)."""
+    __tablename__ = "analytics_hourly_rollup_status"
+
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    rebuilt_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class ConceptReviewSchedule(Base):
+    """
+    Spaced-repetition state per (student, material, concept, quiz_type), updated
+    on every quiz save. Concept selection reads it in due_at order.
+    """
+    __tablename__ = "concept_review_schedule"
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    study_material_id = Column(Integer, ForeignKey("study_materials.id"), nullable=True)
+    concept_id = Column(Integer, nullable=True) # Not a FK: concepts are replaced on re-analysis
+    raw_concept = Column(String, nullable=True)
+    quiz_type = Column(String, nullable=True)
+    repetitions = Column(Integer, default=0, nullable=False)
+    interval_days = Column(Float, default=0.0, nullable=False)
+    ease = Column(Float, nullable=False)
+    last_reviewed_at = Column(DateTime, nullable=True) # naive UTC
+    due_at = Column(DateTime, nullable=False) # naive UTC
+
+    __table_args__ = (
+        Index("ix_concept_review_due", "student_id", "quiz_type", "due_at"),
+    )
+
+
+class ConceptReviewStatus(Base):
+    """Marks students whose review schedule was built from their full history."""
+    __tablename__ = "concept_review_status"
+
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    rebuilt_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
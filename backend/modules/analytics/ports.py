@@ -1,16 +1,98 @@
-from typing import Protocol, TYPE_CHECKING, List, Dict, Any, Optional
+from typing import Protocol, TYPE_CHECKING, List, Dict, Any, Optional, Callable, Iterator
 
 if TYPE_CHECKING:
-    pass
+    from modules.analytics.records import AnalyticsRecord
+    from modules.analytics.snapshot import AnalyticsSnapshot
 
 
 class AnalyticsServicePort(Protocol):
-    def get_weak_points(self, student_id: int, material_id: int | None = None) -> Any: ...
-    def get_adaptive_topics(self, student_id: int, material_id: int | None = None) -> Any: ...
-    def get_recent_metrics(self, student_id: int, days: int = 30, tz_offset_minutes: int = 0) -> Any: ...
-    def get_learning_trend(self, student_id: int, days: int = 30, tz_offset_minutes: int = 0, min_questions: int = 1) -> Any: ...
+    def get_weak_points(self, student_id: int, material_id: int | None = None, data_version: Optional[str] = None) -> Any: ...
+    def build_snapshot(self, student_id: int, material_id: int | None = None) -> "AnalyticsSnapshot": ...
+    def get_adaptive_topics(
+        self,
+        student_id: int,
+        material_id: int | None = None,
+        snapshot: Optional["AnalyticsSnapshot"] = None
+    ) -> Any: ...
+    def get_recent_metrics(
+        self, student_id: int, days: int = 30, tz_offset_minutes: int = 0, data_version: Optional[str] = None
+    ) -> Any: ...
+    def get_learning_trend(
+        self,
+        student_id: int,
+        days: int = 30,
+        tz_offset_minutes: int = 0,
+        min_questions: int = 1,
+        data_version: Optional[str] = None
+    ) -> Any: ...
+    def get_data_version(self, student_id: int) -> Optional[str]: ...
+    def export_history(self, student_id: int, export_format: str = "ndjson", material_id: int | None = None) -> Iterator[str]: ...
+    def get_dashboard(
+        self,
+        student_id: int,
+        sections: Optional[List[str]] = None,
+        material_id: int | None = None,
+        days: int = 30,
+        tz_offset_minutes: int = 0,
+        min_questions: int = 1,
+        data_version: Optional[str] = None
+    ) -> Dict: ...
+
+
+class AnalyticsResultCachePort(Protocol):
+    def get_or_compute(self, key: tuple, compute: Callable[[], Any]) -> Any: ...
+
+
+class AnalyticsCacheInvalidatorPort(Protocol):
+    def invalidate_student(self, student_id: int) -> None: ...
 
 
 class AnalyticsRepositoryPort(Protocol):
-    def fetch_question_analytics(self, student_id: int, material_id: int | None = None) -> List[Dict]: ...
-    def fetch_quiz_sessions(self, student_id: int, start_utc, end_utc) -> List[Dict]: ...
+    def fetch_question_analytics(self, student_id: int, material_id: int | None = None) -> List["AnalyticsRecord"]: ...
+    def fetch_daily_session_totals(self, student_id: int, start_utc, end_utc, tz_offset_minutes: int = 0) -> List[Dict]: ...
+    def iter_answer_history(self, student_id: int, material_id: int | None = None, batch_size: int = 1000) -> Iterator[Dict]: ...
+    def fetch_concept_attempt_counts(self, student_id: int, material_id: int | None, quiz_type: str) -> List[Dict]: ...
+    def fetch_data_version(self, student_id: int) -> Optional[str]: ...
+
+
+class SessionTotalsReaderPort(Protocol):
+    def fetch_daily_session_totals(self, student_id: int, start_utc, end_utc, tz_offset_minutes: int = 0) -> List[Dict]: ...
+
+
+class HourlyRollupRepositoryPort(SessionTotalsReaderPort, Protocol):
+    def apply_result(self, result: Any, answers: List[Any]) -> None: ...
+
+
+class ReviewScheduleReaderPort(Protocol):
+    def fetch_due(
+        self, student_id: int, material_id: int | None, quiz_type: str, limit: int, concepts: set[str] | None = None
+    ) -> List[Dict]: ...
+    def fetch_scheduled_concepts(self, student_id: int, material_id: int | None, quiz_type: str) -> set[str]: ...
+
+
+class ReviewScheduleRepositoryPort(ReviewScheduleReaderPort, Protocol):
+    def apply_answers(self, result: Any, answers: List[Any]) -> None: ...
+
+
+class ConceptMasteryReaderPort(Protocol):
+    def fetch_mastery(self, student_id: int, material_id: int | None = None) -> List[Dict]: ...
+
+
+class ConceptMasteryRepositoryPort(ConceptMasteryReaderPort, Protocol):
+    def apply_answers(self, result: Any, answers: List[Any]) -> None: ...
+
+
+class LearningTrendRepositoryPort(Protocol):
+    def fetch_question_events(self, student_id: int, start_utc, end_utc) -> List["AnalyticsRecord"]: ...
+    def get_checkpoint(self, student_id: int, tz_offset_minutes: int) -> Any: ...
+    def fetch_snapshots(self, student_id: int, tz_offset_minutes: int, start_day, end_day) -> Dict: ...
+    def save_progress(self, student_id: int, tz_offset_minutes: int, day, state: Dict, snapshots: Dict) -> bool: ...
+
+
+class CohortAnalyticsRepositoryPort(Protocol):
+    def find_cohort_material_ids(self, owner_id: int, material_id: int) -> Optional[List[int]]: ...
+    def fetch_cohort_windows(self, material_ids: List[int]) -> List[Dict]: ...
+
+
+class CohortAnalyticsServicePort(Protocol):
+    def get_material_cohort(self, owner_id: int, material_id: int) -> Dict: ...
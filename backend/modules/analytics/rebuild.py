@@ -0,0 +1,257 @@
+"""
+Offline recompute of every derived analytics table.
+
+Usage (from backend/):
+    python -m modules.analytics.rebuild                          # all students
+    python -m modules.analytics.rebuild 12 57                    # only these students
+    python -m modules.analytics.rebuild --workers 4 --shard-size 200 --pause-ms 20
+    python -m modules.analytics.rebuild --checkpoint rebuild.json   # resume an interrupted run
+
+Needed after changing the mastery rules (CONFIDENCE_WINDOW, exploring
+thresholds, MASTERY_HALF_LIFE_DAYS, review scheduling). Per student it
+rebuilds concept_mastery, the hourly rollup and the review schedule in one
+transaction, then drops and re-creates the learning-trend snapshots for
+--trend-offsets. Students never rebuilt are also picked up lazily on their
+next read or quiz save. Every rebuild holds the student row lock that quiz
+saves take, so the job can run while the app is serving.
+
+Students are sharded by id range (id // shard-size) across a process pool.
+Every finished shard is recorded in the checkpoint file, with the students
+that failed in it; a rerun with the same checkpoint skips those shards but
+retries their failed students (--restart ignores it). --pause-ms
+sleeps between students to keep the load low on a production database.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Callable
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+from models import Student  # noqa: E402
+from modules.analytics.repository import (  # noqa: E402
+    AnalyticsRepository, ConceptMasteryRepository, HourlyRollupRepository, LearningTrendRepository,
+    ReviewScheduleRepository
+)
+from modules.analytics.service import AnalyticsService  # noqa: E402
+from modules.materials.repository import MaterialConceptRepository  # noqa: E402
+
+DEFAULT_SHARD_SIZE = 200
+# Trend snapshots are per timezone: warm the ones most clients use, the rest build on first read
+DEFAULT_TREND_OFFSETS = [0]
+_TREND_WARM_DAYS = 90
+
+_worker_sessions: Callable[[], Session] | None = None
+
+
+def recompute_student(db: Session, student_id: int, trend_offsets: list[int]) -> None:
+    """Rebuilds one student's derived rows; raises on failure (after rolling back)."""
+    try:
+        ConceptMasteryRepository(db)._rebuild(student_id)
+        HourlyRollupRepository(db)._rebuild(student_id)
+        ReviewScheduleRepository(db)._rebuild(student_id)
+        LearningTrendRepository(db).reset(student_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    service = AnalyticsService(
+        AnalyticsRepository(db), MaterialConceptRepository(db), trend_repo=LearningTrendRepository(db)
+    )
+    for offset in trend_offsets:
+        service.get_learning_trend(student_id, days=_TREND_WARM_DAYS, tz_offset_minutes=offset)
+
+
+def run_shard(
+    session_factory: Callable[[], Session],
+    student_ids: list[int],
+    trend_offsets: list[int],
+    pause_seconds: float = 0.0
+) -> tuple[int, list[int]]:
+    """Recomputes a shard; returns (students done, failed student ids)."""
+    failed = []
+    db = session_factory()
+    try:
+        for index, student_id in enumerate(student_ids):
+            if index and pause_seconds:
+                time.sleep(pause_seconds)
+            try:
+                recompute_student(db, student_id, trend_offsets)
+            except Exception as e:
+                print(f"Error recomputing analytics for student {student_id}: {e}")
+                failed.append(student_id)
+    finally:
+        db.close()
+    return len(student_ids) - len(failed), failed
+
+
+def _init_worker(database_url: str) -> None:
+    global _worker_sessions
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args, pool_pre_ping=True)
+    _worker_sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _run_shard_in_worker(student_ids: list[int], trend_offsets: list[int], pause_seconds: float):
+    return run_shard(_worker_sessions, student_ids, trend_offsets, pause_seconds)
+
+
+def shard_students(student_ids: list[int], shard_size: int) -> dict[int, list[int]]:
+    """Id-range shards: a shard keeps its number when students are added later."""
+    shards: dict[int, list[int]] = {}
+    for student_id in sorted(set(student_ids)):
+        shards.setdefault(student_id // shard_size, []).append(student_id)
+    return shards
+
+
+def _load_checkpoint(path: str | None, shard_size: int) -> dict:
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            checkpoint = json.load(fh)
+        if checkpoint.get("shard_size") == shard_size:
+            return checkpoint
+        print(f"Ignoring checkpoint {path}: it was written with another --shard-size")
+    return {"shard_size": shard_size, "completed_shards": [], "failed_students": []}
+
+
+def _save_checkpoint(path: str | None, checkpoint: dict) -> None:
+    if not path:
+        return
+    checkpoint["updated_at"] = datetime.now(timezone.utc).isoformat()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(checkpoint, fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_recompute(
+    student_ids: list[int],
+    session_factory: Callable[[], Session] | None = None,
+    database_url: str | None = None,
+    workers: int = 1,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    checkpoint_path: str | None = None,
+    restart: bool = False,
+    trend_offsets: list[int] | None = None,
+    pause_seconds: float = 0.0,
+    log: Callable[[str], None] = print
+) -> dict:
+    """
+    Recomputes `student_ids` shard by shard. workers == 1 runs in-process with
+    `session_factory`; more workers each open their own engine on `database_url`.
+    """
+    trend_offsets = DEFAULT_TREND_OFFSETS if trend_offsets is None else trend_offsets
+    checkpoint = _load_checkpoint(None if restart else checkpoint_path, shard_size)
+    completed = set(checkpoint["completed_shards"])
+    shards = shard_students(student_ids, shard_size)
+    failed = set(checkpoint["failed_students"])
+    pending = {shard: ids for shard, ids in shards.items() if shard not in completed}
+    if len(pending) < len(shards):
+        log(f"Resuming: {len(shards) - len(pending)}/{len(shards)} shards already done")
+    # A completed shard still owes its failed students a retry
+    for shard, ids in shards.items():
+        retry = [student_id for student_id in ids if student_id in failed]
+        if shard in completed and retry:
+            pending[shard] = retry
+    total_students = sum(len(ids) for ids in pending.values())
+
+    done_students = 0
+    failed_now: set[int] = set()
+    started = time.perf_counter()
+
+    def _record(shard: int, done: int, shard_failed: list[int]) -> None:
+        nonlocal done_students
+        done_students += done + len(shard_failed)
+        failed.difference_update(pending[shard])
+        failed.update(shard_failed)
+        failed_now.update(shard_failed)
+        completed.add(shard)
+        checkpoint["completed_shards"] = sorted(completed)
+        checkpoint["failed_students"] = sorted(failed)
+        _save_checkpoint(checkpoint_path, checkpoint)
+
+        elapsed = time.perf_counter() - started
+        rate = done_students / elapsed if elapsed > 0 else 0.0
+        eta = (total_students - done_students) / rate if rate > 0 else 0.0
+        log(
+            f"[{len(completed)}/{len(shards)} shards] {done_students}/{total_students} students, "
+            f"{len(failed_now)} failed, {rate:.1f} students/s, ETA {eta:.0f}s"
+        )
+
+    if workers <= 1 or len(pending) <= 1:
+        if session_factory is None:
+            _init_worker(database_url)
+            session_factory = _worker_sessions
+        for shard, ids in sorted(pending.items()):
+            _record(shard, *run_shard(session_factory, ids, trend_offsets, pause_seconds))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(database_url,)) as pool:
+            futures = {
+                pool.submit(_run_shard_in_worker, ids, trend_offsets, pause_seconds): shard
+                for shard, ids in sorted(pending.items())
+            }
+            for future in as_completed(futures):
+                _record(futures[future], *future.result())
+
+    return {
+        "shards": len(shards),
+        "students": done_students,
+        "failed_students": sorted(failed_now),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("student_ids", type=int, nargs="*", help="default: every student")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--checkpoint", default=None, help="JSON file recording finished shards")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--trend-offsets", type=int, nargs="*", default=DEFAULT_TREND_OFFSETS,
+                        help="timezone offsets (minutes) whose trend snapshots are re-created")
+    parser.add_argument("--pause-ms", type=int, default=0, help="sleep between students")
+    args = parser.parse_args(argv)
+    if args.shard_size <= 0:
+        parser.error("--shard-size must be positive")
+
+    from database import SQLALCHEMY_DATABASE_URL, SessionLocal
+
+    student_ids = args.student_ids
+    if not student_ids:
+        db = SessionLocal()
+        try:
+            student_ids = [row[0] for row in db.query(Student.id).order_by(Student.id).all()]
+        finally:
+            db.close()
+
+    summary = run_recompute(
+        student_ids,
+        session_factory=SessionLocal,
+        database_url=SQLALCHEMY_DATABASE_URL,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart,
+        trend_offsets=args.trend_offsets,
+        pause_seconds=args.pause_ms / 1000,
+    )
+    failed = summary["failed_students"]
+    print(f"Recomputed analytics for {summary['students'] - len(failed)}/{summary['students']} students "
+          f"in {summary['seconds']:.1f}s")
+    if failed:
+        print(f"Failed students: {' '.join(str(student_id) for student_id in failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
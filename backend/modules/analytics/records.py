@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+from modules.analytics.constants import QUIZ_TYPES
+
+# Interned quiz-type codes: QUIZ_TYPES index, plus markers for missing/unknown types
+QUIZ_TYPE_CODES = {qt: code for code, qt in enumerate(QUIZ_TYPES)}
+TYPE_UNSET = -1 # quiz_type NULL (older rows); counted as multiple-choice by the trend
+TYPE_OTHER = len(QUIZ_TYPES) # unknown type: only in total_questions
+
+
+def to_epoch(value) -> float | None:
+    """UTC epoch seconds for a datetime / ISO string (naive = UTC); None if unknown."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def quiz_type_code(quiz_type: str | None) -> int:
+    if quiz_type is None:
+        return TYPE_UNSET
+    return QUIZ_TYPE_CODES.get(quiz_type, TYPE_OTHER)
+
+
+class AnalyticsRecord:
+    """
+    One answered question, as read by the analytics engines.
+    Timestamps are pre-normalized to UTC epoch seconds and quiz types to codes.
+    """
+    __slots__ = (
+        "is_correct", "concept_id", "raw_concept", "concept_name", "topic_name", "epoch", "type_code", "canonical_id"
+    )
+
+    def __init__(
+        self,
+        is_correct: bool,
+        concept_id: int | None,
+        raw_concept: str | None,
+        concept_name: str | None,
+        topic_name: str | None,
+        epoch: float | None,
+        type_code: int,
+        canonical_id: int | None = None
+    ):
+        self.is_correct = is_correct
+        self.concept_id = concept_id
+        self.raw_concept = raw_concept
+        self.concept_name = concept_name
+        self.topic_name = topic_name
+        self.epoch = epoch
+        self.type_code = type_code
+        self.canonical_id = canonical_id
+
+    @classmethod
+    def from_row(cls, row) -> "AnalyticsRecord":
+        """From a query row with is_correct, concept_id, raw_concept, created_at, quiz_type (names optional)."""
+        return cls(
+            bool(row.is_correct),
+            row.concept_id,
+            row.raw_concept,
+            getattr(row, "concept_name", None),
+            getattr(row, "topic_name", None),
+            to_epoch(row.created_at),
+            quiz_type_code(row.quiz_type),
+            getattr(row, "canonical_id", None),
+        )
+
+    @classmethod
+    def from_dict(cls, item: dict) -> "AnalyticsRecord":
+        return cls(
+            bool(item.get("is_correct")),
+            item.get("concept_id"),
+            item.get("raw_concept"),
+            item.get("concept_name"),
+            item.get("topic_name"),
+            to_epoch(item.get("created_at")),
+            quiz_type_code(item.get("quiz_type")),
+            item.get("canonical_id"),
+        )
+
+    @property
+    def quiz_type(self) -> str | None:
+        if 0 <= self.type_code < len(QUIZ_TYPES):
+            return QUIZ_TYPES[self.type_code]
+        return None
+
+    def __repr__(self) -> str:
+        return (
+            f"AnalyticsRecord(concept_id={self.concept_id!r}, raw_concept={self.raw_concept!r}, "
+            f"type_code={self.type_code}, epoch={self.epoch}, is_correct={self.is_correct})"
+        )
+
+
+def as_records(items) -> list[AnalyticsRecord]:
+    """Accepts records or legacy dict rows."""
+    return [item if isinstance(item, AnalyticsRecord) else AnalyticsRecord.from_dict(item) for item in items]
@@ -1,12 +1,115 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator
+from sqlalchemy import Date, case, cast, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from models import QuizResult, QuestionAnalytics, Concept, Topic
+from models import (
+    QuizResult, QuestionAnalytics, Concept, Topic, StudyMaterial, Student,
+    ConceptMastery, ConceptMasteryStatus, LearningTrendSnapshot, LearningTrendCheckpoint,
+    HourlyActivityRollup, HourlyActivityRollupStatus, ConceptReviewSchedule, ConceptReviewStatus
+)
+from modules.analytics import decay, review
+from modules.analytics.constants import CONFIDENCE_WINDOW
+from modules.analytics.records import AnalyticsRecord, to_epoch
+
+
+def _fetch_recent_windows(
+    db: Session,
+    student_id: int | None,
+    material_id: int | None = None,
+    window: int = CONFIDENCE_WINDOW,
+    per_material: bool = False,
+    material_ids: list[int] | None = None,
+    per_student: bool = False
+) -> list[dict]:
+    """
+    Newest `window` answers per (concept_id, raw concept, quiz_type) via ROW_NUMBER(),
+    plus total counts from a GROUP BY. Only rows the calculator scores leave the DB.
+    Portable window syntax: SQLite >= 3.25 and PostgreSQL.
+
+    per_material / per_student add study_material_id / student_id to the partition;
+    material_ids scopes a cohort (several students' copies of one material).
+    """
+    partition = [
+        ("concept_id", QuestionAnalytics.concept_id),
+        ("raw_concept", QuestionAnalytics.topic),
+        ("quiz_type", QuizResult.quiz_type),
+    ]
+    if per_material:
+        partition.append(("study_material_id", QuizResult.study_material_id))
+    if per_student:
+        partition.append(("student_id", QuizResult.student_id))
+    labels = [label for label, _ in partition]
+    columns = [column for _, column in partition]
+
+    def _scoped(query):
+        query = query.join(QuizResult, QuestionAnalytics.quiz_result_id == QuizResult.id)
+        if student_id is not None:
+            query = query.filter(QuizResult.student_id == student_id)
+        if material_id:
+            query = query.filter(QuizResult.study_material_id == material_id)
+        if material_ids is not None:
+            query = query.filter(QuizResult.study_material_id.in_(material_ids))
+        return query
+
+    ranked = _scoped(
+        db.query(
+            *(column.label(label) for label, column in partition),
+            QuestionAnalytics.is_correct,
+            QuizResult.created_at,
+            func.row_number().over(
+                partition_by=columns,
+                # QA id breaks ties like the stable sort in build_results
+                order_by=(QuizResult.created_at.desc(), QuestionAnalytics.id.asc()),
+            ).label("rn"),
+        )
+    ).subquery()
+
+    recent = (
+        db.query(ranked)
+        .filter(ranked.c.rn <= window)
+        .order_by(ranked.c.rn)
+        .all()
+    )
+    counts = _scoped(
+        db.query(*columns, func.count(QuestionAnalytics.id)).group_by(*columns)
+    ).all()
+
+    groups: dict[tuple, dict] = {}
+    for row in counts:
+        key = tuple(row[:-1])
+        group = {"study_material_id": None, "student_id": None}
+        group.update(zip(labels, key))
+        group["recent_results"] = []
+        group["attempts_count"] = row[-1]
+        groups[key] = group
+    for row in recent:
+        group = groups.get(tuple(getattr(row, label) for label in labels))
+        if group is not None:
+            group["recent_results"].append([to_epoch(row.created_at) or 0.0, 1 if row.is_correct else 0])
+    return list(groups.values())
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """QuizResult.created_at is a naive UTC column."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _local_day_expr(db: Session, column, tz_offset_minutes: int):
+    """Local calendar date of a naive-UTC timestamp column, shifted in SQL."""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(column, f"{int(tz_offset_minutes):+d} minutes")
+    return cast(column + timedelta(minutes=int(tz_offset_minutes)), Date)
 
 
 class AnalyticsRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def fetch_question_analytics(self, student_id: int, material_id: int | None = None) -> list[dict]:
+    def fetch_question_analytics(self, student_id: int, material_id: int | None = None) -> list[AnalyticsRecord]:
         """Returns analytics records with resolved concept/topic names."""
         try:
             query = (
@@ -16,7 +119,8 @@ class AnalyticsRepository:
                     QuestionAnalytics.topic.label("raw_concept"),
                     Concept.name.label("concept_name"),
                     Topic.name.label("topic_name"),
-                    QuizResult.created_at, # Added timestamp
+                    Concept.canonical_concept_id.label("canonical_id"),
+                    QuizResult.created_at,
                     QuizResult.quiz_type,
                 )
                 .join(QuizResult, QuestionAnalytics.quiz_result_id == QuizResult.id)
@@ -27,49 +131,917 @@ class AnalyticsRepository:
             if material_id:
                 query = query.filter(QuizResult.study_material_id == material_id)
 
-            rows = query.all()
+            return [AnalyticsRecord.from_row(row) for row in query.all()]
+        except Exception as e:
+            print(f"Error fetching analytics records: {e}")
+            return []
+
+    def fetch_daily_session_totals(self, student_id: int, start_utc, end_utc, tz_offset_minutes: int = 0) -> list[dict]:
+        """
+        Per (local day, quiz_type) session counts and time sums for [start_utc, end_utc).
+        Bucketing happens in SQL, so the cost follows the number of days, not sessions.
+        """
+        try:
+            local_day = _local_day_expr(self.db, QuizResult.created_at, tz_offset_minutes)
+            rows = (
+                self.db.query(
+                    local_day.label("day"),
+                    QuizResult.quiz_type,
+                    func.count(QuizResult.id).label("tests"),
+                    func.sum(case((QuizResult.active_seconds > 0, QuizResult.active_seconds), else_=0)).label("active_seconds"),
+                    func.sum(case((QuizResult.duration_seconds > 0, QuizResult.duration_seconds), else_=0)).label("duration_seconds"),
+                )
+                .filter(
+                    QuizResult.student_id == student_id,
+                    QuizResult.created_at >= _to_naive_utc(start_utc),
+                    QuizResult.created_at < _to_naive_utc(end_utc),
+                )
+                .group_by(local_day, QuizResult.quiz_type)
+                .all()
+            )
+            return [
+                {
+                    "day": date.fromisoformat(row.day) if isinstance(row.day, str) else row.day,
+                    "quiz_type": row.quiz_type,
+                    "tests": row.tests,
+                    "active_seconds": int(row.active_seconds or 0),
+                    "duration_seconds": int(row.duration_seconds or 0),
+                }
+                for row in rows
+            ]
+        except Exception as e:
+            print(f"Error fetching daily session totals: {e}")
+            return []
+
+    def iter_answer_history(
+        self,
+        student_id: int,
+        material_id: int | None = None,
+        batch_size: int = 1000
+    ) -> Iterator[dict]:
+        """
+        Streams every answer (oldest first) with concept/topic names. yield_per keeps
+        only `batch_size` rows in memory, whatever the history size.
+        """
+        query = (
+            select(
+                QuizResult.id.label("quiz_result_id"),
+                QuizResult.created_at,
+                QuizResult.quiz_type,
+                QuizResult.study_material_id,
+                QuestionAnalytics.concept_id,
+                Concept.name.label("concept_name"),
+                Topic.name.label("topic_name"),
+                QuestionAnalytics.topic.label("raw_concept"),
+                QuestionAnalytics.is_correct,
+            )
+            .select_from(QuestionAnalytics)
+            .join(QuizResult, QuestionAnalytics.quiz_result_id == QuizResult.id)
+            .outerjoin(Concept, QuestionAnalytics.concept_id == Concept.id)
+            .outerjoin(Topic, Concept.topic_id == Topic.id)
+            .where(QuizResult.student_id == student_id)
+            .order_by(QuizResult.created_at, QuestionAnalytics.id)
+            .execution_options(yield_per=batch_size)
+        )
+        if material_id:
+            query = query.where(QuizResult.study_material_id == material_id)
+        try:
+            for row in self.db.execute(query).mappings():
+                item = dict(row)
+                created_at = item["created_at"]
+                item["created_at"] = created_at.isoformat() if isinstance(created_at, datetime) else created_at
+                item["is_correct"] = bool(item["is_correct"])
+                yield item
+        except Exception as e:
+            # Headers are already sent: the export ends early
+            print(f"Error streaming answer history: {e}")
+            self.db.rollback()
+
+    def fetch_concept_attempt_counts(self, student_id: int, material_id: int | None, quiz_type: str) -> list[dict]:
+        """
+        Attempts of one quiz type per answered concept key, as a single GROUP BY.
+        Keys answered only in other types are returned with 0 so orphan concepts
+        are counted exactly as in the weak-points build.
+        """
+        try:
+            query = (
+                self.db.query(
+                    QuestionAnalytics.concept_id,
+                    QuestionAnalytics.topic.label("raw_concept"),
+                    Concept.name.label("concept_name"),
+                    Topic.name.label("topic_name"),
+                    func.sum(case((QuizResult.quiz_type == quiz_type, 1), else_=0)).label("attempts"),
+                )
+                .join(QuizResult, QuestionAnalytics.quiz_result_id == QuizResult.id)
+                .outerjoin(Concept, QuestionAnalytics.concept_id == Concept.id)
+                .outerjoin(Topic, Concept.topic_id == Topic.id)
+                .filter(QuizResult.student_id == student_id)
+            )
+            if material_id:
+                query = query.filter(QuizResult.study_material_id == material_id)
+            rows = query.group_by(
+                QuestionAnalytics.concept_id, QuestionAnalytics.topic, Concept.name, Topic.name
+            ).all()
             return [
                 {
-                    "is_correct": row.is_correct,
                     "concept_id": row.concept_id,
                     "raw_concept": row.raw_concept,
                     "concept_name": row.concept_name,
                     "topic_name": row.topic_name,
-                    "created_at": row.created_at, # Added timestamp
-                    "quiz_type": row.quiz_type,
+                    "attempts": int(row.attempts or 0),
                 }
                 for row in rows
             ]
         except Exception as e:
-            print(f"Error fetching analytics records: {e}")
+            print(f"Error fetching concept attempt counts: {e}")
             return []
 
-    def fetch_quiz_sessions(self, student_id: int, start_utc, end_utc) -> list[dict]:
-        """Returns quiz sessions for a student within [start_utc, end_utc)."""
+    def fetch_data_version(self, student_id: int) -> str | None:
+        """
+        Cheap fingerprint of everything the analytics endpoints read: changes when a
+        quiz is saved or deleted, or a material is created, updated, activated or deleted.
+        Two index-backed aggregates; None when it cannot be computed.
+        """
         try:
+            quiz_max, quiz_count = (
+                self.db.query(func.max(QuizResult.id), func.count(QuizResult.id))
+                .filter(QuizResult.student_id == student_id)
+                .one()
+            )
+            material_max, material_count, last_accessed = (
+                self.db.query(
+                    func.max(StudyMaterial.id),
+                    func.count(StudyMaterial.id),
+                    func.max(StudyMaterial.last_accessed),
+                )
+                .filter(StudyMaterial.student_id == student_id)
+                .one()
+            )
+            accessed = last_accessed.isoformat() if isinstance(last_accessed, datetime) else last_accessed
+            return f"q{quiz_max or 0}.{quiz_count}-m{material_max or 0}.{material_count}-{accessed or ''}"
+        except Exception as e:
+            print(f"Error fetching analytics data version: {e}")
+            return None
+
+
+def _lock_student(db: Session, student_id: int) -> None:
+    """Serializes writers of one student's derived rows until the transaction ends (no-op on SQLite)."""
+    db.query(Student.id).filter(Student.id == student_id).with_for_update().first()
+
+
+def _mark_built(db: Session, status_model, student_id: int) -> None:
+    """Inserts or touches a student's status row; a row inserted concurrently counts as built."""
+    status = db.get(status_model, student_id)
+    if status is not None:
+        status.rebuilt_at = datetime.now(timezone.utc)
+        return
+    try:
+        with db.begin_nested():
+            db.add(status_model(student_id=student_id))
+    except IntegrityError:
+        pass
+
+
+class ConceptMasteryRepository:
+    """
+    Maintains concept_mastery incrementally on every quiz save.
+    Students without a status row are rebuilt from their full history first.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _is_built(self, student_id: int) -> bool:
+        return self.db.get(ConceptMasteryStatus, student_id) is not None
+
+    def apply_answers(self, result: QuizResult, answers: list[QuestionAnalytics]) -> None:
+        """Folds one saved quiz into the mastery rows. Does not commit."""
+        # Read-modify-write of the JSON windows: concurrent saves for one student wait
+        # on the student row until this transaction commits (SQLite serializes writers anyway).
+        _lock_student(self.db, result.student_id)
+        if not self._is_built(result.student_id):
+            self._rebuild(result.student_id)
+            return
+
+        answered_at = to_epoch(result.created_at) or 0.0
+        new_entries: dict[tuple, list] = {}
+        for answer in answers:
+            key = (answer.concept_id, answer.topic)
+            new_entries.setdefault(key, []).append([answered_at, 1 if answer.is_correct else 0])
+        if not new_entries:
+            return
+
+        existing = {
+            (row.concept_id, row.raw_concept): row
+            for row in self.db.query(ConceptMastery).filter(
+                ConceptMastery.student_id == result.student_id,
+                ConceptMastery.study_material_id == result.study_material_id,
+                ConceptMastery.quiz_type == result.quiz_type,
+            ).with_for_update()
+        }
+        for (concept_id, raw_concept), entries in new_entries.items():
+            row = existing.get((concept_id, raw_concept))
+            if row is None:
+                row = ConceptMastery(
+                    student_id=result.student_id,
+                    study_material_id=result.study_material_id,
+                    concept_id=concept_id,
+                    raw_concept=raw_concept,
+                    quiz_type=result.quiz_type,
+                    recent_results="[]",
+                    attempts_count=0,
+                )
+                self.db.add(row)
+            # Same quiz => same timestamp; answer order is kept ahead of older entries.
+            window = entries + json.loads(row.recent_results or "[]")
+            row.recent_results = json.dumps(window[:CONFIDENCE_WINDOW])
+            row.attempts_count = (row.attempts_count or 0) + len(entries)
+            state = (row.decayed_correct or 0.0, row.decayed_weight or 0.0, row.decayed_at)
+            for epoch, correct in entries:
+                state = decay.fold(state, epoch, correct)
+            row.decayed_correct, row.decayed_weight, row.decayed_at = state
+
+    def _rebuild(self, student_id: int) -> None:
+        _lock_student(self.db, student_id)
+        self.db.query(ConceptMastery).filter(ConceptMastery.student_id == student_id).delete(synchronize_session=False)
+
+        rows = {}
+        for group in _fetch_recent_windows(self.db, student_id, per_material=True):
+            row = ConceptMastery(
+                student_id=student_id,
+                study_material_id=group["study_material_id"],
+                concept_id=group["concept_id"],
+                raw_concept=group["raw_concept"],
+                quiz_type=group["quiz_type"],
+                recent_results=json.dumps(group["recent_results"]),
+                attempts_count=group["attempts_count"],
+            )
+            rows[(group["study_material_id"], group["concept_id"], group["raw_concept"], group["quiz_type"])] = row
+            self.db.add(row)
+
+        # Decayed sums need every answer once, oldest first (same fold as apply_answers)
+        states: dict[tuple, decay.DecayState] = {}
+        history = (
+            self.db.query(
+                QuizResult.study_material_id,
+                QuestionAnalytics.concept_id,
+                QuestionAnalytics.topic,
+                QuizResult.quiz_type,
+                QuizResult.created_at,
+                QuestionAnalytics.is_correct,
+            )
+            .join(QuizResult, QuestionAnalytics.quiz_result_id == QuizResult.id)
+            .filter(QuizResult.student_id == student_id)
+            .order_by(QuizResult.created_at.asc(), QuestionAnalytics.id.asc())
+            .yield_per(1000)
+        )
+        for material_id, concept_id, topic, quiz_type, created_at, is_correct in history:
+            key = (material_id, concept_id, topic, quiz_type)
+            states[key] = decay.fold(states.get(key, decay.EMPTY_STATE), to_epoch(created_at) or 0.0, bool(is_correct))
+        for key, row in rows.items():
+            row.decayed_correct, row.decayed_weight, row.decayed_at = states.get(key, decay.EMPTY_STATE)
+
+        self.db.flush()
+        _mark_built(self.db, ConceptMasteryStatus, student_id)
+
+    def rebuild(self, student_id: int) -> bool:
+        """Recomputes a student's rows from QuestionAnalytics (existing data / rule changes)."""
+        try:
+            self._rebuild(student_id)
+            self.db.commit()
+            return True
+        except Exception as e:
+            print(f"Error rebuilding concept mastery: {e}")
+            self.db.rollback()
+            return False
+
+    def _ensure_built(self, student_id: int) -> None:
+        """Lazy first build on the read path, under the same student lock as quiz saves."""
+        if self._is_built(student_id):
+            return
+        try:
+            _lock_student(self.db, student_id)
+            # Built by a concurrent read or save while this one waited for the lock
+            if not self._is_built(student_id):
+                self._rebuild(student_id)
+            self.db.commit()
+        except Exception as e:
+            print(f"Error rebuilding concept mastery: {e}")
+            self.db.rollback()
+
+    def fetch_mastery(self, student_id: int, material_id: int | None = None) -> list[dict]:
+        """Returns mastery rows with resolved concept/topic names (O(concepts))."""
+        try:
+            self._ensure_built(student_id)
+
+            query = (
+                self.db.query(
+                    ConceptMastery.concept_id,
+                    ConceptMastery.raw_concept,
+                    ConceptMastery.quiz_type,
+                    ConceptMastery.recent_results,
+                    ConceptMastery.attempts_count,
+                    ConceptMastery.decayed_correct,
+                    ConceptMastery.decayed_weight,
+                    ConceptMastery.decayed_at,
+                    Concept.name.label("concept_name"),
+                    Topic.name.label("topic_name"),
+                )
+                .outerjoin(Concept, ConceptMastery.concept_id == Concept.id)
+                .outerjoin(Topic, Concept.topic_id == Topic.id)
+                .filter(ConceptMastery.student_id == student_id)
+            )
+            if material_id:
+                query = query.filter(ConceptMastery.study_material_id == material_id)
+
+            return [
+                {
+                    "concept_id": row.concept_id,
+                    "raw_concept": row.raw_concept,
+                    "concept_name": row.concept_name,
+                    "topic_name": row.topic_name,
+                    "quiz_type": row.quiz_type,
+                    "recent_results": json.loads(row.recent_results or "[]"),
+                    "attempts_count": row.attempts_count or 0,
+                    "decayed_state": (row.decayed_correct or 0.0, row.decayed_weight or 0.0, row.decayed_at),
+                }
+                for row in query.all()
+            ]
+        except Exception as e:
+            print(f"Error fetching concept mastery: {e}")
+            return []
+
+
+class DecayedMasteryRepository(ConceptMasteryRepository):
+    """
+    Same concept_mastery rows, scored from the time-decayed sums instead of the
+    newest-answer windows (AnalyticsCalculator.build_results_from_decayed).
+    """
+    scoring = "decay"
+
+
+class ConceptWindowRepository:
+    """
+    Computes the same per-concept windows as concept_mastery straight from
+    QuestionAnalytics with a window-function query. No derived state to keep.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def fetch_mastery(self, student_id: int, material_id: int | None = None) -> list[dict]:
+        try:
+            groups = _fetch_recent_windows(self.db, student_id, material_id)
+            names = _concept_names(self.db, {g["concept_id"] for g in groups if g["concept_id"] is not None})
+            for group in groups:
+                group["concept_name"], group["topic_name"] = names.get(group["concept_id"], (None, None))
+            return groups
+        except Exception as e:
+            print(f"Error fetching concept windows: {e}")
+            return []
+
+
+class CohortAnalyticsRepository:
+    """Reads for every student holding a copy of one material (same content_hash)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def find_cohort_material_ids(self, owner_id: int, material_id: int) -> list[int] | None:
+        """Materials in the owner's material group; None if the owner has no such material."""
+        try:
+            material = (
+                self.db.query(StudyMaterial.id, StudyMaterial.content_hash)
+                .filter(StudyMaterial.id == material_id, StudyMaterial.student_id == owner_id)
+                .first()
+            )
+            if material is None:
+                return None
+            if not material.content_hash:
+                return [material.id]
             rows = (
+                self.db.query(StudyMaterial.id)
+                .filter(StudyMaterial.content_hash == material.content_hash)
+                .order_by(StudyMaterial.id)
+                .all()
+            )
+            return [row[0] for row in rows]
+        except Exception as e:
+            print(f"Error loading material cohort: {e}")
+            return None
+
+    def fetch_cohort_windows(self, material_ids: list[int]) -> list[dict]:
+        """Per-(student, concept, quiz_type) windows for the whole cohort in one grouped query."""
+        try:
+            groups = _fetch_recent_windows(self.db, None, material_ids=material_ids, per_student=True)
+            names = _concept_names(self.db, {g["concept_id"] for g in groups if g["concept_id"] is not None})
+            for group in groups:
+                group["concept_name"], group["topic_name"] = names.get(group["concept_id"], (None, None))
+            return groups
+        except Exception as e:
+            print(f"Error fetching cohort windows: {e}")
+            return []
+
+
+def _concept_names(db: Session, concept_ids: set[int]) -> dict[int, tuple[str, str]]:
+    if not concept_ids:
+        return {}
+    rows = (
+        db.query(Concept.id, Concept.name, Topic.name)
+        .outerjoin(Topic, Concept.topic_id == Topic.id)
+        .filter(Concept.id.in_(concept_ids))
+        .all()
+    )
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+class LearningTrendRepository:
+    """Closed-day learning-trend snapshots plus the engine checkpoint they end on."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def fetch_question_events(self, student_id: int, start_utc: datetime | None, end_utc: datetime) -> list[AnalyticsRecord]:
+        """Answers in [start_utc, end_utc) in chronological order (start None = from the beginning)."""
+        try:
+            query = (
                 self.db.query(
+                    QuestionAnalytics.is_correct,
+                    QuestionAnalytics.concept_id,
+                    QuestionAnalytics.topic.label("raw_concept"),
+                    Concept.canonical_concept_id.label("canonical_id"),
                     QuizResult.created_at,
                     QuizResult.quiz_type,
-                    QuizResult.duration_seconds,
-                    QuizResult.active_seconds,
                 )
+                .join(QuizResult, QuestionAnalytics.quiz_result_id == QuizResult.id)
+                .outerjoin(Concept, QuestionAnalytics.concept_id == Concept.id)
+                .filter(QuizResult.student_id == student_id, QuizResult.created_at < _to_naive_utc(end_utc))
+            )
+            if start_utc is not None:
+                query = query.filter(QuizResult.created_at >= _to_naive_utc(start_utc))
+            rows = query.order_by(QuizResult.created_at, QuestionAnalytics.id).all()
+            return [AnalyticsRecord.from_row(row) for row in rows]
+        except Exception as e:
+            print(f"Error fetching trend events: {e}")
+            return []
+
+    def get_checkpoint(self, student_id: int, tz_offset_minutes: int) -> tuple[date, dict] | None:
+        try:
+            row = self.db.get(LearningTrendCheckpoint, (student_id, tz_offset_minutes))
+            if row is None:
+                return None
+            return row.day, json.loads(row.state)
+        except Exception as e:
+            print(f"Error loading trend checkpoint: {e}")
+            return None
+
+    def fetch_snapshots(self, student_id: int, tz_offset_minutes: int, start_day: date, end_day: date) -> dict[date, dict]:
+        try:
+            rows = (
+                self.db.query(LearningTrendSnapshot.day, LearningTrendSnapshot.by_level)
                 .filter(
-                    QuizResult.student_id == student_id,
-                    QuizResult.created_at >= start_utc,
-                    QuizResult.created_at < end_utc,
+                    LearningTrendSnapshot.student_id == student_id,
+                    LearningTrendSnapshot.tz_offset_minutes == tz_offset_minutes,
+                    LearningTrendSnapshot.day >= start_day,
+                    LearningTrendSnapshot.day <= end_day,
                 )
                 .all()
             )
-            return [
-                {
-                    "created_at": row.created_at,
+            return {row.day: json.loads(row.by_level) for row in rows}
+        except Exception as e:
+            print(f"Error fetching trend snapshots: {e}")
+            return {}
+
+    def save_progress(
+        self,
+        student_id: int,
+        tz_offset_minutes: int,
+        day: date,
+        state: dict,
+        snapshots: dict[date, dict]
+    ) -> bool:
+        """Stores new closed-day snapshots and moves the checkpoint to `day`."""
+        try:
+            for snapshot_day, by_level in snapshots.items():
+                self.db.add(LearningTrendSnapshot(
+                    student_id=student_id,
+                    tz_offset_minutes=tz_offset_minutes,
+                    day=snapshot_day,
+                    by_level=json.dumps(by_level),
+                ))
+            checkpoint = self.db.get(LearningTrendCheckpoint, (student_id, tz_offset_minutes))
+            if checkpoint is None:
+                checkpoint = LearningTrendCheckpoint(student_id=student_id, tz_offset_minutes=tz_offset_minutes)
+                self.db.add(checkpoint)
+            checkpoint.day = day
+            checkpoint.state = json.dumps(state)
+            checkpoint.updated_at = datetime.now(timezone.utc)
+            self.db.commit()
+            return True
+        except Exception as e:
+            # e.g. a concurrent request stored the same days first
+            print(f"Error saving trend snapshots: {e}")
+            self.db.rollback()
+            return False
+
+    def reset(self, student_id: int) -> None:
+        """Drops snapshots and checkpoints after history changes. Does not commit."""
+        self.db.query(LearningTrendSnapshot).filter(
+            LearningTrendSnapshot.student_id == student_id
+        ).delete(synchronize_session=False)
+        self.db.query(LearningTrendCheckpoint).filter(
+            LearningTrendCheckpoint.student_id == student_id
+        ).delete(synchronize_session=False)
+
+
+def _utc_hour(value) -> datetime | None:
+    if not isinstance(value, datetime):
+        return None
+    return _to_naive_utc(value).replace(minute=0, second=0, microsecond=0)
+
+
+class HourlyRollupRepository:
+    """
+    Maintains analytics_hourly_rollup on every quiz save and serves local-day
+    session totals from it. Students without a status row are rebuilt first.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._raw = AnalyticsRepository(db)
+
+    def _is_built(self, student_id: int) -> bool:
+        return self.db.get(HourlyActivityRollupStatus, student_id) is not None
+
+    @staticmethod
+    def _add(row: HourlyActivityRollup, active: int, duration: int, correct: int, total: int) -> None:
+        row.sessions = (row.sessions or 0) + 1
+        # Same clamping as the raw SUM(CASE ... > 0) aggregate
+        row.active_seconds = (row.active_seconds or 0) + max(0, active or 0)
+        row.duration_seconds = (row.duration_seconds or 0) + max(0, duration or 0)
+        row.answers_correct = (row.answers_correct or 0) + correct
+        row.answers_total = (row.answers_total or 0) + total
+
+    def apply_result(self, result: QuizResult, answers: list[QuestionAnalytics]) -> None:
+        """Adds one saved quiz to its hour row. Does not commit."""
+        # A rebuild deletes and re-inserts the rows: it must not interleave with this save
+        _lock_student(self.db, result.student_id)
+        if not self._is_built(result.student_id):
+            self._rebuild(result.student_id)
+            return
+        hour = _utc_hour(result.created_at)
+        if hour is None:
+            return
+
+        row = HourlyActivityRollup(student_id=result.student_id, hour_utc=hour, quiz_type=result.quiz_type)
+        self._add(
+            row, result.active_seconds, result.duration_seconds,
+            sum(1 for answer in answers if answer.is_correct), len(answers)
+        )
+        # Increment in SQL (col = col + n): concurrent saves in the same hour can't lose an update
+        hour_row = self.db.query(HourlyActivityRollup).filter(
+            HourlyActivityRollup.student_id == result.student_id,
+            HourlyActivityRollup.hour_utc == hour,
+            HourlyActivityRollup.quiz_type.is_(None) if result.quiz_type is None
+            else HourlyActivityRollup.quiz_type == result.quiz_type,
+        )
+        increments = {
+            HourlyActivityRollup.sessions: HourlyActivityRollup.sessions + row.sessions,
+            HourlyActivityRollup.active_seconds: HourlyActivityRollup.active_seconds + row.active_seconds,
+            HourlyActivityRollup.duration_seconds: HourlyActivityRollup.duration_seconds + row.duration_seconds,
+            HourlyActivityRollup.answers_correct: HourlyActivityRollup.answers_correct + row.answers_correct,
+            HourlyActivityRollup.answers_total: HourlyActivityRollup.answers_total + row.answers_total,
+        }
+        if hour_row.update(increments, synchronize_session="fetch"):
+            return
+        try:
+            # Savepoint: losing the insert race must not roll back the quiz save
+            with self.db.begin_nested():
+                self.db.add(row)
+        except IntegrityError:
+            hour_row.update(increments, synchronize_session="fetch")
+
+    def _rebuild(self, student_id: int) -> None:
+        _lock_student(self.db, student_id)
+        self.db.query(HourlyActivityRollup).filter(
+            HourlyActivityRollup.student_id == student_id
+        ).delete(synchronize_session=False)
+
+        # Filtered on the student inside the subquery: otherwise it aggregates every student's answers
+        answer_counts = (
+            self.db.query(
+                QuestionAnalytics.quiz_result_id.label("quiz_result_id"),
+                func.count(QuestionAnalytics.id).label("total"),
+                func.sum(case((QuestionAnalytics.is_correct.is_(True), 1), else_=0)).label("correct"),
+            )
+            .join(QuizResult, QuestionAnalytics.quiz_result_id == QuizResult.id)
+            .filter(QuizResult.student_id == student_id)
+            .group_by(QuestionAnalytics.quiz_result_id)
+            .subquery()
+        )
+        sessions = (
+            self.db.query(
+                QuizResult.created_at,
+                QuizResult.quiz_type,
+                QuizResult.active_seconds,
+                QuizResult.duration_seconds,
+                answer_counts.c.correct,
+                answer_counts.c.total,
+            )
+            .outerjoin(answer_counts, answer_counts.c.quiz_result_id == QuizResult.id)
+            .filter(QuizResult.student_id == student_id)
+        )
+        rows: dict[tuple, HourlyActivityRollup] = {}
+        for session in sessions:
+            hour = _utc_hour(session.created_at)
+            if hour is None:
+                continue
+            row = rows.get((hour, session.quiz_type))
+            if row is None:
+                row = HourlyActivityRollup(student_id=student_id, hour_utc=hour, quiz_type=session.quiz_type)
+                rows[(hour, session.quiz_type)] = row
+            self._add(
+                row, session.active_seconds, session.duration_seconds,
+                int(session.correct or 0), int(session.total or 0)
+            )
+        self.db.add_all(rows.values())
+        self.db.flush()
+        _mark_built(self.db, HourlyActivityRollupStatus, student_id)
+
+    def rebuild(self, student_id: int) -> bool:
+        try:
+            self._rebuild(student_id)
+            self.db.commit()
+            return True
+        except Exception as e:
+            print(f"Error rebuilding hourly rollup: {e}")
+            self.db.rollback()
+            return False
+
+    def _ensure_built(self, student_id: int) -> None:
+        """Lazy first build on the read path, under the same student lock as quiz saves."""
+        if self._is_built(student_id):
+            return
+        try:
+            _lock_student(self.db, student_id)
+            # Built by a concurrent read or save while this one waited for the lock
+            if not self._is_built(student_id):
+                self._rebuild(student_id)
+            self.db.commit()
+        except Exception as e:
+            print(f"Error rebuilding hourly rollup: {e}")
+            self.db.rollback()
+
+    def reset(self, student_id: int) -> None:
+        """Drops the rollup (e.g. after sessions were deleted); rebuilt on next use. Does not commit."""
+        self.db.query(HourlyActivityRollup).filter(
+            HourlyActivityRollup.student_id == student_id
+        ).delete(synchronize_session=False)
+        self.db.query(HourlyActivityRollupStatus).filter(
+            HourlyActivityRollupStatus.student_id == student_id
+        ).delete(synchronize_session=False)
+
+    def fetch_daily_session_totals(self, student_id: int, start_utc, end_utc, tz_offset_minutes: int = 0) -> list[dict]:
+        """
+        Same rows as AnalyticsRepository.fetch_daily_session_totals, summed from
+        at most 24 rows per day and quiz type. Offsets that are not whole hours
+        split UTC hours across days, so those go to the raw sessions.
+        """
+        tz_offset_minutes = int(tz_offset_minutes or 0)
+        if tz_offset_minutes % 60:
+            return self._raw.fetch_daily_session_totals(student_id, start_utc, end_utc, tz_offset_minutes)
+        try:
+            self._ensure_built(student_id)
+
+            rows = (
+                self.db.query(HourlyActivityRollup)
+                .filter(
+                    HourlyActivityRollup.student_id == student_id,
+                    HourlyActivityRollup.hour_utc >= _to_naive_utc(start_utc),
+                    HourlyActivityRollup.hour_utc < _to_naive_utc(end_utc),
+                )
+                .all()
+            )
+            offset = timedelta(minutes=tz_offset_minutes)
+            totals: dict[tuple, dict] = {}
+            for row in rows:
+                day = (row.hour_utc + offset).date()
+                entry = totals.setdefault((day, row.quiz_type), {
+                    "day": day,
                     "quiz_type": row.quiz_type,
-                    "duration_seconds": row.duration_seconds,
-                    "active_seconds": row.active_seconds,
-                }
-                for row in rows
-            ]
+                    "tests": 0,
+                    "active_seconds": 0,
+                    "duration_seconds": 0,
+                    "answers_correct": 0,
+                    "answers_total": 0,
+                })
+                entry["tests"] += row.sessions
+                entry["active_seconds"] += row.active_seconds
+                entry["duration_seconds"] += row.duration_seconds
+                entry["answers_correct"] += row.answers_correct
+                entry["answers_total"] += row.answers_total
+            return list(totals.values())
+        except Exception as e:
+            print(f"Error fetching hourly rollup totals: {e}")
+            return self._raw.fetch_daily_session_totals(student_id, start_utc, end_utc, tz_offset_minutes)
+
+
+class ReviewScheduleRepository:
+    """
+    Maintains concept_review_schedule on every quiz save and serves the
+    due-queue for concept selection. Students without a status row are
+    rebuilt from their full history first.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _is_built(self, student_id: int) -> bool:
+        return self.db.get(ConceptReviewStatus, student_id) is not None
+
+    @staticmethod
+    def _reviews(answers) -> dict[tuple, bool]:
+        """One review per (concept_id, raw concept) of a quiz: passed only if every answer was right."""
+        passed: dict[tuple, bool] = {}
+        for concept_id, topic, is_correct in answers:
+            key = (concept_id, topic)
+            passed[key] = passed.get(key, True) and bool(is_correct)
+        return passed
+
+    @staticmethod
+    def _store(row: ConceptReviewSchedule, state: review.ReviewState, reviewed_at: datetime) -> None:
+        row.repetitions = state.repetitions
+        row.interval_days = state.interval_days
+        row.ease = state.ease
+        row.last_reviewed_at = reviewed_at
+        row.due_at = reviewed_at + timedelta(days=state.interval_days)
+
+    def apply_answers(self, result: QuizResult, answers: list[QuestionAnalytics]) -> None:
+        """Schedules the next review of every concept in one saved quiz. Does not commit."""
+        # A rebuild deletes and re-inserts the rows: it must not interleave with this save
+        _lock_student(self.db, result.student_id)
+        if not self._is_built(result.student_id):
+            self._rebuild(result.student_id)
+            return
+        reviews = self._reviews((a.concept_id, a.topic, a.is_correct) for a in answers)
+        if not reviews or not isinstance(result.created_at, datetime):
+            return
+        reviewed_at = _to_naive_utc(result.created_at)
+
+        existing = {
+            (row.concept_id, row.raw_concept): row
+            for row in self.db.query(ConceptReviewSchedule).filter(
+                ConceptReviewSchedule.student_id == result.student_id,
+                ConceptReviewSchedule.study_material_id == result.study_material_id,
+                ConceptReviewSchedule.quiz_type == result.quiz_type,
+            )
+        }
+        for (concept_id, raw_concept), passed in reviews.items():
+            row = existing.get((concept_id, raw_concept))
+            if row is None:
+                row = ConceptReviewSchedule(
+                    student_id=result.student_id,
+                    study_material_id=result.study_material_id,
+                    concept_id=concept_id,
+                    raw_concept=raw_concept,
+                    quiz_type=result.quiz_type,
+                )
+                self.db.add(row)
+                state = review.ReviewState()
+            else:
+                state = review.ReviewState(row.repetitions, row.interval_days, row.ease)
+            self._store(row, review.schedule(state, passed), reviewed_at)
+
+    def _rebuild(self, student_id: int) -> None:
+        _lock_student(self.db, student_id)
+        self.db.query(ConceptReviewSchedule).filter(
+            ConceptReviewSchedule.student_id == student_id
+        ).delete(synchronize_session=False)
+
+        history = (
+            self.db.query(
+                QuizResult.id,
+                QuizResult.study_material_id,
+                QuizResult.quiz_type,
+                QuizResult.created_at,
+                QuestionAnalytics.concept_id,
+                QuestionAnalytics.topic,
+                QuestionAnalytics.is_correct,
+            )
+            .join(QuizResult, QuestionAnalytics.quiz_result_id == QuizResult.id)
+            .filter(QuizResult.student_id == student_id)
+            .order_by(QuizResult.created_at.asc(), QuizResult.id.asc(), QuestionAnalytics.id.asc())
+            .yield_per(1000)
+        )
+        states: dict[tuple, tuple[review.ReviewState, datetime]] = {}
+
+        def _fold(quiz, answers):
+            _, material_id, quiz_type, created_at = quiz
+            if not isinstance(created_at, datetime):
+                return
+            for (concept_id, topic), passed in self._reviews(answers).items():
+                key = (material_id, concept_id, topic, quiz_type)
+                state = states[key][0] if key in states else review.ReviewState()
+                states[key] = (review.schedule(state, passed), _to_naive_utc(created_at))
+
+        quiz, answers = None, []
+        for row in history:
+            if quiz is not None and row[0] != quiz[0]:
+                _fold(quiz, answers)
+                answers = []
+            quiz = tuple(row[:4])
+            answers.append((row.concept_id, row.topic, row.is_correct))
+        if quiz is not None:
+            _fold(quiz, answers)
+
+        for (material_id, concept_id, topic, quiz_type), (state, reviewed_at) in states.items():
+            row = ConceptReviewSchedule(
+                student_id=student_id,
+                study_material_id=material_id,
+                concept_id=concept_id,
+                raw_concept=topic,
+                quiz_type=quiz_type,
+            )
+            self._store(row, state, reviewed_at)
+            self.db.add(row)
+
+        self.db.flush()
+        _mark_built(self.db, ConceptReviewStatus, student_id)
+
+    def rebuild(self, student_id: int) -> bool:
+        try:
+            self._rebuild(student_id)
+            self.db.commit()
+            return True
+        except Exception as e:
+            print(f"Error rebuilding review schedule: {e}")
+            self.db.rollback()
+            return False
+
+    def _ensure_built(self, student_id: int) -> None:
+        """Lazy first build on the read path, under the same student lock as quiz saves."""
+        if self._is_built(student_id):
+            return
+        try:
+            _lock_student(self.db, student_id)
+            # Built by a concurrent read or save while this one waited for the lock
+            if not self._is_built(student_id):
+                self._rebuild(student_id)
+            self.db.commit()
         except Exception as e:
-            print(f"Error fetching quiz sessions: {e}")
+            print(f"Error rebuilding review schedule: {e}")
+            self.db.rollback()
+
+    def _scheduled(self, student_id: int, material_id: int | None, quiz_type: str):
+        self._ensure_built(student_id)
+        query = (
+            self.db.query(
+                func.coalesce(Concept.name, ConceptReviewSchedule.raw_concept).label("concept"),
+                ConceptReviewSchedule.due_at,
+            )
+            .outerjoin(Concept, ConceptReviewSchedule.concept_id == Concept.id)
+            .filter(
+                ConceptReviewSchedule.student_id == student_id,
+                ConceptReviewSchedule.quiz_type == quiz_type,
+            )
+        )
+        if material_id:
+            query = query.filter(ConceptReviewSchedule.study_material_id == material_id)
+        return query
+
+    def fetch_due(
+        self,
+        student_id: int,
+        material_id: int | None,
+        quiz_type: str,
+        limit: int,
+        concepts: set[str] | None = None
+    ) -> list[dict]:
+        """
+        The `limit` scheduled concepts (restricted to `concepts`) with the earliest
+        due_at, read in index order and stopped as soon as enough were found.
+        """
+        try:
+            query = self._scheduled(student_id, material_id, quiz_type).order_by(
+                ConceptReviewSchedule.due_at.asc(), ConceptReviewSchedule.id.asc()
+            )
+            due: dict[str, datetime] = {}
+            for row in query.yield_per(max(limit, 1) * 2):
+                if len(due) >= limit:
+                    break
+                if row.concept in due or (concepts is not None and row.concept not in concepts):
+                    continue
+                due[row.concept] = row.due_at
+            return [{"concept": concept, "due_at": due_at} for concept, due_at in due.items()]
+        except Exception as e:
+            print(f"Error fetching due concepts: {e}")
             return []
+
+    def fetch_scheduled_concepts(self, student_id: int, material_id: int | None, quiz_type: str) -> set[str]:
+        """Concept names already reviewed at least once in this quiz type."""
+        try:
+            return {row.concept for row in self._scheduled(student_id, material_id, quiz_type)}
+        except Exception as e:
+            print(f"Error fetching scheduled concepts: {e}")
+            return set()
+
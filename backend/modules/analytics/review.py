@@ -0,0 +1,32 @@
+"""
+Spaced-repetition schedule per (concept, quiz_type), SM-2 style.
+
+Each saved quiz is one review of every concept it asked: all answers right
+passes (the interval grows by the ease factor), any wrong answer fails (the
+concept is due again right away and the ease drops).
+"""
+from dataclasses import dataclass
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+MAX_EASE = 3.0
+FIRST_INTERVALS_DAYS = (1.0, 3.0)
+
+
+@dataclass
+class ReviewState:
+    repetitions: int = 0
+    interval_days: float = 0.0
+    ease: float = INITIAL_EASE
+
+
+def schedule(state: ReviewState, passed: bool) -> ReviewState:
+    """Next state after one review; due time is the review time plus interval_days."""
+    if not passed:
+        return ReviewState(0, 0.0, max(MIN_EASE, state.ease - 0.2))
+    repetitions = state.repetitions + 1
+    if repetitions <= len(FIRST_INTERVALS_DAYS):
+        interval = FIRST_INTERVALS_DAYS[repetitions - 1]
+    else:
+        interval = state.interval_days * state.ease
+    return ReviewState(repetitions, interval, min(MAX_EASE, state.ease + 0.1))
@@ -1,46 +1,154 @@
-from fastapi import APIRouter, Depends
+import hashlib
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from modules.analytics.deps import get_analytics_service
 from dependencies import get_current_user
 from models import Student
+from modules.analytics.errors import AnalyticsServiceError
+from modules.analytics.export import EXPORT_FORMATS
 from modules.analytics.ports import AnalyticsServicePort
 
 router = APIRouter()
 
+
+# --- Conditional GET ---
+def _local_today(tz_offset_minutes: int) -> str:
+    # Day-windowed responses roll over at local midnight even without new data
+    return (datetime.now(timezone.utc) + timedelta(minutes=tz_offset_minutes)).date().isoformat()
+
+
+def _analytics_etag(version: str | None, *parts) -> str | None:
+    if version is None:
+        return None
+    digest = hashlib.sha256("|".join(str(p) for p in (version, *parts)).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _not_modified(request: Request, response: Response, etag: str | None) -> Response | None:
+    """Sets the validators on `response`; returns a 304 when the client copy is current."""
+    if etag is None:
+        return None
+    validators = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    response.headers.update(validators)
+    candidates = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates):
+        return Response(status_code=304, headers=validators)
+    return None
+
+
 # --- Endpoints ---
 @router.get("/analytics/weak-points")
 def get_weak_points(
+    request: Request,
+    response: Response,
     current_user: Student = Depends(get_current_user),
     material_id: int | None = None,
     analytics_service: AnalyticsServicePort = Depends(get_analytics_service)
 ):
-    return analytics_service.get_weak_points(current_user.id, material_id)
+    version = analytics_service.get_data_version(current_user.id)
+    etag = _analytics_etag(version, "weak-points", material_id)
+    if (cached := _not_modified(request, response, etag)) is not None:
+        return cached
+    return analytics_service.get_weak_points(current_user.id, material_id, data_version=version)
 
 
 @router.get("/analytics/metrics")
 def get_recent_metrics(
+    request: Request,
+    response: Response,
     current_user: Student = Depends(get_current_user),
     days: int = 30,
     tz_offset_minutes: int = 0,
     analytics_service: AnalyticsServicePort = Depends(get_analytics_service)
 ):
+    version = analytics_service.get_data_version(current_user.id)
+    etag = _analytics_etag(version, "metrics", days, tz_offset_minutes, _local_today(tz_offset_minutes))
+    if (cached := _not_modified(request, response, etag)) is not None:
+        return cached
     return analytics_service.get_recent_metrics(
         current_user.id,
         days=days,
-        tz_offset_minutes=tz_offset_minutes
+        tz_offset_minutes=tz_offset_minutes,
+        data_version=version
     )
 
 
 @router.get("/analytics/learning-trend")
 def get_learning_trend(
+    request: Request,
+    response: Response,
     current_user: Student = Depends(get_current_user),
     days: int = 30,
     tz_offset_minutes: int = 0,
     min_questions: int = 1,
     analytics_service: AnalyticsServicePort = Depends(get_analytics_service)
 ):
+    version = analytics_service.get_data_version(current_user.id)
+    etag = _analytics_etag(
+        version, "learning-trend", days, tz_offset_minutes, min_questions, _local_today(tz_offset_minutes)
+    )
+    if (cached := _not_modified(request, response, etag)) is not None:
+        return cached
     return analytics_service.get_learning_trend(
         current_user.id,
         days=days,
         tz_offset_minutes=tz_offset_minutes,
-        min_questions=min_questions
+        min_questions=min_questions,
+        data_version=version
+    )
+
+
+@router.get("/analytics/dashboard")
+def get_dashboard(
+    request: Request,
+    response: Response,
+    current_user: Student = Depends(get_current_user),
+    sections: str | None = None,
+    material_id: int | None = None,
+    days: int = 30,
+    tz_offset_minutes: int = 0,
+    min_questions: int = 1,
+    analytics_service: AnalyticsServicePort = Depends(get_analytics_service)
+):
+    """weak_points, metrics and learning_trend in one response; `sections` is a comma list."""
+    selected = [name.strip() for name in sections.split(",") if name.strip()] if sections else None
+    version = analytics_service.get_data_version(current_user.id)
+    etag = _analytics_etag(
+        version, "dashboard", ",".join(sorted(selected or [])), material_id,
+        days, tz_offset_minutes, min_questions, _local_today(tz_offset_minutes)
+    )
+    if (cached := _not_modified(request, response, etag)) is not None:
+        return cached
+    try:
+        return analytics_service.get_dashboard(
+            current_user.id,
+            sections=selected,
+            material_id=material_id,
+            days=days,
+            tz_offset_minutes=tz_offset_minutes,
+            min_questions=min_questions,
+            data_version=version
+        )
+    except AnalyticsServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@router.get("/analytics/export")
+def export_history(
+    current_user: Student = Depends(get_current_user),
+    export_format: str = Query("ndjson", alias="format"),
+    material_id: int | None = None,
+    analytics_service: AnalyticsServicePort = Depends(get_analytics_service)
+):
+    """Full answer history as NDJSON or CSV, streamed in constant memory."""
+    try:
+        chunks = analytics_service.export_history(current_user.id, export_format, material_id)
+    except AnalyticsServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    filename = f"historico-{current_user.id}.{export_format}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
@@ -1,30 +1,158 @@
 import random
-from collections import deque
+from typing import Iterator
 from datetime import datetime, timedelta, timezone, time as time_cls
-from modules.analytics.calculator import AnalyticsCalculator, _calculate_mastery_simple
-from modules.analytics.constants import QUIZ_TYPES, CONFIDENCE_WINDOW
-from modules.analytics.ports import AnalyticsRepositoryPort
+from modules.analytics.calculator import AnalyticsCalculator
+from modules.analytics.constants import QUIZ_TYPES, EXPLORING_THRESHOLD_MCQ, EXPLORING_THRESHOLD_SHORT
+from modules.analytics.errors import AnalyticsServiceError
+from modules.analytics.export import EXPORT_FORMATS, csv_chunks, ndjson_chunks
+from modules.analytics.ports import (
+    AnalyticsRepositoryPort, AnalyticsResultCachePort, ConceptMasteryReaderPort, LearningTrendRepositoryPort,
+    ReviewScheduleReaderPort, SessionTotalsReaderPort
+)
+from modules.analytics.snapshot import AnalyticsSnapshot
+from modules.analytics.trend import LearningTrendEngine, group_trend_events
 from modules.materials.ports import MaterialConceptPairsRepositoryPort
 
+DASHBOARD_SECTIONS = ("weak_points", "metrics", "learning_trend")
+
 
 class AnalyticsService:
 
-    def __init__(self, analytics_repo: AnalyticsRepositoryPort, material_repo: MaterialConceptPairsRepositoryPort):
+    def __init__(
+        self,
+        analytics_repo: AnalyticsRepositoryPort,
+        material_repo: MaterialConceptPairsRepositoryPort,
+        mastery_repo: ConceptMasteryReaderPort | None = None,
+        trend_repo: LearningTrendRepositoryPort | None = None,
+        cache: AnalyticsResultCachePort | None = None,
+        rollup_repo: SessionTotalsReaderPort | None = None,
+        review_repo: ReviewScheduleReaderPort | None = None
+    ):
         self.analytics_repo = analytics_repo
         self.material_repo = material_repo
+        self.mastery_repo = mastery_repo
+        self.trend_repo = trend_repo
+        self.cache = cache
+        self.rollup_repo = rollup_repo
+        self.review_repo = review_repo
+
+    def _cached(self, student_id: int, key: tuple, compute, version: str | None = None):
+        """Serves `compute()` from the result cache, keyed by the student's data version."""
+        if self.cache is None:
+            return compute()
+        version = version or self.get_data_version(student_id)
+        if version is None:
+            return compute()
+        return self.cache.get_or_compute((student_id, version, *key), compute)
+
+    @staticmethod
+    def _local_today(tz_offset_minutes: int):
+        return (datetime.now(timezone.utc) + timedelta(minutes=int(tz_offset_minutes or 0))).date()
+
+    def get_weak_points(self, student_id: int, material_id: int = None, data_version: str | None = None):
+        return self._cached(
+            student_id,
+            ("weak-points", material_id or None),
+            lambda: self._weak_points(student_id, material_id),
+            data_version
+        )
 
-    def get_weak_points(self, student_id: int, material_id: int = None):
+    def _weak_points(self, student_id: int, material_id: int | None):
         if material_id:
             concept_pairs = self.material_repo.get_concept_pairs(material_id)
         else:
             concept_pairs = self.material_repo.get_concept_pairs_for_student(student_id)
 
+        if self.mastery_repo is not None:
+            mastery_rows = self.mastery_repo.fetch_mastery(student_id, material_id)
+            if self._decayed_scoring:
+                now_epoch = datetime.now(timezone.utc).timestamp()
+                return AnalyticsCalculator.build_results_from_decayed(concept_pairs, mastery_rows, now_epoch)
+            return AnalyticsCalculator.build_results_from_mastery(concept_pairs, mastery_rows)
+
         analytics_items = self.analytics_repo.fetch_question_analytics(student_id, material_id)
         
         return AnalyticsCalculator.build_results(concept_pairs, analytics_items)
 
-    def get_adaptive_topics(self, student_id: int, material_id: int = None):
-        analytics = self.get_weak_points(student_id, material_id)
+    @property
+    def _decayed_scoring(self) -> bool:
+        return getattr(self.mastery_repo, "scoring", None) == "decay"
+
+    def get_data_version(self, student_id: int) -> str | None:
+        """Opaque per-student version of the analytics inputs (None: unknown, do not cache)."""
+        version = self.analytics_repo.fetch_data_version(student_id)
+        if version is not None and self._decayed_scoring:
+            # Decayed scores change with time alone: cached results and ETags last one UTC day
+            version = f"{version}-d{datetime.now(timezone.utc).date().isoformat()}"
+        return version
+
+    def export_history(
+        self,
+        student_id: int,
+        export_format: str = "ndjson",
+        material_id: int | None = None
+    ) -> Iterator[str]:
+        """Lazily formatted answer history; nothing is read until the iterator is consumed."""
+        if export_format not in EXPORT_FORMATS:
+            raise AnalyticsServiceError(
+                f"Formato desconhecido: {export_format} (usa {' ou '.join(EXPORT_FORMATS)})", status_code=400
+            )
+        rows = self.analytics_repo.iter_answer_history(student_id, material_id)
+        return csv_chunks(rows) if export_format == "csv" else ndjson_chunks(rows)
+
+    def get_dashboard(
+        self,
+        student_id: int,
+        sections: list[str] | None = None,
+        material_id: int | None = None,
+        days: int = 30,
+        tz_offset_minutes: int = 0,
+        min_questions: int = 1,
+        data_version: str | None = None
+    ) -> dict:
+        """
+        weak_points / metrics / learning_trend in one call, sharing one data-version
+        read (or the caller's) for every cache lookup.
+        """
+        selected = list(DASHBOARD_SECTIONS) if not sections else sections
+        unknown = [name for name in selected if name not in DASHBOARD_SECTIONS]
+        if unknown:
+            raise AnalyticsServiceError(f"Secoes desconhecidas: {', '.join(unknown)}", status_code=400)
+
+        if self.cache is not None and data_version is None:
+            data_version = self.get_data_version(student_id)
+        builders = {
+            "weak_points": lambda: self.get_weak_points(student_id, material_id, data_version=data_version),
+            "metrics": lambda: self.get_recent_metrics(
+                student_id, days, tz_offset_minutes, data_version=data_version
+            ),
+            "learning_trend": lambda: self.get_learning_trend(
+                student_id, days, tz_offset_minutes, min_questions, data_version=data_version
+            ),
+        }
+        return {name: builders[name]() for name in DASHBOARD_SECTIONS if name in selected}
+
+    def build_snapshot(self, student_id: int, material_id: int | None = None) -> AnalyticsSnapshot:
+        """Computes weak points once so several consumers can share them."""
+        return AnalyticsSnapshot(student_id, material_id, self.get_weak_points(student_id, material_id))
+
+    def _resolve_results(
+        self,
+        student_id: int,
+        material_id: int | None,
+        snapshot: AnalyticsSnapshot | None
+    ) -> list[dict]:
+        if snapshot is not None and snapshot.matches(student_id, material_id):
+            return snapshot.results
+        return self.get_weak_points(student_id, material_id)
+
+    def get_adaptive_topics(
+        self,
+        student_id: int,
+        material_id: int = None,
+        snapshot: AnalyticsSnapshot | None = None
+    ):
+        analytics = self._resolve_results(student_id, material_id, snapshot)
         if not analytics:
             return {"boost": [], "mastered": []}
 
@@ -54,8 +182,13 @@ class AnalyticsService:
         seen: set[str] = set()
         return [x for x in items if not (x in seen or seen.add(x))]
 
-    def get_classified_concepts(self, student_id: int, material_id: int | None = None) -> dict[str, list[str]]:
-        results = self.get_weak_points(student_id, material_id)
+    def get_classified_concepts(
+        self,
+        student_id: int,
+        material_id: int | None = None,
+        snapshot: AnalyticsSnapshot | None = None
+    ) -> dict[str, list[str]]:
+        results = self._resolve_results(student_id, material_id, snapshot)
         
         unseen = []
         weak = []
@@ -86,29 +219,21 @@ class AnalyticsService:
             "strong": strong
         }
 
-    @staticmethod
-    def _parse_datetime(value) -> datetime | None:
-        if isinstance(value, datetime):
-            return value
-        if isinstance(value, str):
-            try:
-                return datetime.fromisoformat(value)
-            except ValueError:
-                return None
-        return None
+    def get_recent_metrics(
+        self,
+        student_id: int,
+        days: int = 30,
+        tz_offset_minutes: int = 0,
+        data_version: str | None = None
+    ) -> dict:
+        return self._cached(
+            student_id,
+            ("metrics", days, tz_offset_minutes, self._local_today(tz_offset_minutes)),
+            lambda: self._recent_metrics(student_id, days, tz_offset_minutes),
+            data_version
+        )
 
-    @staticmethod
-    def _to_local_date(value, tz_offset_minutes: int):
-        dt = AnalyticsService._parse_datetime(value)
-        if dt is None:
-            return None
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        dt = dt.astimezone(timezone.utc)
-        local_dt = dt + timedelta(minutes=tz_offset_minutes)
-        return local_dt.date()
-
-    def get_recent_metrics(self, student_id: int, days: int = 30, tz_offset_minutes: int = 0) -> dict:
+    def _recent_metrics(self, student_id: int, days: int, tz_offset_minutes: int) -> dict:
         safe_days = max(1, min(int(days or 30), 90))
         tz_offset_minutes = int(tz_offset_minutes or 0)
 
@@ -120,7 +245,8 @@ class AnalyticsService:
         start_utc = datetime.combine(start_local_date, time_cls.min, tzinfo=timezone.utc) - timedelta(minutes=tz_offset_minutes)
         end_utc = datetime.combine(end_local_date + timedelta(days=1), time_cls.min, tzinfo=timezone.utc) - timedelta(minutes=tz_offset_minutes)
 
-        sessions = self.analytics_repo.fetch_quiz_sessions(student_id, start_utc, end_utc)
+        totals_repo = self.rollup_repo or self.analytics_repo
+        day_totals = totals_repo.fetch_daily_session_totals(student_id, start_utc, end_utc, tz_offset_minutes)
 
         quiz_types = QUIZ_TYPES
         daily_map: dict = {}
@@ -135,19 +261,19 @@ class AnalyticsService:
             }
             cursor += timedelta(days=1)
 
-        for session in sessions:
-            local_date = self._to_local_date(session.get("created_at"), tz_offset_minutes)
-            if local_date is None or local_date not in daily_map:
+        for row in day_totals:
+            entry = daily_map.get(row.get("day"))
+            if entry is None:
                 continue
 
-            entry = daily_map[local_date]
-            quiz_type = session.get("quiz_type") or "multiple-choice"
+            quiz_type = row.get("quiz_type") or "multiple-choice"
+            tests = int(row.get("tests") or 0)
             if quiz_type not in entry["by_type"]:
                 entry["by_type"][quiz_type] = 0
-            entry["by_type"][quiz_type] += 1
-            entry["tests_total"] += 1
-            entry["active_seconds"] += max(0, int(session.get("active_seconds") or 0))
-            entry["duration_seconds"] += max(0, int(session.get("duration_seconds") or 0))
+            entry["by_type"][quiz_type] += tests
+            entry["tests_total"] += tests
+            entry["active_seconds"] += int(row.get("active_seconds") or 0)
+            entry["duration_seconds"] += int(row.get("duration_seconds") or 0)
 
         daily = [daily_map[d] for d in sorted(daily_map.keys())]
 
@@ -183,8 +309,17 @@ class AnalyticsService:
         student_id: int,
         days: int = 30,
         tz_offset_minutes: int = 0,
-        min_questions: int = 1
+        min_questions: int = 1,
+        data_version: str | None = None
     ) -> dict:
+        return self._cached(
+            student_id,
+            ("learning-trend", days, tz_offset_minutes, min_questions, self._local_today(tz_offset_minutes)),
+            lambda: self._learning_trend(student_id, days, tz_offset_minutes, min_questions),
+            data_version
+        )
+
+    def _learning_trend(self, student_id: int, days: int, tz_offset_minutes: int, min_questions: int) -> dict:
         safe_days = max(1, min(int(days or 30), 90))
         tz_offset_minutes = int(tz_offset_minutes or 0)
         min_questions = max(1, int(min_questions or 1))
@@ -196,93 +331,29 @@ class AnalyticsService:
 
         end_utc = datetime.combine(end_local_date + timedelta(days=1), time_cls.min, tzinfo=timezone.utc) - timedelta(minutes=tz_offset_minutes)
 
-        items = self.analytics_repo.fetch_question_analytics(student_id, None)
-
-        quiz_types = QUIZ_TYPES
-        events_by_day: dict = {}
-
-        for item in items:
-            dt = self._parse_datetime(item.get("created_at"))
-            if dt is None:
-                continue
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            dt = dt.astimezone(timezone.utc)
-            if dt >= end_utc:
-                continue
-
-            quiz_type = item.get("quiz_type") or "multiple-choice"
-            if quiz_type not in quiz_types:
-                continue
-
-            concept_id = item.get("concept_id")
-            if concept_id:
-                concept_key = ("id", concept_id)
-            else:
-                raw_name = item.get("concept_name") or item.get("raw_concept") or "Geral"
-                norm_name = raw_name.strip().lower()
-                if not norm_name:
-                    norm_name = "geral"
-                concept_key = ("name", norm_name)
-
-            local_date = (dt + timedelta(minutes=tz_offset_minutes)).date()
-            events_by_day.setdefault(local_date, []).append({
-                "dt": dt,
-                "quiz_type": quiz_type,
-                "is_correct": bool(item.get("is_correct")),
-                "concept_key": concept_key
-            })
-
-        for day_events in events_by_day.values():
-            day_events.sort(key=lambda e: e["dt"])
-
-        state: dict = {qt: {} for qt in quiz_types}
-
-        def _update_state(event: dict):
-            qt = event["quiz_type"]
-            concept_key = event["concept_key"]
-            if concept_key not in state[qt]:
-                state[qt][concept_key] = {
-                    "window": deque(maxlen=CONFIDENCE_WINDOW),
-                    "total": 0,
-                    "effective": 0.0
-                }
-            entry = state[qt][concept_key]
-            entry["window"].append(event["is_correct"])
-            entry["total"] += 1
-            # Convert deque to list of dicts for mastery calculation
-            window_items = [{"is_correct": v} for v in entry["window"]]
-            entry["effective"] = _calculate_mastery_simple(window_items, CONFIDENCE_WINDOW)
-
-        pre_days = sorted(d for d in events_by_day.keys() if d < start_local_date)
-        for day in pre_days:
-            for event in events_by_day[day]:
-                _update_state(event)
+        if self.trend_repo is not None:
+            raw_days = self._trend_days_incremental(student_id, tz_offset_minutes, start_local_date, end_local_date, end_utc)
+        else:
+            items = self.analytics_repo.fetch_question_analytics(student_id, None)
+            events_by_day = group_trend_events(items, tz_offset_minutes, end_utc)
+            engine = LearningTrendEngine()
+            raw_days = {}
+            for day in sorted(events_by_day):
+                levels = engine.replay_day(events_by_day[day])
+                if day >= start_local_date:
+                    raw_days[day] = levels
 
         daily = []
         cursor = start_local_date
         while cursor <= end_local_date:
-            day_events = events_by_day.get(cursor, [])
-            day_counts = {qt: 0 for qt in quiz_types}
-
-            for event in day_events:
-                _update_state(event)
-                day_counts[event["quiz_type"]] += 1
-
+            levels = raw_days.get(cursor, {})
             by_level = {}
-            for qt in quiz_types:
-                if day_counts[qt] < min_questions:
-                    value = None
-                else:
-                    seen = [s for s in state[qt].values() if s["total"] > 0]
-                    if not seen:
-                        value = None
-                    else:
-                        avg = sum(s["effective"] for s in seen) / len(seen)
-                        value = round(avg * 100)
+            for qt in QUIZ_TYPES:
+                level = levels.get(qt) or {"value": None, "questions": 0}
+                questions = level.get("questions", 0)
                 by_level[qt] = {
-                    "value": value,
-                    "questions": day_counts[qt]
+                    "value": level.get("value") if questions >= min_questions else None,
+                    "questions": questions
                 }
 
             daily.append({
@@ -303,6 +374,46 @@ class AnalyticsService:
             "daily": daily
         }
 
+    def _trend_days_incremental(
+        self,
+        student_id: int,
+        tz_offset_minutes: int,
+        start_local_date,
+        end_local_date,
+        end_utc: datetime
+    ) -> dict:
+        """
+        Closed days come from stored snapshots; only answers after the checkpoint
+        (normally just today's) are replayed.
+        """
+        today_start_utc = end_utc - timedelta(days=1)
+        last_closed = end_local_date - timedelta(days=1)
+
+        checkpoint = self.trend_repo.get_checkpoint(student_id, tz_offset_minutes)
+        if checkpoint is not None and checkpoint[0] > last_closed:
+            checkpoint = None # Clock moved backwards: start over
+        engine = LearningTrendEngine(checkpoint[1] if checkpoint else None)
+
+        if checkpoint is None or checkpoint[0] < last_closed:
+            since_utc = None
+            if checkpoint is not None:
+                since_utc = (
+                    datetime.combine(checkpoint[0] + timedelta(days=1), time_cls.min, tzinfo=timezone.utc)
+                    - timedelta(minutes=tz_offset_minutes)
+                )
+            items = self.trend_repo.fetch_question_events(student_id, since_utc, today_start_utc)
+            events_by_day = group_trend_events(items, tz_offset_minutes, today_start_utc)
+            closed = {day: engine.replay_day(events_by_day[day]) for day in sorted(events_by_day)}
+            self.trend_repo.save_progress(student_id, tz_offset_minutes, last_closed, engine.to_state(), closed)
+
+        raw_days = self.trend_repo.fetch_snapshots(student_id, tz_offset_minutes, start_local_date, last_closed)
+
+        today_items = self.trend_repo.fetch_question_events(student_id, today_start_utc, end_utc)
+        today_events = group_trend_events(today_items, tz_offset_minutes, end_utc).get(end_local_date)
+        if today_events:
+            raw_days[end_local_date] = engine.replay_day(today_events)
+        return raw_days
+
     @staticmethod
     def _build_readiness_status(results: list[dict], score_data_key: str) -> dict:
         concepts = [result for result in results if result.get("concept")]
@@ -317,34 +428,109 @@ class AnalyticsService:
             "ready_concepts": ready,
         }
 
+    def _count_readiness(self, student_id: int, material_id: int | None, quiz_type: str, threshold: int) -> dict:
+        """
+        Same answer as _build_readiness_status, from per-concept attempt counts:
+        building/established means at least `threshold` attempts of `quiz_type`.
+        """
+        if material_id:
+            concept_pairs = self.material_repo.get_concept_pairs(material_id)
+        else:
+            concept_pairs = self.material_repo.get_concept_pairs_for_student(student_id)
+        concept_groups, concept_lookup = AnalyticsCalculator._init_groups(concept_pairs)
+        attempts = {key: 0 for key in concept_groups}
+
+        for row in self.analytics_repo.fetch_concept_attempt_counts(student_id, material_id, quiz_type):
+            key = AnalyticsCalculator._resolve_key(
+                row.get("topic_name"), row.get("concept_name"), row.get("raw_concept"), concept_lookup
+            )
+            if key:
+                attempts[key] = attempts.get(key, 0) + row.get("attempts", 0)
+
+        concepts = [count for (_, concept), count in attempts.items() if concept]
+        ready = sum(1 for count in concepts if count >= threshold)
+        return {
+            "is_ready": bool(concepts) and ready == len(concepts),
+            "total_concepts": len(concepts),
+            "ready_concepts": ready,
+        }
+
     def check_short_answer_readiness(
         self,
         student_id: int,
-        material_id: int | None = None
+        material_id: int | None = None,
+        snapshot: AnalyticsSnapshot | None = None
     ) -> dict:
         """
         Gate: ALL concepts must have confident MCQ data (building/established).
+        Without a snapshot this is one GROUP BY, not a weak-points build.
         """
-        results = self.get_weak_points(student_id, material_id)
-        return self._build_readiness_status(results, "score_data_mcq")
+        if snapshot is None or not snapshot.matches(student_id, material_id):
+            return self._count_readiness(student_id, material_id, "multiple-choice", EXPLORING_THRESHOLD_MCQ)
+        return self._build_readiness_status(snapshot.results, "score_data_mcq")
 
     def check_open_ended_readiness(
         self,
         student_id: int,
-        material_id: int | None = None
+        material_id: int | None = None,
+        snapshot: AnalyticsSnapshot | None = None
     ) -> dict:
         """
         Gate: ALL concepts must have confident Short data (building/established).
+        Without a snapshot this is one GROUP BY, not a weak-points build.
+        """
+        if snapshot is None or not snapshot.matches(student_id, material_id):
+            return self._count_readiness(student_id, material_id, "short_answer", EXPLORING_THRESHOLD_SHORT)
+        return self._build_readiness_status(snapshot.results, "score_data_short")
+
+    def _due_quiz_concepts(
+        self,
+        student_id: int,
+        material_id: int | None,
+        quiz_type: str,
+        allowed_concepts: set[str] | None,
+        total: int,
+        repeat: bool = True
+    ) -> list[str]:
+        """
+        Spaced-repetition selection: overdue reviews first, then concepts never
+        reviewed in this quiz type, then the soonest upcoming reviews. Reads the
+        top `total` of the due index instead of classifying every concept.
+        repeat: round-robin (and shuffle) up to `total` like the MCQ/short builders.
         """
-        results = self.get_weak_points(student_id, material_id)
-        return self._build_readiness_status(results, "score_data_short")
+        if total <= 0:
+            return []
+        candidates = set(allowed_concepts or ())
+        if not candidates:
+            if material_id:
+                pairs = self.material_repo.get_concept_pairs(material_id)
+            else:
+                pairs = self.material_repo.get_concept_pairs_for_student(student_id)
+            candidates = {concept for _, concept in pairs if concept}
+        if not candidates:
+            return []
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        due = self.review_repo.fetch_due(student_id, material_id, quiz_type, total, candidates)
+        overdue = [row["concept"] for row in due if row["due_at"] <= now]
+        upcoming = [row["concept"] for row in due if row["due_at"] > now]
+        scheduled = self.review_repo.fetch_scheduled_concepts(student_id, material_id, quiz_type)
+        unseen = sorted(candidates - scheduled, key=str.lower)
+
+        ordered = (overdue + unseen + upcoming)[:total]
+        if not repeat:
+            return ordered
+        selected = [ordered[i % len(ordered)] for i in range(total)]
+        random.shuffle(selected)
+        return selected
 
     def build_open_quiz_concepts(
         self,
         student_id: int,
         material_id: int | None = None,
         allowed_concepts: set[str] | None = None,
-        total_concepts: int = 8
+        total_concepts: int = 8,
+        snapshot: AnalyticsSnapshot | None = None
     ) -> list[str]:
         """
         Build prioritized concept list for open-ended quizzes using Bloom × Short cross-reference.
@@ -357,8 +543,13 @@ class AnalyticsService:
         Returns ordered list (no shuffle) — order matters for LLM prompt.
         No round-robin repetition — just returns all available.
         Guarantees 1 weak + 1 strong reserved when below dominates.
+        With a review schedule, the due-queue replaces the buckets.
         """
-        results = self.get_weak_points(student_id, material_id)
+        if self.review_repo is not None:
+            return self._due_quiz_concepts(
+                student_id, material_id, "open-ended", allowed_concepts, total_concepts, repeat=False
+            )
+        results = self._resolve_results(student_id, material_id, snapshot)
 
         items: list[dict] = []
         for item in results:
@@ -436,7 +627,8 @@ class AnalyticsService:
         student_id: int,
         material_id: int | None = None,
         allowed_concepts: set[str] | None = None,
-        total_questions: int = 8
+        total_questions: int = 8,
+        snapshot: AnalyticsSnapshot | None = None
     ) -> list[str]:
         """
         Build concept sequence for short-answer quizzes using short performance with MCQ tiebreakers.
@@ -454,8 +646,11 @@ class AnalyticsService:
         Selection:
           - If enough unique concepts: fill in priority order (below → weak → strong).
           - If few concepts: round-robin in the same priority order.
+        With a review schedule, the due-queue replaces the buckets.
         """
-        results = self.get_weak_points(student_id, material_id)
+        if self.review_repo is not None:
+            return self._due_quiz_concepts(student_id, material_id, "short_answer", allowed_concepts, total_questions)
+        results = self._resolve_results(student_id, material_id, snapshot)
 
         items: list[dict] = []
         for item in results:
@@ -533,9 +728,14 @@ class AnalyticsService:
         student_id: int,
         material_id: int | None = None,
         allowed_concepts: set[str] | None = None,
-        total_questions: int = 10
+        total_questions: int = 10,
+        snapshot: AnalyticsSnapshot | None = None
     ) -> list[str]:
-        results = self.get_weak_points(student_id, material_id)
+        if self.review_repo is not None:
+            return self._due_quiz_concepts(
+                student_id, material_id, "multiple-choice", allowed_concepts, total_questions
+            )
+        results = self._resolve_results(student_id, material_id, snapshot)
 
         items: list[dict] = []
         for item in results:
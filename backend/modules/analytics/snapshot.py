@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class AnalyticsSnapshot:
+    """
+    Per-concept weak-point results computed once for a (student, material) pair.
+    Shared by every analytics consumer within a single request.
+    """
+    student_id: int
+    material_id: int | None
+    results: list[dict]
+
+    def matches(self, student_id: int, material_id: int | None) -> bool:
+        return self.student_id == student_id and self.material_id == material_id
@@ -0,0 +1,107 @@
+from collections import deque
+from datetime import date, datetime
+from modules.analytics.constants import QUIZ_TYPES, CONFIDENCE_WINDOW
+from modules.analytics.records import AnalyticsRecord, TYPE_OTHER, TYPE_UNSET, as_records
+
+# lcm(1..7): a window's accuracy correct/len is an exact integer in these units
+_SCALE = 420
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def trend_concept_key(record: AnalyticsRecord) -> str:
+    # Canonical id: one concept across all of the student's materials
+    if record.canonical_id:
+        return f"c:{record.canonical_id}"
+    if record.concept_id:
+        return f"id:{record.concept_id}"
+    raw_name = record.concept_name or record.raw_concept or "Geral"
+    return f"name:{raw_name.strip().lower() or 'geral'}"
+
+
+def group_trend_events(items, tz_offset_minutes: int, end_utc: datetime | None = None) -> dict[date, list[tuple]]:
+    """
+    Groups analytics records into (epoch, quiz_type, concept_key, is_correct)
+    events per local date, each day sorted by time (stable on input order).
+    """
+    end_epoch = end_utc.timestamp() if end_utc is not None else None
+    offset_seconds = int(tz_offset_minutes) * 60
+    events_by_day: dict[int, list[tuple]] = {}
+    for record in as_records(items):
+        epoch = record.epoch
+        if epoch is None:
+            continue
+        if end_epoch is not None and epoch >= end_epoch:
+            continue
+
+        code = record.type_code
+        if code == TYPE_UNSET:
+            code = 0 # NULL quiz_type: multiple-choice
+        elif code == TYPE_OTHER:
+            continue
+
+        day_index = int((epoch + offset_seconds) // 86400)
+        events_by_day.setdefault(day_index, []).append(
+            (epoch, QUIZ_TYPES[code], trend_concept_key(record), record.is_correct)
+        )
+
+    grouped = {}
+    for day_index, day_events in events_by_day.items():
+        day_events.sort(key=lambda e: e[0])
+        grouped[date.fromordinal(_EPOCH_ORDINAL + day_index)] = day_events
+    return grouped
+
+
+class LearningTrendEngine:
+    """
+    Per quiz type: sliding CONFIDENCE_WINDOW per concept plus a running sum of
+    every concept's window accuracy. Each event and each day read is O(1).
+    """
+
+    def __init__(self, state: dict | None = None):
+        self._windows: dict[str, dict[str, deque]] = {qt: {} for qt in QUIZ_TYPES}
+        self._sums: dict[str, int] = {qt: 0 for qt in QUIZ_TYPES}
+        for qt, concepts in (state or {}).items():
+            if qt not in self._windows:
+                continue
+            for concept_key, window in concepts.items():
+                dq = deque((bool(v) for v in window), maxlen=CONFIDENCE_WINDOW)
+                self._windows[qt][concept_key] = dq
+                self._sums[qt] += self._accuracy(dq)
+
+    @staticmethod
+    def _accuracy(window: deque) -> int:
+        return sum(window) * _SCALE // len(window) if window else 0
+
+    def apply(self, quiz_type: str, concept_key: str, is_correct: bool) -> None:
+        concepts = self._windows[quiz_type]
+        window = concepts.get(concept_key)
+        if window is None:
+            window = deque(maxlen=CONFIDENCE_WINDOW)
+            concepts[concept_key] = window
+        previous = self._accuracy(window)
+        window.append(bool(is_correct))
+        self._sums[quiz_type] += self._accuracy(window) - previous
+
+    def level(self, quiz_type: str) -> int | None:
+        """Average concept accuracy (0-100) across every concept seen so far."""
+        seen = len(self._windows[quiz_type])
+        if not seen:
+            return None
+        return round(self._sums[quiz_type] * 100 / (_SCALE * seen))
+
+    def replay_day(self, events: list[tuple]) -> dict:
+        """Applies one day's events; returns that day's raw levels (before min_questions)."""
+        counts = {qt: 0 for qt in QUIZ_TYPES}
+        for _, quiz_type, concept_key, is_correct in events:
+            self.apply(quiz_type, concept_key, is_correct)
+            counts[quiz_type] += 1
+        return {
+            qt: {"value": self.level(qt) if counts[qt] else None, "questions": counts[qt]}
+            for qt in QUIZ_TYPES
+        }
+
+    def to_state(self) -> dict:
+        return {
+            qt: {key: [1 if v else 0 for v in window] for key, window in concepts.items()}
+            for qt, concepts in self._windows.items()
+        }
@@ -0,0 +1,14 @@
+import asyncio
+import inspect
+from typing import Any
+
+
+async def call_service(service: Any, name: str, *args: Any, **kwargs: Any) -> Any:
+    """
+    Awaits `service.<name>_async` when the service has a native async variant;
+    otherwise runs the blocking `service.<name>` in a worker thread.
+    """
+    method = getattr(service, f"{name}_async", None)
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await asyncio.to_thread(getattr(service, name), *args, **kwargs)
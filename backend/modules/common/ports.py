@@ -1,4 +1,4 @@
-from typing import Protocol, TYPE_CHECKING, Any
+from typing import Protocol, TYPE_CHECKING, Any, AsyncIterator
 
 if TYPE_CHECKING:
     pass
@@ -13,6 +13,10 @@ class OpenAIClientPort(Protocol):
     def chat_completions_create(self, **kwargs: Any) -> Any: ...
 
 
+class AsyncOpenAIClientPort(Protocol):
+    async def chat_completions_create(self, **kwargs: Any) -> Any: ...
+
+
 class LLMCallerPort(Protocol):
     def call(
         self,
@@ -24,3 +28,26 @@ class LLMCallerPort(Protocol):
         reasoning_effort: str | None = None
     ) -> str | None: ...
     def is_available(self) -> bool: ...
+
+
+class AsyncLLMCallerPort(Protocol):
+    async def call(
+        self,
+        prompt: str,
+        system_message: str,
+        model: str,
+        temperature: float = 0.7,
+        seed: int | None = None,
+        reasoning_effort: str | None = None
+    ) -> str | None: ...
+    def stream(
+        self,
+        prompt: str,
+        system_message: str,
+        model: str,
+        temperature: float = 0.7,
+        seed: int | None = None,
+        reasoning_effort: str | None = None
+    ) -> AsyncIterator[str]: ...
+    def is_available(self) -> bool: ...
+
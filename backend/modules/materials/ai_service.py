@@ -1,13 +1,15 @@
+import asyncio
 import json
 from llm_models import get_llm_models
-from modules.common.ports import LLMCallerPort
+from modules.common.ports import AsyncLLMCallerPort, LLMCallerPort
 from modules.materials.topic_extractor import TopicExtractor
 
 
 class TopicAIService:
 
-    def __init__(self, caller: LLMCallerPort | None):
+    def __init__(self, caller: LLMCallerPort | None, async_caller: AsyncLLMCallerPort | None = None):
         self.caller = caller
+        self.async_caller = async_caller
         models = get_llm_models()
         self.model_topic_extraction = models.topic_extraction
         self.reasoning_effort = models.topic_extraction_reasoning or models.reasoning_effort
@@ -15,20 +17,29 @@ class TopicAIService:
     def is_available(self) -> bool:
         return bool(self.caller and self.caller.is_available())
 
+    def _call_kwargs(self, text: str) -> dict:
+        return {
+            "prompt": TopicExtractor.generate_prompt(text, []),
+            "system_message": "És um gerador de JSON. Devolve apenas JSON válido.",
+            "model": self.model_topic_extraction,
+            "temperature": 0.0,
+            "seed": 42,
+            "reasoning_effort": self.reasoning_effort,
+        }
+
     def extract_topics(self, text: str) -> dict[str, list[str]]:
         if not self.is_available():
             return {"Tópicos Gerais": []}
-        prompt_topics = TopicExtractor.generate_prompt(text, [])
+        return self._parse_topics(self.caller.call(**self._call_kwargs(text)))
 
-        content_topics = self.caller.call(
-            prompt=prompt_topics,
-            system_message="És um gerador de JSON. Devolve apenas JSON válido.",
-            model=self.model_topic_extraction,
-            temperature=0.0,
-            seed=42,
-            reasoning_effort=self.reasoning_effort
-        )
+    async def extract_topics_async(self, text: str) -> dict[str, list[str]]:
+        """Awaits the async caller; without one the sync call runs in a worker thread."""
+        if not (self.async_caller and self.async_caller.is_available()):
+            return await asyncio.to_thread(self.extract_topics, text)
+        return self._parse_topics(await self.async_caller.call(**self._call_kwargs(text)))
 
+    @staticmethod
+    def _parse_topics(content_topics: str | None) -> dict[str, list[str]]:
         if content_topics is None:
             return {"Tópicos Gerais": []}
 
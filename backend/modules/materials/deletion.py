@@ -1,11 +1,15 @@
 from sqlalchemy.orm import Session
-from models import QuizResult, QuestionAnalytics, StudyMaterial, Student
+from models import QuizResult, QuestionAnalytics, StudyMaterial, Student, ConceptMastery, ConceptReviewSchedule
+from modules.analytics.ports import AnalyticsCacheInvalidatorPort
+from modules.analytics.repository import HourlyRollupRepository, LearningTrendRepository
 from modules.materials.ports import MaterialDeletionTransactionPort
+from modules.materials.repository import CanonicalConceptRepository
 
 
 class MaterialDeletionTransaction(MaterialDeletionTransactionPort):
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cache_invalidator: AnalyticsCacheInvalidatorPort | None = None):
         self.db = db
+        self.cache_invalidator = cache_invalidator
 
     def delete_with_cleanup(self, user_id: int, material_id: int) -> bool:
         try:
@@ -36,8 +40,21 @@ class MaterialDeletionTransaction(MaterialDeletionTransactionPort):
                 self.db.query(QuizResult).filter(
                     QuizResult.id.in_(quiz_ids)
                 ).delete(synchronize_session=False)
+            self.db.query(ConceptMastery).filter(
+                ConceptMastery.study_material_id == material_id
+            ).delete(synchronize_session=False)
+            self.db.query(ConceptReviewSchedule).filter(
+                ConceptReviewSchedule.study_material_id == material_id
+            ).delete(synchronize_session=False)
+            # Past days change once their answers are gone
+            LearningTrendRepository(self.db).reset(user_id)
+            HourlyRollupRepository(self.db).reset(user_id)
             self.db.delete(material)
+            # Names only this material used leave the canonical index
+            CanonicalConceptRepository(self.db).sync(user_id)
             self.db.commit()
+            if self.cache_invalidator is not None:
+                self.cache_invalidator.invalidate_student(user_id)
             return True
         except Exception as e:
             print(f"Error deleting material transactionally: {e}")
@@ -3,16 +3,20 @@ from sqlalchemy.orm import Session
 import os
 from database import get_db
 from modules.materials.ai_service import TopicAIService
+from modules.analytics.cache import AnalyticsResultCache
+from modules.analytics.deps import get_result_cache
 from modules.materials.deletion import MaterialDeletionTransaction
 from modules.materials.document_registry import DocumentTypeRegistry
 from modules.materials.document_service import DocumentService, PdfTextExtractor, PlainTextExtractor
 from modules.materials.file_types import FileTypeResolver
 from modules.materials.upsert import MaterialUpserter
 from modules.materials.repository import (
+    CanonicalConceptRepository,
     MaterialReadRepository,
     MaterialUpsertRepository,
 )
 from modules.materials.topic_service import TopicService
+from modules.quizzes.pregeneration import QuizPregenerator, get_quiz_pregenerator
 from modules.materials.use_cases import (
     UploadMaterialUseCase,
     AnalyzeTopicsUseCase,
@@ -22,7 +26,7 @@ from modules.materials.use_cases import (
     ActivateMaterialUseCase,
     DeleteMaterialUseCase,
 )
-from services.llm_provider import build_openai_caller
+from services.llm_provider import build_async_openai_caller, build_openai_caller
 
 
 def get_material_read_repo(db: Session = Depends(get_db)):
@@ -33,10 +37,13 @@ def get_material_upsert_repo(db: Session = Depends(get_db)):
     return MaterialUpsertRepository(db)
 
 
+def get_concept_index(db: Session = Depends(get_db)):
+    return CanonicalConceptRepository(db)
+
+
 def get_ai_service(api_key: str | None = None):
     key = api_key or os.getenv("OPENAI_API_KEY")
-    caller = build_openai_caller(key)
-    return TopicAIService(caller)
+    return TopicAIService(build_openai_caller(key), async_caller=build_async_openai_caller(key))
 
 
 def get_document_registry():
@@ -65,8 +72,10 @@ def get_upload_material_use_case(
     doc_service: DocumentService = Depends(get_document_service),
     topic_service: TopicService = Depends(get_topic_service),
     file_type_resolver: FileTypeResolver = Depends(get_file_type_resolver),
+    cache: AnalyticsResultCache = Depends(get_result_cache),
+    concept_index: CanonicalConceptRepository = Depends(get_concept_index),
 ):
-    upserter = MaterialUpserter(upsert_repo)
+    upserter = MaterialUpserter(upsert_repo, cache, concept_index)
     return UploadMaterialUseCase(doc_service, topic_service, upserter, file_type_resolver)
 
 
@@ -74,8 +83,10 @@ def get_analyze_topics_use_case(
     read_repo: MaterialReadRepository = Depends(get_material_read_repo),
     upsert_repo: MaterialUpsertRepository = Depends(get_material_upsert_repo),
     topic_service: TopicService = Depends(get_topic_service),
+    cache: AnalyticsResultCache = Depends(get_result_cache),
+    concept_index: CanonicalConceptRepository = Depends(get_concept_index),
 ):
-    upserter = MaterialUpserter(upsert_repo)
+    upserter = MaterialUpserter(upsert_repo, cache, concept_index)
     return AnalyzeTopicsUseCase(read_repo, topic_service, upserter)
 
 
@@ -99,12 +110,14 @@ def get_list_materials_use_case(
 
 def get_activate_material_use_case(
     read_repo: MaterialReadRepository = Depends(get_material_read_repo),
+    pregenerator: QuizPregenerator = Depends(get_quiz_pregenerator),
 ):
-    return ActivateMaterialUseCase(read_repo)
+    return ActivateMaterialUseCase(read_repo, pregenerator)
 
 
 def get_delete_material_use_case(
     db: Session = Depends(get_db),
+    cache: AnalyticsResultCache = Depends(get_result_cache),
 ):
-    deletion = MaterialDeletionTransaction(db)
+    deletion = MaterialDeletionTransaction(db, cache)
     return DeleteMaterialUseCase(deletion)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime, timezone
@@ -10,6 +10,7 @@ class StudyMaterial(Base):
     student_id = Column(Integer, ForeignKey("students.id")) # Link to owner
     source = Column(String, index=True)
     text = Column(Text)
+    content_hash = Column(String(64), index=True, nullable=True) # sha256 of text: groups copies of one material
     # topics column removed in favor of relational tables
     
     # New fields for per-material gamification and state
@@ -25,11 +26,15 @@ class StudyMaterial(Base):
     student = relationship("Student", back_populates="materials")
     topics = relationship("Topic", back_populates="material", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_study_materials_student_active", "student_id", "is_active"),
+    )
+
 class Topic(Base):
     __tablename__ = "topics"
 
     id = Column(Integer, primary_key=True, index=True)
-    study_material_id = Column(Integer, ForeignKey("study_materials.id"))
+    study_material_id = Column(Integer, ForeignKey("study_materials.id"), index=True)
     name = Column(String, index=True)
     
     material = relationship("StudyMaterial", back_populates="topics")
@@ -41,6 +46,29 @@ class Concept(Base):
     id = Column(Integer, primary_key=True, index=True)
     topic_id = Column(Integer, ForeignKey("topics.id"))
     name = Column(String, index=True)
+    # CanonicalConcept.id (same name across materials); cleared when sync prunes the canonical row
+    canonical_concept_id = Column(
+        Integer, ForeignKey("canonical_concepts.id", ondelete="SET NULL"), index=True, nullable=True
+    )
 
     topic = relationship("Topic", back_populates="concepts")
     analytics = relationship("QuestionAnalytics", back_populates="concept")
+
+
+class CanonicalConcept(Base):
+    """
+    One row per normalized concept name per student, shared by every material
+    that has a concept with that name. Maintained when materials change.
+    """
+    __tablename__ = "canonical_concepts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    norm_name = Column(String, nullable=False) # name.strip().lower()
+    name = Column(String, nullable=False) # first spelling seen
+    topic_name = Column(String, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("student_id", "norm_name", name="uq_canonical_concepts_student_name"),
+    )
+
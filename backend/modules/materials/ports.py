@@ -39,6 +39,10 @@ class FileTypeResolverPort(Protocol):
     def resolve(self, filename: str, explicit_type: str | None) -> str: ...
 
 
+class CanonicalConceptIndexPort(Protocol):
+    def sync(self, student_id: int, material: Any = None) -> None: ...
+
+
 class MaterialUpserterPort(Protocol):
     def upsert(self, student_id: int, text: str, source_name: str, topics: Dict[str, List[str]] | None) -> Any: ...
 
@@ -69,6 +73,7 @@ class UploadMaterialUseCasePort(Protocol):
 
 class AnalyzeTopicsUseCasePort(Protocol):
     def execute(self, user_id: int, ai_service: "TopicAIServicePort") -> Dict: ...
+    async def execute_async(self, user_id: int, ai_service: "TopicAIServicePort") -> Dict: ...
 
 
 class GetCurrentMaterialUseCasePort(Protocol):
@@ -96,5 +101,6 @@ class TopicSelectorPort(Protocol):
         self,
         user_id: int,
         material_id: int | None,
-        requested_topics: List[str] | None
+        requested_topics: List[str] | None,
+        snapshot: Any = None
     ) -> Tuple[List[str], List[str]]: ...
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from models import StudyMaterial
+from models import CanonicalConcept, Concept, StudyMaterial, Topic
 
 
 class MaterialRepositoryBase:
@@ -165,3 +165,61 @@ class MaterialConceptRepository(MaterialRepositoryBase):
         except Exception as e:
             print(f"Error loading student concept pairs: {e}")
             return []
+
+
+class CanonicalConceptRepository(MaterialRepositoryBase):
+    """Keeps canonical_concepts and Concept.canonical_concept_id in step with a student's materials."""
+
+    def _student_concepts(self, student_id: int):
+        return (
+            self.db.query(Concept)
+            .join(Topic, Concept.topic_id == Topic.id)
+            .join(StudyMaterial, Topic.study_material_id == StudyMaterial.id)
+            .filter(StudyMaterial.student_id == student_id)
+        )
+
+    def sync(self, student_id: int, material: StudyMaterial | None = None) -> None:
+        """
+        Gives every concept without one a canonical id (created on first use of a
+        name) and drops canonical rows no material uses any more. Does not commit.
+        """
+        if material is not None:
+            self.db.add(material)
+        self.db.flush()
+
+        pending = (
+            self._student_concepts(student_id)
+            .filter(Concept.canonical_concept_id.is_(None))
+            .add_columns(Topic.name)
+            .order_by(Concept.id)
+            .all()
+        )
+        if pending:
+            canonical_ids = {
+                norm_name: canonical_id
+                for canonical_id, norm_name in self.db.query(CanonicalConcept.id, CanonicalConcept.norm_name)
+                .filter(CanonicalConcept.student_id == student_id)
+            }
+            for concept, topic_name in pending:
+                norm_name = (concept.name or "").strip().lower()
+                if not norm_name:
+                    continue
+                canonical_id = canonical_ids.get(norm_name)
+                if canonical_id is None:
+                    canonical = CanonicalConcept(
+                        student_id=student_id, norm_name=norm_name, name=concept.name.strip(), topic_name=topic_name
+                    )
+                    self.db.add(canonical)
+                    self.db.flush()
+                    canonical_id = canonical_ids[norm_name] = canonical.id
+                concept.canonical_concept_id = canonical_id
+            self.db.flush()
+
+        used = self._student_concepts(student_id).with_entities(Concept.canonical_concept_id).filter(
+            Concept.canonical_concept_id.is_not(None)
+        )
+        self.db.query(CanonicalConcept).filter(
+            CanonicalConcept.student_id == student_id,
+            CanonicalConcept.id.not_in(used.scalar_subquery()),
+        ).delete(synchronize_session=False)
+        self.db.flush()
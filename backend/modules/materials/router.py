@@ -112,7 +112,7 @@ async def upload_file(
 
 @router.post("/analyze-topics")
 @limiter.limit(AI_RATE_LIMIT)
-def analyze_topics_endpoint(
+async def analyze_topics_endpoint(
     request: Request,
     payload: AnalyzeRequest,
     current_user: Student = Depends(get_current_user),
@@ -121,6 +121,6 @@ def analyze_topics_endpoint(
     ai_service: TopicAIServicePort = Depends(get_ai_service)
 ):
     try:
-        return use_case.execute(current_user.id, ai_service)
+        return await use_case.execute_async(current_user.id, ai_service)
     except MaterialServiceError as e:
         raise HTTPException(status_code=e.status_code, detail=str(e))
@@ -1,3 +1,4 @@
+from modules.common.aio import call_service
 from modules.materials.ports import TopicAIServicePort
 
 class TopicService:
@@ -8,7 +9,15 @@ class TopicService:
         """
         # We delegate entirely to AI Service now for better semantics and deduplication
         raw_topics = ai_service.extract_topics(text)
-        
+        return self._clean_topics(raw_topics)
+
+    async def extract_topics_async(self, text: str, ai_service: TopicAIServicePort) -> dict[str, list[str]]:
+        """Same as extract_topics, awaiting the AI service's async variant when it has one."""
+        raw_topics = await call_service(ai_service, "extract_topics", text)
+        return self._clean_topics(raw_topics)
+
+    @staticmethod
+    def _clean_topics(raw_topics: dict[str, list[str]]) -> dict[str, list[str]]:
         # Blacklist Filtering
         final_topics = {}
         for topic, concepts in raw_topics.items():
@@ -1,11 +1,25 @@
+import hashlib
 from datetime import datetime, timezone
 from models import StudyMaterial, Topic, Concept
-from modules.materials.ports import MaterialUpsertRepositoryPort
+from modules.analytics.ports import AnalyticsCacheInvalidatorPort
+from modules.materials.ports import CanonicalConceptIndexPort, MaterialUpsertRepositoryPort
+
+
+def material_content_hash(text: str | None) -> str:
+    """Identifies copies of the same material uploaded by different students."""
+    return hashlib.sha256((text or "").strip().encode("utf-8")).hexdigest()
 
 
 class MaterialUpserter:
-    def __init__(self, repo: MaterialUpsertRepositoryPort):
+    def __init__(
+        self,
+        repo: MaterialUpsertRepositoryPort,
+        cache_invalidator: AnalyticsCacheInvalidatorPort | None = None,
+        concept_index: CanonicalConceptIndexPort | None = None
+    ):
         self.repo = repo
+        self.cache_invalidator = cache_invalidator
+        self.concept_index = concept_index
 
     def upsert(self, student_id: int, text: str, source_name: str, topics: dict[str, list[str]] | None):
         if not self.repo.deactivate_all(student_id, commit=False):
@@ -14,12 +28,14 @@ class MaterialUpserter:
         material = self.repo.find_by_source(student_id, source_name)
         if material:
             material.text = text
+            material.content_hash = material_content_hash(text)
             material.is_active = True
             material.last_accessed = datetime.now(timezone.utc)
         else:
             material = StudyMaterial(
                 student_id=student_id,
                 text=text,
+                content_hash=material_content_hash(text),
                 source=source_name,
                 is_active=True,
                 last_accessed=datetime.now(timezone.utc)
@@ -28,7 +44,13 @@ class MaterialUpserter:
         print(f"DEBUG: MaterialUpserter.upsert topics={topics}")
         material.topics = self._build_topics(topics)
         print(f"DEBUG: MaterialUpserter built topics count={len(material.topics)}")
-        return self.repo.save_material(material)
+        if self.concept_index is not None:
+            # Same transaction as the material: committed by save_material
+            self.concept_index.sync(student_id, material)
+        saved = self.repo.save_material(material)
+        if saved is not None and self.cache_invalidator is not None:
+            self.cache_invalidator.invalidate_student(student_id)
+        return saved
 
     @staticmethod
     def _build_topics(topics: dict[str, list[str]] | None) -> list[Topic]:
@@ -1,4 +1,5 @@
 import asyncio
+from modules.common.aio import call_service
 from modules.materials.errors import MAX_FILE_SIZE, MaterialServiceError
 from modules.materials.file_types import FileTypeResolver
 from modules.materials.mapper import MaterialMapper
@@ -18,6 +19,7 @@ from modules.materials.ports import (
     TopicServicePort,
     UploadMaterialUseCasePort,
 )
+from modules.quizzes.ports import QuizPregenerationSchedulerPort
 
 
 class UploadMaterialUseCase(UploadMaterialUseCasePort):
@@ -53,8 +55,9 @@ class UploadMaterialUseCase(UploadMaterialUseCasePort):
         if not text:
             raise MaterialServiceError("Failed to extract text from file.")
 
-        topics = await asyncio.to_thread(self.topic_service.extract_topics, text, ai_service)
-        self.upserter.upsert(user_id, text, filename, topics)
+        topics = await call_service(self.topic_service, "extract_topics", text, ai_service)
+        # DB writes, canonical-index sync and cache invalidation: keep them off the event loop
+        await asyncio.to_thread(self.upserter.upsert, user_id, text, filename, topics)
 
         return {"text": text, "filename": filename, "topics": topics}
 
@@ -65,19 +68,32 @@ class AnalyzeTopicsUseCase(AnalyzeTopicsUseCasePort):
         self.topic_service = topic_service
         self.upserter = upserter
 
-    def execute(self, user_id: int, ai_service: TopicAIServicePort) -> dict:
+    def _load(self, user_id: int, ai_service: TopicAIServicePort):
         if not ai_service or not ai_service.is_available():
             raise MaterialServiceError("API Key is required for topic extraction.")
 
         material = self.repo.load(user_id)
         if not material or not material.text:
             raise MaterialServiceError("No material found to analyze")
+        return material
+
+    def execute(self, user_id: int, ai_service: TopicAIServicePort) -> dict:
+        """Blocking; async callers use execute_async."""
+        material = self._load(user_id, ai_service)
 
         topics = self.topic_service.extract_topics(material.text, ai_service)
         self.upserter.upsert(user_id, material.text, material.source, topics)
 
         return {"topics": topics}
 
+    async def execute_async(self, user_id: int, ai_service: TopicAIServicePort) -> dict:
+        material = await asyncio.to_thread(self._load, user_id, ai_service)
+
+        topics = await call_service(self.topic_service, "extract_topics", material.text, ai_service)
+        await asyncio.to_thread(self.upserter.upsert, user_id, material.text, material.source, topics)
+
+        return {"topics": topics}
+
 
 class GetCurrentMaterialUseCase(GetCurrentMaterialUseCasePort):
     def __init__(self, repo: MaterialReaderRepositoryPort):
@@ -108,11 +124,15 @@ class ListMaterialsUseCase(ListMaterialsUseCasePort):
 
 
 class ActivateMaterialUseCase(ActivateMaterialUseCasePort):
-    def __init__(self, repo: MaterialReaderRepositoryPort):
+    def __init__(self, repo: MaterialReaderRepositoryPort, pregenerator: QuizPregenerationSchedulerPort | None = None):
         self.repo = repo
+        self.pregenerator = pregenerator
 
     def execute(self, user_id: int, material_id: int) -> bool:
-        return self.repo.activate(user_id, material_id)
+        activated = self.repo.activate(user_id, material_id)
+        if activated and self.pregenerator is not None:
+            self.pregenerator.schedule(user_id)
+        return activated
 
 
 class DeleteMaterialUseCase(DeleteMaterialUseCasePort):
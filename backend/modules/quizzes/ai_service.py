@@ -1,15 +1,22 @@
+import asyncio
 import json
-from typing import Any
+from typing import Any, AsyncIterator
 from llm_models import get_llm_models
-from modules.common.ports import LLMCallerPort
+from modules.common.ports import AsyncLLMCallerPort, LLMCallerPort
 from modules.quizzes.engine import QuizGenerationStrategy
 from modules.quizzes.answer_evaluator import AnswerEvaluator
+from modules.quizzes.streaming import QuestionStreamParser
 
 
 class QuizAIService:
 
-    def __init__(self, caller: LLMCallerPort | None):
+    _QUIZ_SYSTEM_MESSAGE = "És um gerador de JSON. Devolve apenas JSON válido."
+    _EVAL_SYSTEM_MESSAGE = "És um professor a corrigir um teste. Devolve JSON."
+    _EVAL_ERROR = {"score": 0, "feedback": "Erro ao avaliar. Tenta novamente."}
+
+    def __init__(self, caller: LLMCallerPort | None, async_caller: AsyncLLMCallerPort | None = None):
         self.caller = caller
+        self.async_caller = async_caller
         models = get_llm_models()
         self.model_quiz_generation = models.quiz_generation
         self.model_answer_evaluation = models.answer_evaluation
@@ -32,7 +39,7 @@ class QuizAIService:
 
         content = self.caller.call(
             prompt=prompt,
-            system_message="És um gerador de JSON. Devolve apenas JSON válido.",
+            system_message=self._QUIZ_SYSTEM_MESSAGE,
             model=self.model_quiz_generation,
             reasoning_effort=self.reasoning_effort
         )
@@ -43,20 +50,96 @@ class QuizAIService:
 
     def evaluate_answer(self, strategy: Any, text: str, question: str, user_answer: str) -> dict:
         if not self.is_available():
-            return {"score": 0, "feedback": "Erro ao avaliar. Tenta novamente."}
+            return dict(self._EVAL_ERROR)
         prompt = AnswerEvaluator.generate_prompt(strategy, text, question, user_answer)
 
         content = self.caller.call(
             prompt=prompt,
-            system_message="És um professor a corrigir um teste. Devolve JSON.",
+            system_message=self._EVAL_SYSTEM_MESSAGE,
             model=self.model_answer_evaluation,
             reasoning_effort=self.reasoning_effort
         )
 
+        return self._parse_evaluation(content)
+
+    @classmethod
+    def _parse_evaluation(cls, content: str | None) -> dict:
         if content is None:
-            return {"score": 0, "feedback": "Erro ao avaliar. Tenta novamente."}
+            return dict(cls._EVAL_ERROR)
 
         try:
             return json.loads(content)
         except json.JSONDecodeError:
             return {"score": 0, "feedback": "Erro ao processar avaliação."}
+
+    def _async_available(self) -> bool:
+        return bool(self.async_caller and self.async_caller.is_available())
+
+    async def generate_quiz_async(
+        self,
+        strategy: QuizGenerationStrategy,
+        text: str,
+        topics: list[str] | None = None,
+        priority_topics: list[str] | None = None,
+        material_concepts: list[str] | None = None
+    ) -> list[dict] | None:
+        """Awaits the async caller; without one the sync call runs in a worker thread."""
+        if not self._async_available():
+            return await asyncio.to_thread(
+                self.generate_quiz, strategy, text, topics, priority_topics, material_concepts
+            )
+        prompt = strategy.generate_prompt(text, topics, priority_topics, material_concepts)
+
+        content = await self.async_caller.call(
+            prompt=prompt,
+            system_message=self._QUIZ_SYSTEM_MESSAGE,
+            model=self.model_quiz_generation,
+            reasoning_effort=self.reasoning_effort
+        )
+
+        if content is None:
+            return None
+        return strategy.parse_response(content)
+
+    async def stream_quiz(
+        self,
+        strategy: QuizGenerationStrategy,
+        text: str,
+        topics: list[str] | None = None,
+        priority_topics: list[str] | None = None,
+        material_concepts: list[str] | None = None
+    ) -> AsyncIterator[dict]:
+        """
+        Yields each question as soon as it is complete in the LLM stream.
+        Without an async caller the full quiz is generated first and then yielded.
+        """
+        if not self._async_available():
+            questions = await self.generate_quiz_async(strategy, text, topics, priority_topics, material_concepts)
+            for question in questions or []:
+                yield question
+            return
+        prompt = strategy.generate_prompt(text, topics, priority_topics, material_concepts)
+
+        parser = QuestionStreamParser()
+        deltas = self.async_caller.stream(
+            prompt=prompt,
+            system_message=self._QUIZ_SYSTEM_MESSAGE,
+            model=self.model_quiz_generation,
+            reasoning_effort=self.reasoning_effort
+        )
+        async for delta in deltas:
+            for question in parser.feed(delta):
+                yield question
+
+    async def evaluate_answer_async(self, strategy: Any, text: str, question: str, user_answer: str) -> dict:
+        if not self._async_available():
+            return await asyncio.to_thread(self.evaluate_answer, strategy, text, question, user_answer)
+        prompt = AnswerEvaluator.generate_prompt(strategy, text, question, user_answer)
+
+        content = await self.async_caller.call(
+            prompt=prompt,
+            system_message=self._EVAL_SYSTEM_MESSAGE,
+            model=self.model_answer_evaluation,
+            reasoning_effort=self.reasoning_effort
+        )
+        return self._parse_evaluation(content)
@@ -2,6 +2,9 @@ from fastapi import Depends
 from sqlalchemy.orm import Session
 import os
 from database import get_db
+from modules.analytics.cache import AnalyticsResultCache
+from modules.analytics.deps import get_mastery_repo, get_result_cache, get_review_repo
+from modules.analytics.ports import ConceptMasteryReaderPort, ReviewScheduleReaderPort
 from modules.analytics.repository import AnalyticsRepository
 from modules.analytics.service import AnalyticsService
 from modules.materials.repository import (
@@ -10,6 +13,12 @@ from modules.materials.repository import (
 )
 from modules.quizzes.ai_service import QuizAIService
 from modules.quizzes.concept_resolver import ConceptIdResolver
+from modules.quizzes.pregeneration import (
+    PregeneratedQuizPool,
+    QuizPregenerator,
+    get_pregeneration_pool,
+    get_quiz_pregenerator,
+)
 from modules.quizzes.policies import AdaptiveTopicSelector, QuizStrategyFactory
 from modules.quizzes.recorder import QuizResultRecorder
 from modules.quizzes.repository import QuizResultPersistenceRepository
@@ -20,7 +29,7 @@ from modules.quizzes.use_cases import (
 )
 from modules.quizzes.registry import build_default_quiz_registry
 from modules.quizzes.ports import QuizResultPersistencePort
-from services.llm_provider import build_openai_caller
+from services.llm_provider import build_async_openai_caller, build_openai_caller
 
 
 def get_material_read_repo(db: Session = Depends(get_db)):
@@ -41,18 +50,42 @@ def get_analytics_repo(db: Session = Depends(get_db)):
 
 def get_ai_service(api_key: str | None = None):
     key = api_key or os.getenv("OPENAI_API_KEY")
-    caller = build_openai_caller(key)
-    return QuizAIService(caller)
+    return QuizAIService(build_openai_caller(key), async_caller=build_async_openai_caller(key))
+
+
+def get_pregen_pool() -> PregeneratedQuizPool | None:
+    # No pre-generation workers: skip the pool lookup (and its version query) entirely
+    if not get_quiz_pregenerator().enabled:
+        return None
+    return get_pregeneration_pool()
+
 
 def get_generate_quiz_use_case(
     material_repo: MaterialReadRepository = Depends(get_material_read_repo),
     concept_repo: MaterialConceptRepository = Depends(get_material_concept_repo),
-    analytics_repo: AnalyticsRepository = Depends(get_analytics_repo)
+    analytics_repo: AnalyticsRepository = Depends(get_analytics_repo),
+    mastery_repo: ConceptMasteryReaderPort = Depends(get_mastery_repo),
+    cache: AnalyticsResultCache = Depends(get_result_cache),
+    review_repo: ReviewScheduleReaderPort | None = Depends(get_review_repo),
+    pregen_pool: PregeneratedQuizPool | None = Depends(get_pregen_pool)
 ):
-    analytics_service = AnalyticsService(analytics_repo, concept_repo)
+    analytics_service = AnalyticsService(analytics_repo, concept_repo, mastery_repo, cache=cache, review_repo=review_repo)
     topic_selector = AdaptiveTopicSelector(analytics_service)
     strategy_factory = QuizStrategyFactory(build_default_quiz_registry())
-    return GenerateQuizUseCase(material_repo, topic_selector, strategy_factory, analytics_service)
+    return GenerateQuizUseCase(material_repo, topic_selector, strategy_factory, analytics_service, pregen_pool)
+
+
+def build_generate_quiz_use_case(db: Session) -> GenerateQuizUseCase:
+    """Same wiring as get_generate_quiz_use_case, outside a request (background pre-generation)."""
+    return get_generate_quiz_use_case(
+        MaterialReadRepository(db),
+        MaterialConceptRepository(db),
+        AnalyticsRepository(db),
+        get_mastery_repo(db),
+        get_result_cache(),
+        get_review_repo(db),
+        get_pregeneration_pool(),
+    )
 
 
 def get_evaluate_answer_use_case(
@@ -66,7 +99,9 @@ def get_save_quiz_result_use_case(
     material_repo: MaterialReadRepository = Depends(get_material_read_repo),
     concept_repo: MaterialConceptRepository = Depends(get_material_concept_repo),
     quiz_repo: QuizResultPersistencePort = Depends(get_quiz_repo),
+    cache: AnalyticsResultCache = Depends(get_result_cache),
+    pregenerator: QuizPregenerator = Depends(get_quiz_pregenerator),
 ):
     resolver = ConceptIdResolver(concept_repo)
     recorder = QuizResultRecorder(quiz_repo, resolver)
-    return SaveQuizResultUseCase(material_repo, recorder)
+    return SaveQuizResultUseCase(material_repo, recorder, cache, pregenerator)
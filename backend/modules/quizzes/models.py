@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime, timezone
@@ -20,12 +20,17 @@ class QuizResult(Base):
     student = relationship("Student", back_populates="quiz_results")
     analytics = relationship("QuestionAnalytics", back_populates="quiz_result", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_quiz_results_student_created", "student_id", "created_at"),
+        Index("ix_quiz_results_student_material", "student_id", "study_material_id"),
+    )
+
 class QuestionAnalytics(Base):
     __tablename__ = "question_analytics"
 
     id = Column(Integer, primary_key=True, index=True)
-    quiz_result_id = Column(Integer, ForeignKey("quiz_results.id"))
-    concept_id = Column(Integer, ForeignKey("concepts.id"), nullable=True) # Linked to granular concept
+    quiz_result_id = Column(Integer, ForeignKey("quiz_results.id"), index=True)
+    concept_id = Column(Integer, ForeignKey("concepts.id"), nullable=True, index=True) # Linked to granular concept
     # topic string kept for backward compatibility if needed, but primary link is concept_id
     topic = Column(String, index=True, nullable=True) 
     is_correct = Column(Boolean)
@@ -1,5 +1,6 @@
 import random
 from modules.analytics.ports import AnalyticsServicePort
+from modules.analytics.snapshot import AnalyticsSnapshot
 from modules.quizzes.registry import QuizTypeRegistry
 
 
@@ -52,9 +53,15 @@ class AdaptiveTopicSelector:
     def __init__(self, analytics_service: AnalyticsServicePort):
         self.analytics_service = analytics_service
 
-    def select(self, user_id: int, material_id: int | None, requested_topics: list[str] | None):
+    def select(
+        self,
+        user_id: int,
+        material_id: int | None,
+        requested_topics: list[str] | None,
+        snapshot: AnalyticsSnapshot | None = None
+    ):
         priority_topics: list[str] = []
-        adaptive_data = self.analytics_service.get_adaptive_topics(user_id, material_id)
+        adaptive_data = self.analytics_service.get_adaptive_topics(user_id, material_id, snapshot=snapshot)
         if adaptive_data:
             priority_topics = adaptive_data.get("boost", []) + adaptive_data.get("mastered", [])
 
@@ -1,4 +1,4 @@
-from typing import Protocol, TYPE_CHECKING, List, Dict, Any
+from typing import Protocol, TYPE_CHECKING, List, Dict, Any, AsyncIterator
 
 if TYPE_CHECKING:
     from schemas.study import EvaluationRequest, QuizRequest, QuizResultCreate
@@ -58,11 +58,29 @@ class QuizAIServicePort(QuizGeneratorPort, AnswerEvaluatorPort, Protocol):
 
 class GenerateQuizUseCasePort(Protocol):
     def execute(self, user_id: int, request: "QuizRequest", ai_service: "QuizGeneratorPort") -> List[Dict]: ...
+    async def execute_async(
+        self, user_id: int, request: "QuizRequest", ai_service: "QuizGeneratorPort"
+    ) -> List[Dict]: ...
+    async def execute_stream(
+        self, user_id: int, request: "QuizRequest", ai_service: "QuizGeneratorPort"
+    ) -> AsyncIterator[Dict]: ...
 
 
 class EvaluateAnswerUseCasePort(Protocol):
     def execute(self, user_id: int, request: "EvaluationRequest", ai_service: "AnswerEvaluatorPort") -> Dict: ...
+    async def execute_async(
+        self, user_id: int, request: "EvaluationRequest", ai_service: "AnswerEvaluatorPort"
+    ) -> Dict: ...
 
 
 class SaveQuizResultUseCasePort(Protocol):
     def execute(self, user_id: int, result: "QuizResultCreate") -> None: ...
+
+
+class QuizPregenerationSchedulerPort(Protocol):
+    def schedule(self, student_id: int) -> bool: ...
+
+
+class PregeneratedQuizPoolPort(Protocol):
+    def put(self, student_id: int, material_id: int, quiz_type: str, version: str, questions: List[Dict]) -> None: ...
+    def take(self, student_id: int, material_id: int, quiz_type: str, version: str) -> List[Dict] | None: ...
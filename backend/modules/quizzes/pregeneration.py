@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+QUIZ_TYPES = ("multiple-choice", "short_answer", "open-ended")
+
+
+class PregeneratedQuizPool:
+    """
+    Bounded LRU of ready-to-serve quizzes, one per (student, material, quiz type).
+
+    Each entry records the version of the inputs it was built from; `take`
+    only hands it out when the caller's current version matches, and an entry
+    is served at most once.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[int, int, str], tuple[str, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def put(self, student_id: int, material_id: int, quiz_type: str, version: str, questions: list[dict]) -> None:
+        if self.max_entries <= 0:
+            return
+        key = (student_id, material_id, quiz_type)
+        with self._lock:
+            self._entries[key] = (version, questions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def take(self, student_id: int, material_id: int, quiz_type: str, version: str) -> list[dict] | None:
+        with self._lock:
+            entry = self._entries.pop((student_id, material_id, quiz_type), None)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != version:
+                self.stale += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def invalidate_student(self, student_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == student_id]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+            }
+
+
+class QuizPregenerator:
+    """
+    Prepares the next quiz of every unlocked type in a background thread pool.
+
+    `use_case_factory(db)` builds a GenerateQuizUseCase on a fresh session and
+    `ai_service_factory()` the server-key AI service; with workers == 0 (or no
+    available AI service) scheduling does nothing.
+
+    Generations run on the server key, so they only run while the student has
+    daily quota left (`usage_factory(db)`); the quota is charged once, by the
+    request that is served the pooled quiz. Runs start at most every `min_interval_seconds` per student, and only
+    students whose last quiz request used the server key are served.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        use_case_factory: Callable[[Session], Any],
+        ai_service_factory: Callable[[], Any],
+        workers: int = 0,
+        usage_factory: Callable[[Session], Any] | None = None,
+        min_interval_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.session_factory = session_factory
+        self.use_case_factory = use_case_factory
+        self.ai_service_factory = ai_service_factory
+        self.workers = workers
+        self.usage_factory = usage_factory
+        self.min_interval_seconds = min_interval_seconds
+        self._clock = clock
+        self._executor: ThreadPoolExecutor | None = None
+        self._in_flight: set[int] = set()
+        # Saved again while a run was in flight: that run may pool a stale version, so it runs once more
+        self._dirty: set[int] = set()
+        self._server_key_students: set[int] = set()
+        self._last_started: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def note_key_source(self, student_id: int, own_key: bool) -> None:
+        """Called on every quiz request: bring-your-own-key students are never pre-generated for."""
+        with self._lock:
+            if own_key:
+                self._server_key_students.discard(student_id)
+            else:
+                self._server_key_students.add(student_id)
+
+    def schedule(self, student_id: int) -> bool:
+        """
+        Queues a pre-generation run, or a rerun after the one in flight; False when
+        disabled, the student doesn't use the server key or the last run started
+        too recently.
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            if student_id not in self._server_key_students:
+                return False
+            if student_id in self._in_flight:
+                self._dirty.add(student_id)
+                return True
+            now = self._clock()
+            last_started = self._last_started.get(student_id)
+            if last_started is not None and now - last_started < self.min_interval_seconds:
+                return False
+            self._last_started[student_id] = now
+            self._in_flight.add(student_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="quiz-pregen")
+        self._executor.submit(self._run_and_release, student_id)
+        return True
+
+    def _run_and_release(self, student_id: int) -> None:
+        try:
+            self.run(student_id)
+        except Exception as e:
+            print(f"Error pre-generating quizzes for student {student_id}: {e}")
+        finally:
+            with self._lock:
+                rerun = student_id in self._dirty and self._executor is not None
+                self._dirty.discard(student_id)
+                if rerun:
+                    self._last_started[student_id] = self._clock()
+                    self._executor.submit(self._run_and_release, student_id)
+                else:
+                    self._in_flight.discard(student_id)
+
+    def run(self, student_id: int) -> list[str]:
+        """Generates and pools one quiz per unlocked type; returns the types that were pooled."""
+        ai_service = self.ai_service_factory()
+        if not ai_service or not ai_service.is_available():
+            return []
+        db = self.session_factory()
+        try:
+            use_case = self.use_case_factory(db)
+            quota_check = self._quota_check(db, student_id)
+            return [
+                quiz_type for quiz_type in QUIZ_TYPES
+                if use_case.pregenerate(student_id, quiz_type, ai_service, quota_check)
+            ]
+        finally:
+            db.close()
+
+    def _quota_check(self, db: Session, student_id: int) -> Callable[[], bool] | None:
+        if self.usage_factory is None:
+            return None
+        usage_service = self.usage_factory(db)
+        return lambda: usage_service.has_remaining(student_id)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pregeneration_pool: PregeneratedQuizPool | None = None
+_quiz_pregenerator: QuizPregenerator | None = None
+
+
+def get_pregeneration_pool() -> PregeneratedQuizPool:
+    """Process-wide pool; QUIZ_PREGEN_POOL_SIZE bounds the number of stored quizzes."""
+    global _pregeneration_pool
+    if _pregeneration_pool is None:
+        _pregeneration_pool = PregeneratedQuizPool(max_entries=int(os.getenv("QUIZ_PREGEN_POOL_SIZE", "512") or 0))
+    return _pregeneration_pool
+
+
+def get_quiz_pregenerator() -> QuizPregenerator:
+    """
+    Process-wide pre-generator; QUIZ_PREGEN_WORKERS=0 (the default) keeps it off and
+    QUIZ_PREGEN_MIN_INTERVAL_SECONDS spaces the runs of each student.
+    """
+    global _quiz_pregenerator
+    if _quiz_pregenerator is None:
+        from database import SessionLocal
+        from modules.quizzes.deps import build_generate_quiz_use_case, get_ai_service
+        from repositories.usage_repository import DailyUsageRepository
+        from services.usage_service import UsageService
+
+        _quiz_pregenerator = QuizPregenerator(
+            SessionLocal,
+            build_generate_quiz_use_case,
+            get_ai_service,
+            workers=int(os.getenv("QUIZ_PREGEN_WORKERS", "0") or 0),
+            usage_factory=lambda db: UsageService(DailyUsageRepository(db)),
+            min_interval_seconds=float(os.getenv("QUIZ_PREGEN_MIN_INTERVAL_SECONDS", "300") or 0),
+        )
+    return _quiz_pregenerator
+
+
+def shutdown_quiz_pregenerator() -> None:
+    if _quiz_pregenerator is not None:
+        _quiz_pregenerator.shutdown()
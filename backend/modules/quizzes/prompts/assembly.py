@@ -0,0 +1,69 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from modules.quizzes.prompts.templates import PROMPT_VERSION
+
+
+def material_key(text: str) -> str:
+    """Content key for a material: the same text renders the same prefix, whatever its id."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PromptPrefixCache:
+    """
+    Bounded LRU of rendered prompt prefixes keyed by (kind, material, quiz type, PROMPT_VERSION).
+
+    Besides skipping the re-render, it guarantees repeated requests send a
+    byte-identical prefix, which is what provider prompt caching matches on.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, kind: str, text: str, quiz_type: str, render: Callable[[], str]) -> str:
+        if self.max_entries <= 0:
+            return render()
+        key = (kind, material_key(text), quiz_type, PROMPT_VERSION)
+        with self._lock:
+            prefix = self._entries.get(key)
+            if prefix is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return prefix
+            self.misses += 1
+        prefix = render()
+        with self._lock:
+            self._entries[key] = prefix
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return prefix
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "prompt_version": PROMPT_VERSION,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+_prefix_cache = PromptPrefixCache()
+
+
+def get_prefix_cache() -> PromptPrefixCache:
+    return _prefix_cache
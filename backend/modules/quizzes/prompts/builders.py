@@ -1,8 +1,11 @@
+from modules.quizzes.prompts.assembly import get_prefix_cache
 from modules.quizzes.prompts.templates import (
     MULTIPLE_CHOICE_TEMPLATE,
     OPEN_ENDED_TEMPLATE,
     SHORT_ANSWER_TEMPLATE,
     EVALUATION_TEMPLATE,
+    QUIZ_REQUEST_TEMPLATE,
+    EVALUATION_REQUEST_TEMPLATE,
     COMMON_LANGUAGE_RULES,
     PERSONA_TEACHER
 )
@@ -89,9 +92,23 @@ class PromptBuilder:
         Usa os conceitos do topo da lista preferencialmente. Cada pergunta pode cobrir 1-2 conceitos.
         {lines}"""
 
+    @staticmethod
+    def build_quiz_prefix(quiz_type: str, text: str) -> str:
+        """Parte estável do prompt (persona, regras, template e texto); igual byte a byte entre pedidos."""
+        template = {
+            "multiple-choice": MULTIPLE_CHOICE_TEMPLATE,
+            "open-ended": OPEN_ENDED_TEMPLATE,
+            "short_answer": SHORT_ANSWER_TEMPLATE
+        }.get(quiz_type, MULTIPLE_CHOICE_TEMPLATE)
+
+        return get_prefix_cache().get_or_render(
+            "quiz", text, quiz_type,
+            lambda: template.format(persona=PERSONA_TEACHER, language_rules=COMMON_LANGUAGE_RULES, text=text[:50000])
+        )
+
     @classmethod
     def build_quiz_prompt(cls, quiz_type: str, text: str, topics: list[str], priority_topics: list[str] | None, material_concepts: list[str] | None) -> str:
-        """Constrói o prompt final; MCQ e short_answer usam sequência fixa, open-ended usa lista priorizada."""
+        """Prefixo estável + pedido; MCQ e short_answer usam sequência fixa, open-ended usa lista priorizada."""
         material_concepts = material_concepts or []
         topic_concepts = cls._dedupe_list(material_concepts)
         uses_fixed_sequence = quiz_type in ("multiple-choice", "short_answer")
@@ -107,20 +124,12 @@ class PromptBuilder:
         else:
             vocab_instr = cls._build_vocab_instruction(material_concepts)
 
-        template = {
-            "multiple-choice": MULTIPLE_CHOICE_TEMPLATE,
-            "open-ended": OPEN_ENDED_TEMPLATE,
-            "short_answer": SHORT_ANSWER_TEMPLATE
-        }.get(quiz_type, MULTIPLE_CHOICE_TEMPLATE)
-
-        return template.format(
-            persona=PERSONA_TEACHER,
+        request = QUIZ_REQUEST_TEMPLATE.format(
             topic_instruction=topic_instr,
             priority_instruction=priority_instr,
-            vocab_instruction=vocab_instr,
-            language_rules=COMMON_LANGUAGE_RULES,
-            text=text[:50000]
+            vocab_instruction=vocab_instr
         )
+        return cls.build_quiz_prefix(quiz_type, text) + request
 
 
 class EvaluationPromptBuilder:
@@ -184,18 +193,23 @@ class EvaluationPromptBuilder:
 - 0–30: Incorreta, muito vaga ou não responde à pergunta."""
 
     @staticmethod
-    def _build_evaluation_context(text: str, question: str, user_answer: str) -> str:
-        """Contexto de avaliação com matéria, pergunta e resposta do aluno."""
+    def _build_evaluation_context(text: str) -> str:
+        """Contexto de avaliação com a matéria (a pergunta e a resposta vão no fim do prompt)."""
         return f"""CONTEXTO (Matéria):
-            {text[:30000]}...
+            {text[:30000]}..."""
 
-            PERGUNTA: "{question}"
-            RESPOSTA DO ALUNO: "{user_answer}"""
-    
     @classmethod
     def build(cls, text: str, question: str, user_answer: str, quiz_type: str = "open-ended") -> str:
-        """Monta o prompt de avaliação, adaptado ao tipo de quiz."""
-        context = cls._build_evaluation_context(text, question, user_answer)
+        """Monta o prompt de avaliação: prefixo estável por matéria e tipo, depois pergunta e resposta."""
+        prefix = get_prefix_cache().get_or_render(
+            "evaluation", text, quiz_type, lambda: cls.build_prefix(text, quiz_type)
+        )
+        return prefix + EVALUATION_REQUEST_TEMPLATE.format(question=question, user_answer=user_answer)
+
+    @classmethod
+    def build_prefix(cls, text: str, quiz_type: str = "open-ended") -> str:
+        """Parte estável do prompt de avaliação (não depende da pergunta nem da resposta)."""
+        context = cls._build_evaluation_context(text)
         json_format = cls._get_evaluation_json_format()
         scoring_rubric = cls._get_scoring_rubric(quiz_type)
 
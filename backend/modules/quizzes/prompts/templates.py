@@ -1,14 +1,14 @@
 from modules.quizzes.prompts_base import COMMON_LANGUAGE_RULES, PERSONA_TEACHER
 
-MULTIPLE_CHOICE_TEMPLATE = """
-{topic_instruction}
+# Layout: every prompt is a byte-stable prefix (persona, rules, template, material text)
+# followed by the per-request part, so provider-side prefix caching can reuse the prefix.
+# Bump PROMPT_VERSION whenever a prefix template changes: it is part of the rendered-prefix cache key.
+PROMPT_VERSION = "2"
 
+MULTIPLE_CHOICE_TEMPLATE = """
 {persona}. Cria um Quiz de escolha múltipla com enunciados curtos e diretos.
 NÍVEL: 5º ao 9º ano (11-15 anos).
 
-{priority_instruction}
-{vocab_instruction}
-
 OBJETIVO: APRENDER A BRINCAR
 O objetivo é ajudar o aluno a perceber os conceitos sem sentir que está num teste aborrecido.
 
@@ -69,14 +69,9 @@ TEXTO DE ESTUDO:
 """
 
 OPEN_ENDED_TEMPLATE = """
-{topic_instruction}
-
 {persona}. Cria um mini-teste de 5 perguntas de resposta aberta.
 NÍVEL: 5º ao 9º ano (11-15 anos).
 
-{priority_instruction}
-{vocab_instruction}
-
 REGRAS (TAXONOMIA DE BLOOM):
 Distribui as 5 perguntas assim:
 - 2 de COMPREENDER: "Explica por palavras tuas...", "O que significa...?"
@@ -125,14 +120,9 @@ TEXTO:
 """
 
 SHORT_ANSWER_TEMPLATE = """
-{topic_instruction}
-
 {persona}. Cria um mini-teste de RESPOSTA CURTA (FRASE SIMPLES).
 NÍVEL: 5º ao 9º ano (11-15 anos).
 
-{priority_instruction}
-{vocab_instruction}
-
 OBJETIVO: TREINO DE SINTAXE E FACTOS
 O objetivo deste nível (Intermédio) é garantir que o aluno sabe construir uma frase completa com Sujeito e Verbo. Não queremos ainda reflexões profundas.
 
@@ -190,8 +180,6 @@ EVALUATION_TEMPLATE = """
 {persona}.
 O teu objetivo é AJUDAR o aluno a aprender, não apenas avaliar.
 
-{context}
-
 RESUMO DA TAREFA:
 - Avalia a resposta e devolve apenas o JSON pedido.
 - Não inventes factos fora do texto.
@@ -221,4 +209,18 @@ CRITÉRIOS DE AVALIAÇÃO ESPECÍFICOS:
 {model_criteria}
 
 {json_format}
+
+{context}
+"""
+
+QUIZ_REQUEST_TEMPLATE = """
+PEDIDO DESTE QUIZ (segue as regras acima):
+{topic_instruction}
+{priority_instruction}
+{vocab_instruction}
+"""
+
+EVALUATION_REQUEST_TEMPLATE = """
+PERGUNTA: "{question}"
+RESPOSTA DO ALUNO: "{user_answer}"
 """
@@ -1,5 +1,9 @@
 from sqlalchemy.orm import Session
 from models import QuizResult, QuestionAnalytics, StudyMaterial
+from modules.analytics.ports import (
+    ConceptMasteryRepositoryPort, HourlyRollupRepositoryPort, ReviewScheduleRepositoryPort
+)
+from modules.analytics.repository import ConceptMasteryRepository, HourlyRollupRepository, ReviewScheduleRepository
 
 
 class QuizRepositoryBase:
@@ -8,6 +12,18 @@ class QuizRepositoryBase:
 
 
 class QuizResultPersistenceRepository(QuizRepositoryBase):
+    def __init__(
+        self,
+        db: Session,
+        mastery_repo: ConceptMasteryRepositoryPort | None = None,
+        rollup_repo: HourlyRollupRepositoryPort | None = None,
+        review_repo: ReviewScheduleRepositoryPort | None = None
+    ):
+        super().__init__(db)
+        self.mastery_repo = mastery_repo or ConceptMasteryRepository(db)
+        self.rollup_repo = rollup_repo or HourlyRollupRepository(db)
+        self.review_repo = review_repo or ReviewScheduleRepository(db)
+
     def record_quiz_result(
         self,
         student_id: int,
@@ -37,6 +53,7 @@ class QuizResultPersistenceRepository(QuizRepositoryBase):
             self.db.add(result)
             self.db.flush()
 
+            analytics_rows = []
             for item in analytics_data:
                 concept_name = item.get("topic") or "Geral"
                 concept_id = item.get("concept_id")
@@ -48,6 +65,13 @@ class QuizResultPersistenceRepository(QuizRepositoryBase):
                     is_correct=item.get("is_correct")
                 )
                 self.db.add(analytic)
+                analytics_rows.append(analytic)
+            self.db.flush()
+
+            # Same transaction: mastery never drifts from the raw history
+            self.mastery_repo.apply_answers(result, analytics_rows)
+            self.rollup_repo.apply_result(result, analytics_rows)
+            self.review_repo.apply_answers(result, analytics_rows)
 
             if material_id:
                 material = self.db.query(StudyMaterial).filter(StudyMaterial.id == material_id).first()
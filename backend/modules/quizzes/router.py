@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 import os
 from modules.quizzes.deps import (
     get_ai_service,
@@ -6,7 +7,9 @@ from modules.quizzes.deps import (
     get_evaluate_answer_use_case,
     get_save_quiz_result_use_case,
 )
+from modules.quizzes.pregeneration import QuizPregenerator, get_quiz_pregenerator
 from modules.quizzes.errors import QuizServiceError
+from modules.quizzes.streaming import sse_question_events
 from schemas.study import QuizRequest, EvaluationRequest, QuizResultCreate
 from dependencies import get_current_user, enforce_ai_quota
 from models import Student
@@ -25,6 +28,14 @@ AI_RATE_LIMIT = os.getenv("AI_RATE_LIMIT", "20/minute")
 def get_quiz_ai_service(payload: QuizRequest) -> QuizAIServicePort:
     return get_ai_service(payload.api_key)
 
+def note_quiz_key_source(
+    payload: QuizRequest,
+    current_user: Student = Depends(get_current_user),
+    pregenerator: QuizPregenerator = Depends(get_quiz_pregenerator)
+) -> None:
+    # Background pre-generation spends the server key: only for students who use it
+    pregenerator.note_key_source(current_user.id, own_key=bool(payload.api_key))
+
 
 def get_eval_ai_service(payload: EvaluationRequest) -> QuizAIServicePort:
     return get_ai_service(payload.api_key)
@@ -33,23 +44,46 @@ def get_eval_ai_service(payload: EvaluationRequest) -> QuizAIServicePort:
 # --- Endpoints ---
 @router.post("/generate-quiz")
 @limiter.limit(AI_RATE_LIMIT)
-def generate_quiz_endpoint(
+async def generate_quiz_endpoint(
     request: Request,
     payload: QuizRequest,
     current_user: Student = Depends(get_current_user),
     _quota: None = Depends(enforce_ai_quota),
+    _key_source: None = Depends(note_quiz_key_source),
     use_case: GenerateQuizUseCasePort = Depends(get_generate_quiz_use_case),
     ai_service: QuizAIServicePort = Depends(get_quiz_ai_service)
 ):
     try:
-        questions = use_case.execute(current_user.id, payload, ai_service)
+        questions = await use_case.execute_async(current_user.id, payload, ai_service)
     except QuizServiceError as e:
         raise HTTPException(status_code=e.status_code, detail=str(e))
     return {"questions": questions}
 
+@router.post("/generate-quiz/stream")
+@limiter.limit(AI_RATE_LIMIT)
+async def generate_quiz_stream_endpoint(
+    request: Request,
+    payload: QuizRequest,
+    current_user: Student = Depends(get_current_user),
+    _quota: None = Depends(enforce_ai_quota),
+    _key_source: None = Depends(note_quiz_key_source),
+    use_case: GenerateQuizUseCasePort = Depends(get_generate_quiz_use_case),
+    ai_service: QuizAIServicePort = Depends(get_quiz_ai_service)
+):
+    # Same body as /generate-quiz; questions arrive as `question` SSE events, then `done` or `error`
+    try:
+        questions = await use_case.execute_stream(current_user.id, payload, ai_service)
+    except QuizServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return StreamingResponse(
+        sse_question_events(questions),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/evaluate-answer")
 @limiter.limit(AI_RATE_LIMIT)
-def evaluate_answer_endpoint(
+async def evaluate_answer_endpoint(
     request: Request,
     payload: EvaluationRequest,
     current_user: Student = Depends(get_current_user),
@@ -58,7 +92,7 @@ def evaluate_answer_endpoint(
     ai_service: QuizAIServicePort = Depends(get_eval_ai_service)
 ):
     try:
-        return use_case.execute(current_user.id, payload, ai_service)
+        return await use_case.execute_async(current_user.id, payload, ai_service)
     except QuizServiceError as e:
         raise HTTPException(status_code=e.status_code, detail=str(e))
 
@@ -0,0 +1,98 @@
+import json
+from typing import AsyncIterator
+
+
+class QuestionStreamParser:
+    """
+    Incremental parser for `{"questions": [{...}, {...}]}` completions.
+
+    `feed` takes raw text deltas and returns every question object that became
+    complete with them, so a question can be sent before the rest is generated.
+    Objects that fail to decode are skipped; anything outside the root
+    "questions" array is ignored.
+    """
+
+    def __init__(self):
+        self._buffer: list[str] = []
+        self._object_chars: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_chars: list[str] = []
+        self._last_string = None
+        self._current_key = None
+        self._array_depth: int | None = None
+        self._done = False
+
+    def feed(self, delta: str) -> list[dict]:
+        questions = []
+        for char in delta:
+            if self._done:
+                break
+            in_object = self._array_depth is not None and self._depth > self._array_depth
+            if in_object:
+                self._object_chars.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = "".join(self._string_chars)
+                else:
+                    self._string_chars.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_chars = []
+            elif char == ":" and self._depth == 1:
+                self._current_key = self._last_string
+            elif char in "{[":
+                if self._array_depth is not None and self._depth == self._array_depth and char == "{":
+                    self._object_chars = [char]
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._current_key == "questions":
+                    self._array_depth = self._depth
+            elif char in "}]":
+                self._depth -= 1
+                if self._array_depth is not None:
+                    if self._depth == self._array_depth and char == "}":
+                        question = self._decode("".join(self._object_chars))
+                        if question is not None:
+                            questions.append(question)
+                        self._object_chars = []
+                    elif self._depth < self._array_depth:
+                        self._done = True
+        return questions
+
+    @staticmethod
+    def _decode(raw: str) -> dict | None:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def sse_question_events(questions: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """`question` event per question, then `done` (or `error` when generation fails)."""
+    count = 0
+    try:
+        async for question in questions:
+            count += 1
+            yield sse_event("question", question)
+    except Exception as e:
+        print(f"Error streaming quiz: {e}")
+        yield sse_event("error", {"detail": "Failed to generate quiz. Please try again."})
+        return
+    if count == 0:
+        yield sse_event("error", {"detail": "Failed to generate quiz. Please try again."})
+        return
+    yield sse_event("done", {"count": count})
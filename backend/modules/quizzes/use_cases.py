@@ -1,5 +1,9 @@
+import asyncio
+import inspect
+from dataclasses import dataclass
 from schemas.study import QuizRequest, EvaluationRequest, QuizResultCreate
-from typing import Any
+from typing import Any, AsyncIterator, Callable
+from modules.common.aio import call_service
 from modules.materials.mapper import MaterialMapper
 from modules.quizzes.recorder import QuizRecordError
 from modules.quizzes.policies import (
@@ -7,53 +11,88 @@ from modules.quizzes.policies import (
     QuestionPostProcessor,
     QuizPolicyError,
 )
+from modules.analytics.ports import AnalyticsCacheInvalidatorPort
 from modules.materials.ports import MaterialLoaderPort, TopicSelectorPort
 from modules.quizzes.ports import (
     QuizGeneratorPort,
     AnswerEvaluatorPort,
+    PregeneratedQuizPoolPort,
+    QuizPregenerationSchedulerPort,
     QuizResultRecorderPort,
     QuizStrategyFactoryPort,
 )
 from modules.quizzes.errors import QuizServiceError
 
 
+@dataclass
+class QuizGenerationPlan:
+    """Everything the LLM call needs, resolved from the DB and analytics beforehand."""
+    strategy: Any
+    text: str
+    target_topics: list[str] | None
+    priority_topics: list[str] | None
+    material_concepts: list[str]
+    # Set when a pre-generated quiz is served: no LLM call needed
+    questions: list[dict] | None = None
+
+
 class GenerateQuizUseCase:
     def __init__(
         self,
         material_repo: MaterialLoaderPort,
         topic_selector: TopicSelectorPort,
         strategy_factory: QuizStrategyFactoryPort,
-        analytics_service: Any = None # TODO: Port types
+        analytics_service: Any = None, # TODO: Port types
+        pregen_pool: PregeneratedQuizPoolPort | None = None
     ):
         self.material_repo = material_repo
         self.topic_selector = topic_selector
         self.strategy_factory = strategy_factory
         self.analytics_service = analytics_service
+        self.pregen_pool = pregen_pool
 
     @staticmethod
-    def _build_concept_sequence(analytics_service, user_id, material_id, allowed_set, allowed_list, builder, total):
+    def _build_concept_sequence(analytics_service, user_id, material_id, allowed_set, allowed_list, builder, total, snapshot=None):
         sequence = []
         if analytics_service:
-            sequence = getattr(analytics_service, builder)(user_id, material_id, allowed_set, total_questions=total)
+            sequence = getattr(analytics_service, builder)(
+                user_id, material_id, allowed_set, total_questions=total, snapshot=snapshot
+            )
         if not sequence and allowed_list:
             sequence = [allowed_list[i % len(allowed_list)] for i in range(total)]
         return sequence
 
     @staticmethod
-    def _questions_have_concepts(questions: list[dict] | None) -> bool:
+    def _question_has_concepts(question: Any) -> bool:
+        if not isinstance(question, dict):
+            return False
+        concepts = question.get("concepts")
+        if not isinstance(concepts, list):
+            return False
+        return any(isinstance(c, str) and c.strip() for c in concepts)
+
+    @classmethod
+    def _questions_have_concepts(cls, questions: list[dict] | None) -> bool:
         if not isinstance(questions, list) or not questions:
             return False
-        for question in questions:
-            if not isinstance(question, dict):
-                return False
-            concepts = question.get("concepts")
-            if not isinstance(concepts, list):
-                return False
-            if not any(isinstance(c, str) and c.strip() for c in concepts):
-                return False
-        return True
+        return all(cls._question_has_concepts(question) for question in questions)
 
-    def execute(self, user_id: int, request: QuizRequest, ai_service: QuizGeneratorPort) -> list[dict]:
+    def _pool_version(self, user_id: int, material) -> str | None:
+        """Version a pooled quiz must match: the analytics inputs plus the material XP (strategy choice)."""
+        if self.pregen_pool is None or self.analytics_service is None:
+            return None
+        version = self.analytics_service.get_data_version(user_id)
+        if version is None:
+            return None
+        return f"{version}-xp{material.total_xp or 0}"
+
+    def _prepare(
+        self,
+        user_id: int,
+        request: QuizRequest,
+        ai_service: QuizGeneratorPort,
+        use_pool: bool = True
+    ) -> QuizGenerationPlan:
         material = self.material_repo.load(user_id)
         if not material or not material.text:
             raise QuizServiceError("No material found. Upload a file first.")
@@ -64,11 +103,6 @@ class GenerateQuizUseCase:
         text = material.text
         material_id = material.id
 
-        target_topics, priority_topics = self.topic_selector.select(user_id, material_id, request.topics)
-        material_topics_data = MaterialMapper.topics_map(material)
-        allowed_concepts = ConceptWhitelistBuilder.build(material_topics_data, target_topics)
-        allowed_concepts_set = set(allowed_concepts)
-
         material_xp = material.total_xp
         try:
             strategy = self.strategy_factory.select_strategy(request.quiz_type, material_xp)
@@ -80,6 +114,7 @@ class GenerateQuizUseCase:
         is_short_answer = quiz_type == "short_answer"
         is_open_ended = quiz_type == "open-ended"
 
+        # Gates run before the snapshot: a locked request costs one GROUP BY, not a weak-points build.
         # Gate: short answer requires all concepts to have confident MCQ data
         if is_short_answer and self.analytics_service:
             readiness = self.analytics_service.check_short_answer_readiness(user_id, material_id)
@@ -104,6 +139,23 @@ class GenerateQuizUseCase:
                     status_code=403
                 )
 
+        # Pre-generated quizzes only cover the default request (no explicit topic selection)
+        if use_pool and self.pregen_pool is not None and not request.topics:
+            version = self._pool_version(user_id, material)
+            pooled = self.pregen_pool.take(user_id, material_id, quiz_type, version) if version else None
+            if pooled:
+                return QuizGenerationPlan(strategy, text, None, None, [], questions=pooled)
+
+        # One weak-points build per request, shared by topic selection and concept builders.
+        snapshot = self.analytics_service.build_snapshot(user_id, material_id) if self.analytics_service else None
+
+        target_topics, priority_topics = self.topic_selector.select(
+            user_id, material_id, request.topics, snapshot=snapshot
+        )
+        material_topics_data = MaterialMapper.topics_map(material)
+        allowed_concepts = ConceptWhitelistBuilder.build(material_topics_data, target_topics)
+        allowed_concepts_set = set(allowed_concepts)
+
         material_concepts: list[str] = allowed_concepts
         if is_multiple_choice or is_short_answer:
             # For fixed-sequence quizzes, only restrict concepts by the user's
@@ -115,31 +167,140 @@ class GenerateQuizUseCase:
             if is_multiple_choice:
                 material_concepts = self._build_concept_sequence(
                     self.analytics_service, user_id, material_id, quiz_concepts_set, quiz_concepts,
-                    builder="build_mcq_quiz_concepts", total=10
+                    builder="build_mcq_quiz_concepts", total=10, snapshot=snapshot
                 )
             else:
                 material_concepts = self._build_concept_sequence(
                     self.analytics_service, user_id, material_id, quiz_concepts_set, quiz_concepts,
-                    builder="build_short_quiz_concepts", total=8
+                    builder="build_short_quiz_concepts", total=8, snapshot=snapshot
                 )
         elif is_open_ended and self.analytics_service:
             concepts = self.analytics_service.build_open_quiz_concepts(
-                user_id, material_id, allowed_concepts_set, total_concepts=8
+                user_id, material_id, allowed_concepts_set, total_concepts=8, snapshot=snapshot
             )
             if concepts:
                 material_concepts = concepts
 
-        questions = ai_service.generate_quiz(strategy, text, target_topics, priority_topics, material_concepts)
-
-        if not self._questions_have_concepts(questions):
-            questions = ai_service.generate_quiz(strategy, text, target_topics, priority_topics, material_concepts)
+        return QuizGenerationPlan(strategy, text, target_topics, priority_topics, material_concepts)
 
+    def _finish(self, request: QuizRequest, questions: list[dict] | None) -> list[dict]:
         if not self._questions_have_concepts(questions):
             raise QuizServiceError("Failed to generate quiz. Please try again.", status_code=500)
 
         post_processor = QuestionPostProcessor(request.quiz_type)
         return post_processor.apply(questions)
 
+    def execute(self, user_id: int, request: QuizRequest, ai_service: QuizGeneratorPort) -> list[dict]:
+        plan = self._prepare(user_id, request, ai_service)
+        if plan.questions is not None:
+            return self._finish(request, plan.questions)
+        args = (plan.strategy, plan.text, plan.target_topics, plan.priority_topics, plan.material_concepts)
+
+        questions = ai_service.generate_quiz(*args)
+
+        if not self._questions_have_concepts(questions):
+            questions = ai_service.generate_quiz(*args)
+
+        return self._finish(request, questions)
+
+    async def execute_async(self, user_id: int, request: QuizRequest, ai_service: QuizGeneratorPort) -> list[dict]:
+        """
+        DB and analytics work runs in a worker thread (the session is sync);
+        the LLM calls are awaited so they don't hold a thread while waiting.
+        """
+        plan = await asyncio.to_thread(self._prepare, user_id, request, ai_service)
+        if plan.questions is not None:
+            return self._finish(request, plan.questions)
+        args = (plan.strategy, plan.text, plan.target_topics, plan.priority_topics, plan.material_concepts)
+
+        questions = await call_service(ai_service, "generate_quiz", *args)
+
+        if not self._questions_have_concepts(questions):
+            questions = await call_service(ai_service, "generate_quiz", *args)
+
+        return self._finish(request, questions)
+
+    async def execute_stream(
+        self, user_id: int, request: QuizRequest, ai_service: QuizGeneratorPort
+    ) -> AsyncIterator[dict]:
+        """
+        Validates and prepares up front (so errors surface before any event is
+        sent), then returns an iterator of post-processed questions in the
+        order the LLM completes them.
+        """
+        plan = await asyncio.to_thread(self._prepare, user_id, request, ai_service)
+        return self._stream_questions(request, plan, ai_service)
+
+    async def _stream_questions(
+        self, request: QuizRequest, plan: QuizGenerationPlan, ai_service: QuizGeneratorPort
+    ) -> AsyncIterator[dict]:
+        post_processor = QuestionPostProcessor(request.quiz_type)
+        if plan.questions is not None:
+            for question in post_processor.apply(plan.questions):
+                yield question
+            return
+
+        args = (plan.strategy, plan.text, plan.target_topics, plan.priority_topics, plan.material_concepts)
+        sent = 0
+        stream_quiz = getattr(ai_service, "stream_quiz", None)
+        if inspect.isasyncgenfunction(stream_quiz):
+            try:
+                async for question in stream_quiz(*args):
+                    # Questions without concepts can't be recorded against the mastery tables
+                    if self._question_has_concepts(question):
+                        sent += 1
+                        yield post_processor.apply([question])[0]
+            except Exception as e:
+                if sent:
+                    raise
+                print(f"Error streaming quiz, retrying without streaming: {e}")
+        if sent:
+            return
+
+        # Nothing usable streamed (or no streaming support): one full generation, sent per question
+        questions = await call_service(ai_service, "generate_quiz", *args)
+        if not self._questions_have_concepts(questions):
+            raise QuizServiceError("Failed to generate quiz. Please try again.", status_code=500)
+        for question in post_processor.apply(questions):
+            yield question
+
+    def pregenerate(
+        self, user_id: int, quiz_type: str, ai_service: QuizGeneratorPort,
+        quota_check: Callable[[], bool] | None = None
+    ) -> bool:
+        """
+        Generates the next default quiz of `quiz_type` into the pool; False when
+        the type is locked, the version is unknown, `quota_check()` (called right
+        before the LLM, charging nothing) refuses or generation fails.
+        """
+        if self.pregen_pool is None:
+            return False
+        material = self.material_repo.load(user_id)
+        if not material or not material.text:
+            return False
+        # Read before generating: a quiz saved meanwhile changes the version and the entry is never served
+        version = self._pool_version(user_id, material)
+        if version is None:
+            return False
+
+        request = QuizRequest(quiz_type=quiz_type)
+        try:
+            plan = self._prepare(user_id, request, ai_service, use_pool=False)
+        except QuizServiceError:
+            return False
+        if quota_check is not None and not quota_check():
+            return False
+        args = (plan.strategy, plan.text, plan.target_topics, plan.priority_topics, plan.material_concepts)
+
+        questions = ai_service.generate_quiz(*args)
+        if not self._questions_have_concepts(questions):
+            questions = ai_service.generate_quiz(*args)
+        if not self._questions_have_concepts(questions):
+            return False
+
+        self.pregen_pool.put(user_id, material.id, quiz_type, version, questions)
+        return True
+
 
 class EvaluateAnswerUseCase:
     def __init__(
@@ -150,7 +311,7 @@ class EvaluateAnswerUseCase:
         self.material_repo = material_repo
         self.strategy_factory = strategy_factory
 
-    def execute(self, user_id: int, request: EvaluationRequest, ai_service: AnswerEvaluatorPort) -> dict:
+    def _prepare(self, user_id: int, request: EvaluationRequest, ai_service: AnswerEvaluatorPort) -> tuple[Any, str]:
         material = self.material_repo.load(user_id)
         if not material or not material.text:
             raise QuizServiceError("No material found.")
@@ -158,19 +319,32 @@ class EvaluateAnswerUseCase:
         if not ai_service or not ai_service.is_available():
             raise QuizServiceError("API Key is required for evaluation.")
 
-        text = material.text
         strategy = self.strategy_factory.select_evaluation_strategy(request.quiz_type)
+        return strategy, material.text
+
+    def execute(self, user_id: int, request: EvaluationRequest, ai_service: AnswerEvaluatorPort) -> dict:
+        strategy, text = self._prepare(user_id, request, ai_service)
         return ai_service.evaluate_answer(strategy, text, request.question, request.user_answer)
 
+    async def execute_async(self, user_id: int, request: EvaluationRequest, ai_service: AnswerEvaluatorPort) -> dict:
+        strategy, text = await asyncio.to_thread(self._prepare, user_id, request, ai_service)
+        return await call_service(
+            ai_service, "evaluate_answer", strategy, text, request.question, request.user_answer
+        )
+
 
 class SaveQuizResultUseCase:
     def __init__(
         self,
         material_repo: MaterialLoaderPort,
-        recorder: QuizResultRecorderPort
+        recorder: QuizResultRecorderPort,
+        cache_invalidator: AnalyticsCacheInvalidatorPort | None = None,
+        pregenerator: QuizPregenerationSchedulerPort | None = None
     ):
         self.material_repo = material_repo
         self.recorder = recorder
+        self.cache_invalidator = cache_invalidator
+        self.pregenerator = pregenerator
 
     def execute(self, user_id: int, result: QuizResultCreate) -> None:
         material_id = result.study_material_id
@@ -198,3 +372,7 @@ class SaveQuizResultUseCase:
             )
         except QuizRecordError as e:
             raise QuizServiceError(str(e), status_code=e.status_code)
+        if self.cache_invalidator is not None:
+            self.cache_invalidator.invalidate_student(user_id)
+        if self.pregenerator is not None:
+            self.pregenerator.schedule(user_id)
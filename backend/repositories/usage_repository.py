@@ -9,6 +9,15 @@ class DailyUsageRepository:
     def __init__(self, db: Session):
         self.db = db
 
+    def get_count(self, student_id: int, day: date) -> int:
+        count = self.db.execute(
+            select(DailyUsage.count).where(
+                DailyUsage.student_id == student_id,
+                DailyUsage.day == day,
+            )
+        ).scalar_one_or_none()
+        return count or 0
+
     def increment_if_allowed(self, student_id: int, day: date, limit: int) -> tuple[bool, int]:
         usage = self.db.execute(
             select(DailyUsage).where(
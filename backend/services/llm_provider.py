@@ -1,10 +1,15 @@
-from modules.common.ports import LLMCallerPort
-from services.openai_client import OpenAIClientAdapter
-from services.openai_caller import OpenAICaller
+from modules.common.ports import AsyncLLMCallerPort, LLMCallerPort
+from services.openai_caller import AsyncOpenAICaller, OpenAICaller
+from services.openai_client_registry import get_client_registry
 
 
 def build_openai_caller(api_key: str | None) -> LLMCallerPort:
     if not api_key:
         return OpenAICaller(None)
-    client = OpenAIClientAdapter(api_key=api_key)
-    return OpenAICaller(client)
+    return OpenAICaller(get_client_registry().sync_client(api_key))
+
+
+def build_async_openai_caller(api_key: str | None) -> AsyncLLMCallerPort:
+    if not api_key:
+        return AsyncOpenAICaller(None)
+    return AsyncOpenAICaller(get_client_registry().async_client(api_key))
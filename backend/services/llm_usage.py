@@ -0,0 +1,54 @@
+import threading
+from typing import Any
+
+
+class LLMUsageStats:
+    """
+    Per-model token counters read from the API `usage` field.
+
+    `cached_tokens` (usage.prompt_tokens_details.cached_tokens) is the part of
+    the prompt served from the provider's prefix cache; its ratio to
+    `prompt_tokens` shows whether the prompt layout keeps prefixes stable.
+    """
+
+    def __init__(self):
+        self._models: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, usage: Any) -> None:
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+        if not isinstance(prompt_tokens, int) or not isinstance(cached_tokens, int):
+            return
+        with self._lock:
+            counters = self._models.setdefault(model, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+            counters["calls"] += 1
+            counters["prompt_tokens"] += prompt_tokens
+            counters["cached_tokens"] += cached_tokens
+
+    def reset(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                model: {
+                    **counters,
+                    "cached_ratio": (
+                        round(counters["cached_tokens"] / counters["prompt_tokens"], 4)
+                        if counters["prompt_tokens"] else None
+                    ),
+                }
+                for model, counters in self._models.items()
+            }
+
+
+_usage_stats = LLMUsageStats()
+
+
+def get_usage_stats() -> LLMUsageStats:
+    return _usage_stats
@@ -1,4 +1,52 @@
-from modules.common.ports import OpenAIClientPort, LLMCallerPort
+from typing import AsyncIterator
+from modules.common.ports import AsyncLLMCallerPort, AsyncOpenAIClientPort, OpenAIClientPort, LLMCallerPort
+from services.llm_usage import get_usage_stats
+
+
+def build_completion_kwargs(
+    prompt: str,
+    system_message: str,
+    model: str,
+    temperature: float = 0.7,
+    seed: int | None = None,
+    reasoning_effort: str | None = None
+) -> dict:
+    kwargs = {
+        "model": model,
+        "response_format": {"type": "json_object"},
+    }
+    
+    # O1 models (aka gpt-5 or reasoning models) typically don't support system roles or temperature in standard ways
+    # This check isolates that logic branch.
+    is_reasoning_model = model.startswith("gpt-5") or model.startswith("o1")
+
+    if is_reasoning_model:
+        # Reasoning models use 'developer' role or sometimes just user messages, 
+        # and 'reasoning_effort' instead of temperature/max_tokens sometimes.
+        # We stick to simple user message for now as per previous logic.
+        messages = [{"role": "user", "content": prompt}]
+        if system_message:
+            messages.insert(0, {"role": "system", "content": system_message})
+        
+        kwargs["messages"] = messages
+        kwargs["reasoning_effort"] = reasoning_effort or "none"
+        if seed is not None:
+            kwargs["seed"] = seed
+            
+        # Temperature is not supported for reasoning_effort != none usually
+        if kwargs["reasoning_effort"] == "none" and temperature is not None:
+             kwargs["temperature"] = temperature
+
+    else:
+        # Standard GPT-4 models
+        kwargs["messages"] = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt},
+        ]
+        kwargs["temperature"] = temperature
+        if seed is not None:
+            kwargs["seed"] = seed
+    return kwargs
 
 
 class OpenAICaller(LLMCallerPort):
@@ -17,44 +65,10 @@ class OpenAICaller(LLMCallerPort):
         if not self.client:
             return None
 
-        kwargs = {
-            "model": model,
-            "response_format": {"type": "json_object"},
-        }
-        
-        # O1 models (aka gpt-5 or reasoning models) typically don't support system roles or temperature in standard ways
-        # This check isolates that logic branch.
-        is_reasoning_model = model.startswith("gpt-5") or model.startswith("o1")
-
-        if is_reasoning_model:
-            # Reasoning models use 'developer' role or sometimes just user messages, 
-            # and 'reasoning_effort' instead of temperature/max_tokens sometimes.
-            # We stick to simple user message for now as per previous logic.
-            messages = [{"role": "user", "content": prompt}]
-            if system_message:
-                messages.insert(0, {"role": "system", "content": system_message})
-            
-            kwargs["messages"] = messages
-            kwargs["reasoning_effort"] = reasoning_effort or "none"
-            if seed is not None:
-                kwargs["seed"] = seed
-                
-            # Temperature is not supported for reasoning_effort != none usually
-            if kwargs["reasoning_effort"] == "none" and temperature is not None:
-                 kwargs["temperature"] = temperature
-
-        else:
-            # Standard GPT-4 models
-            kwargs["messages"] = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt},
-            ]
-            kwargs["temperature"] = temperature
-            if seed is not None:
-                kwargs["seed"] = seed
-
+        kwargs = build_completion_kwargs(prompt, system_message, model, temperature, seed, reasoning_effort)
         try:
             response = self.client.chat_completions_create(**kwargs)
+            get_usage_stats().record(model, getattr(response, "usage", None))
             return response.choices[0].message.content
         except Exception as e:
             # In a real system, use a logger, not print
@@ -63,3 +77,60 @@ class OpenAICaller(LLMCallerPort):
 
     def is_available(self) -> bool:
         return self.client is not None
+
+
+class AsyncOpenAICaller(AsyncLLMCallerPort):
+    """Same request as OpenAICaller, awaited on the event loop instead of blocking a worker thread."""
+
+    def __init__(self, client: AsyncOpenAIClientPort | None):
+        self.client = client
+
+    async def call(
+        self,
+        prompt: str,
+        system_message: str,
+        model: str,
+        temperature: float = 0.7,
+        seed: int | None = None,
+        reasoning_effort: str | None = None
+    ) -> str | None:
+        if not self.client:
+            return None
+
+        kwargs = build_completion_kwargs(prompt, system_message, model, temperature, seed, reasoning_effort)
+        try:
+            response = await self.client.chat_completions_create(**kwargs)
+            get_usage_stats().record(model, getattr(response, "usage", None))
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"OpenAI API Error ({model}): {e}")
+            return None
+
+    async def stream(
+        self,
+        prompt: str,
+        system_message: str,
+        model: str,
+        temperature: float = 0.7,
+        seed: int | None = None,
+        reasoning_effort: str | None = None
+    ) -> AsyncIterator[str]:
+        """Yields content deltas as they arrive; errors propagate to the consumer."""
+        if not self.client:
+            return
+
+        kwargs = build_completion_kwargs(prompt, system_message, model, temperature, seed, reasoning_effort)
+        kwargs["stream"] = True
+        # The final chunk then carries usage (with cached prompt tokens) and no choices
+        kwargs["stream_options"] = {"include_usage": True}
+        response = await self.client.chat_completions_create(**kwargs)
+        async for chunk in response:
+            if not chunk.choices:
+                get_usage_stats().record(model, getattr(chunk, "usage", None))
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    def is_available(self) -> bool:
+        return self.client is not None
@@ -1,10 +1,24 @@
-from openai import OpenAI
-from modules.common.ports import OpenAIClientPort
+from openai import AsyncOpenAI, OpenAI
+from modules.common.ports import AsyncOpenAIClientPort, OpenAIClientPort
 
 
 class OpenAIClientAdapter(OpenAIClientPort):
-    def __init__(self, api_key: str):
-        self._client = OpenAI(api_key=api_key)
+    def __init__(self, api_key: str | None = None, client: OpenAI | None = None):
+        self._client = client or OpenAI(api_key=api_key)
 
     def chat_completions_create(self, **kwargs):
         return self._client.chat.completions.create(**kwargs)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class AsyncOpenAIClientAdapter(AsyncOpenAIClientPort):
+    def __init__(self, api_key: str | None = None, client: AsyncOpenAI | None = None):
+        self._client = client or AsyncOpenAI(api_key=api_key)
+
+    async def chat_completions_create(self, **kwargs):
+        return await self._client.chat.completions.create(**kwargs)
+
+    async def aclose(self) -> None:
+        await self._client.close()
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from services.openai_client import AsyncOpenAIClientAdapter, OpenAIClientAdapter
+
+# Keep-alive pool per API key; the OpenAI client reuses these connections across requests
+_CONNECTION_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0)
+# Evicted clients may still be serving a request: close them only after the OpenAI default timeout
+_CLOSE_GRACE_SECONDS = 600.0
+
+
+def _hash_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def _default_sync_factory(api_key: str) -> OpenAIClientAdapter:
+    return OpenAIClientAdapter(client=OpenAI(api_key=api_key, http_client=DefaultHttpxClient(limits=_CONNECTION_LIMITS)))
+
+
+def _default_async_factory(api_key: str) -> AsyncOpenAIClientAdapter:
+    return AsyncOpenAIClientAdapter(
+        client=AsyncOpenAI(api_key=api_key, http_client=DefaultAsyncHttpxClient(limits=_CONNECTION_LIMITS))
+    )
+
+
+class _ClientEntry:
+    __slots__ = ("sync_client", "async_client")
+
+    def __init__(self):
+        self.sync_client: Any = None
+        self.async_client: Any = None
+
+
+class OpenAIClientRegistry:
+    """
+    Process-wide OpenAI clients, one pair (sync + async) per API key.
+
+    Entries are keyed by a SHA-256 of the key and bounded with LRU eviction so
+    bring-your-own keys can't grow the registry without limit. Evicted clients
+    are closed after a grace period: async clients on the running event loop,
+    or by the next call made from one; `aclose` closes everything on shutdown.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 64,
+        sync_factory: Callable[[str], Any] = _default_sync_factory,
+        async_factory: Callable[[str], Any] = _default_async_factory,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max(1, max_entries)
+        self._sync_factory = sync_factory
+        self._async_factory = async_factory
+        self._clock = clock
+        self._entries: OrderedDict[str, _ClientEntry] = OrderedDict()
+        self._retired: list[tuple[float, _ClientEntry]] = []
+        self._pending_async_close: list[Any] = []
+        self._closing: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def sync_client(self, api_key: str) -> Any:
+        return self._client(api_key, "sync_client", self._sync_factory)
+
+    def async_client(self, api_key: str) -> Any:
+        return self._client(api_key, "async_client", self._async_factory)
+
+    def _client(self, api_key: str, slot: str, factory: Callable[[str], Any]) -> Any:
+        key = _hash_key(api_key)
+        with self._lock:
+            self._close_expired_retired()
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _ClientEntry()
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            client = getattr(entry, slot)
+            if client is not None:
+                self.hits += 1
+                return client
+            self.misses += 1
+            # Built under the lock: client construction is cheap (no connection is opened yet)
+            client = factory(api_key)
+            setattr(entry, slot, client)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._retired.append((self._clock(), evicted))
+                self.evictions += 1
+            return client
+
+    def _close_expired_retired(self) -> None:
+        now = self._clock()
+        still_retired = []
+        for retired_at, entry in self._retired:
+            if now - retired_at < _CLOSE_GRACE_SECONDS:
+                still_retired.append((retired_at, entry))
+                continue
+            self._close_sync(entry)
+            if entry.async_client is not None:
+                self._pending_async_close.append(entry.async_client)
+            entry.async_client = None
+        self._retired = still_retired
+        self._schedule_async_closes()
+
+    def _schedule_async_closes(self) -> None:
+        if not self._pending_async_close:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Called from a worker thread: left for the next call made on the event loop
+            return
+        for client in self._pending_async_close:
+            task = loop.create_task(self._aclose_async(client))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        self._pending_async_close = []
+
+    @staticmethod
+    def _close_sync(entry: _ClientEntry) -> None:
+        if entry.sync_client is not None and hasattr(entry.sync_client, "close"):
+            try:
+                entry.sync_client.close()
+            except Exception as e:
+                print(f"Error closing OpenAI client: {e}")
+        entry.sync_client = None
+
+    @staticmethod
+    async def _aclose_async(client: Any) -> None:
+        if not hasattr(client, "aclose"):
+            return
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"Error closing async OpenAI client: {e}")
+
+    async def aclose(self) -> None:
+        """Closes every client, live or retired; called on app shutdown."""
+        with self._lock:
+            entries = list(self._entries.values()) + [entry for _, entry in self._retired]
+            async_clients = self._pending_async_close
+            closing = list(self._closing)
+            self._entries.clear()
+            self._retired = []
+            self._pending_async_close = []
+        for entry in entries:
+            self._close_sync(entry)
+            if entry.async_client is not None:
+                async_clients.append(entry.async_client)
+            entry.async_client = None
+        for client in async_clients:
+            await self._aclose_async(client)
+        if closing:
+            await asyncio.gather(*closing, return_exceptions=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "retired": len(self._retired),
+                "pending_async_close": len(self._pending_async_close),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_client_registry: OpenAIClientRegistry | None = None
+
+
+def get_client_registry() -> OpenAIClientRegistry:
+    """Process-wide registry; OPENAI_CLIENT_POOL_SIZE bounds the number of distinct keys kept."""
+    global _client_registry
+    if _client_registry is None:
+        _client_registry = OpenAIClientRegistry(max_entries=int(os.getenv("OPENAI_CLIENT_POOL_SIZE", "64") or 1))
+    return _client_registry
@@ -13,15 +13,18 @@ class UsageService:
     def __init__(self, repo: DailyUsageRepository):
         self.repo = repo
 
+    @staticmethod
+    def _limit() -> int:
+        try:
+            return int(os.getenv("DAILY_AI_CALL_LIMIT", "50"))
+        except ValueError:
+            return 50
+
     def check_and_increment(self, student_id: int) -> int:
         if os.getenv("TEST_MODE") == "true":
             return -1
 
-        try:
-            limit = int(os.getenv("DAILY_AI_CALL_LIMIT", "50"))
-        except ValueError:
-            limit = 50
-
+        limit = self._limit()
         if limit <= 0:
             raise UsageLimitReached(limit)
 
@@ -29,3 +32,10 @@ class UsageService:
         if not allowed:
             raise UsageLimitReached(limit)
         return limit - count
+
+    def has_remaining(self, student_id: int) -> bool:
+        """Read-only quota check, for work that is charged later (pre-generated quizzes, when served)."""
+        if os.getenv("TEST_MODE") == "true":
+            return True
+        limit = self._limit()
+        return limit > 0 and self.repo.get_count(student_id, date.today()) < limit
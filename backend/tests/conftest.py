@@ -16,6 +16,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 from database import Base, get_db
 from main import app
 import models # Register tables for Base.metadata.create_all
+from modules.analytics.cache import get_analytics_cache
 
 # Disable invite code for tests
 if "INVITE_CODE" in os.environ:
@@ -102,6 +103,8 @@ def init_db():
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    # Ids restart with every fresh DB, so cached results could match the next test's versions
+    get_analytics_cache().clear()
 
 @pytest.fixture
 def auth_headers(client):
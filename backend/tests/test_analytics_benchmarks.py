@@ -0,0 +1,46 @@
+import json
+from datetime import datetime
+from sqlalchemy import select
+from models import QuestionAnalytics, QuizResult
+from benchmarks.analytics_bench import compare, generate_history, main
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+
+def _history(db_session, seed):
+    generate_history(db_session, seed, answers=95, now=NOW)
+    answers = db_session.execute(
+        select(QuestionAnalytics.concept_id, QuestionAnalytics.topic, QuestionAnalytics.is_correct)
+        .order_by(QuestionAnalytics.id)
+    ).all()
+    quizzes = db_session.execute(select(QuizResult.quiz_type, QuizResult.created_at).order_by(QuizResult.id)).all()
+    return answers, quizzes
+
+
+def test_generator_is_reproducible_from_seed(db_session):
+    answers, quizzes = _history(db_session, seed=7)
+    assert len(answers) == 95
+    assert len(quizzes) == 10
+
+    db_session.query(QuestionAnalytics).delete()
+    db_session.query(QuizResult).delete()
+    for table in ("concepts", "topics", "study_materials", "students"):
+        db_session.execute(QuestionAnalytics.metadata.tables[table].delete())
+    db_session.commit()
+
+    assert _history(db_session, seed=7) == (answers, quizzes)
+
+
+def test_suite_writes_results_and_flags_regressions(tmp_path):
+    output = tmp_path / "bench.json"
+    assert main(["--sizes", "200", "--repeat", "1", "--db-dir", str(tmp_path), "--output", str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    names = {r["benchmark"] for r in report["results"]}
+    assert {"service.get_weak_points[mastery]", "service.get_learning_trend[warm]",
+            "service.build_open_quiz_concepts"} <= names
+    assert all(r["size"] == 200 and r["median_ms"] >= 0 for r in report["results"])
+
+    slower = [{**r, "median_ms": r["median_ms"] * 2 + 1} for r in report["results"]]
+    assert compare(slower, report, tolerance=0.25)
+    assert compare(report["results"], report, tolerance=0.25) == []
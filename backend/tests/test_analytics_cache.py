@@ -0,0 +1,81 @@
+from unittest.mock import Mock
+from modules.analytics.cache import AnalyticsResultCache
+from modules.analytics.service import AnalyticsService
+from modules.quizzes.use_cases import SaveQuizResultUseCase
+from schemas.study import QuizResultCreate
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_evicts_least_recently_used_and_expires_entries():
+    clock = _Clock()
+    cache = AnalyticsResultCache(max_entries=2, ttl_seconds=10, clock=clock)
+
+    cache.get_or_compute((1, "a"), lambda: "A")
+    cache.get_or_compute((1, "b"), lambda: "B")
+    assert cache.get_or_compute((1, "a"), lambda: "stale") == "A"  # refreshes "a"
+    cache.get_or_compute((2, "c"), lambda: "C")  # evicts "b"
+    assert cache.get_or_compute((1, "b"), lambda: "B2") == "B2"
+
+    clock.now = 11
+    assert cache.get_or_compute((1, "b"), lambda: "B3") == "B3"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 5, 2)
+
+
+def test_invalidate_student_drops_only_that_student():
+    cache = AnalyticsResultCache()
+    cache.get_or_compute((1, "v1", "weak-points"), lambda: "one")
+    cache.get_or_compute((2, "v1", "weak-points"), lambda: "two")
+
+    cache.invalidate_student(1)
+
+    assert cache.get_or_compute((1, "v1", "weak-points"), lambda: "fresh") == "fresh"
+    assert cache.get_or_compute((2, "v1", "weak-points"), lambda: "other") == "two"
+
+
+def test_service_serves_repeated_reads_until_data_version_changes():
+    analytics_repo, material_repo = Mock(), Mock()
+    analytics_repo.fetch_data_version.return_value = "q1"
+    analytics_repo.fetch_question_analytics.return_value = []
+    material_repo.get_concept_pairs_for_student.return_value = [("Math", "Math")]
+    service = AnalyticsService(analytics_repo, material_repo, cache=AnalyticsResultCache())
+
+    first = service.get_weak_points(1)
+    assert service.get_weak_points(1) is first
+    assert analytics_repo.fetch_question_analytics.call_count == 1
+
+    analytics_repo.fetch_data_version.return_value = "q2"
+    service.get_weak_points(1)
+    assert analytics_repo.fetch_question_analytics.call_count == 2
+
+
+def test_save_quiz_result_invalidates_student_cache():
+    invalidator = Mock()
+    material_repo = Mock()
+    material_repo.load.return_value = None
+    use_case = SaveQuizResultUseCase(material_repo, Mock(), invalidator)
+
+    use_case.execute(7, QuizResultCreate(
+        score=1,
+        total_questions=1,
+        quiz_type="multiple-choice",
+        detailed_results=[{"topic": "Math", "is_correct": True}],
+    ))
+
+    invalidator.invalidate_student.assert_called_once_with(7)
+
+
+def test_cache_stats_are_not_exposed_to_students(client):
+    # Process-wide ops counters; there is no admin role to gate them behind
+    register = client.post("/register", json={"name": "CacheStatsUser", "password": "StrongPass1!"})
+    headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+
+    assert client.get("/analytics/cache-stats", headers=headers).status_code == 404
@@ -0,0 +1,52 @@
+import random
+from datetime import datetime, timedelta, timezone
+import pytest
+from modules.analytics.calculator import AnalyticsCalculator
+from modules.analytics.records import as_records
+
+pytest.importorskip("numpy")
+from modules.analytics.columnar import COLUMNAR_MIN_ROWS, build_results_columnar  # noqa: E402
+
+
+CONCEPT_PAIRS = [("Biologia", "Célula"), ("Biologia", "DNA"), ("Química", "Átomo"), ("Química", "Ião")]
+
+
+def _random_items(rng: random.Random, n: int) -> list[dict]:
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    items = []
+    for _ in range(n):
+        named = rng.random() < 0.6
+        topic, concept = rng.choice(CONCEPT_PAIRS)
+        created_at = base + timedelta(minutes=rng.randint(0, 50)) # plenty of ties
+        items.append({
+            "is_correct": rng.random() < 0.6,
+            "concept_id": rng.randint(1, 4) if named else None,
+            "raw_concept": rng.choice([concept, concept.lower(), "Órfão", None, ""]),
+            "concept_name": concept if named else None,
+            "topic_name": topic if named else None,
+            "created_at": rng.choice([created_at, created_at.isoformat(), None, "invalid"]),
+            "quiz_type": rng.choice(["multiple-choice", "short_answer", "open-ended", None, "legacy"]),
+        })
+    return items
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_columnar_engine_matches_row_engine(seed):
+    rng = random.Random(seed)
+    records = as_records(_random_items(rng, rng.randint(0, 400)))
+
+    expected = AnalyticsCalculator._build_results_rows(CONCEPT_PAIRS, records)
+
+    assert build_results_columnar(CONCEPT_PAIRS, records) == expected
+
+
+def test_build_results_switches_to_columnar_for_large_histories(monkeypatch):
+    items = _random_items(random.Random(42), COLUMNAR_MIN_ROWS)
+    expected = AnalyticsCalculator._build_results_rows(CONCEPT_PAIRS, as_records(items))
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("row engine should not run")
+
+    monkeypatch.setattr(AnalyticsCalculator, "_build_results_rows", staticmethod(_fail))
+
+    assert AnalyticsCalculator.build_results(CONCEPT_PAIRS, iter(items)) == expected
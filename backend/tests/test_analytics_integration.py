@@ -293,3 +293,144 @@ def test_get_metrics_endpoint_returns_daily_counts(client, db_session):
 
     assert payload["totals"]["tests_total"] == 2
     assert payload["totals"]["active_seconds"] == 1600
+
+
+def test_daily_session_totals_bucket_by_local_day_in_sql(db_session):
+    from models import QuizResult, Student
+    from modules.analytics.repository import AnalyticsRepository
+
+    student = Student(name="TzMetricsUser", hashed_password="x")
+    db_session.add(student)
+    db_session.commit()
+
+    late_utc = datetime(2024, 3, 10, 23, 30)
+    db_session.add_all([
+        QuizResult(student_id=student.id, score=1, total_questions=1, quiz_type="multiple-choice",
+                   duration_seconds=100, active_seconds=90, created_at=late_utc),
+        QuizResult(student_id=student.id, score=1, total_questions=1, quiz_type="multiple-choice",
+                   duration_seconds=50, active_seconds=-5, created_at=late_utc - timedelta(hours=2)),
+        QuizResult(student_id=student.id, score=1, total_questions=1, quiz_type=None,
+                   duration_seconds=10, active_seconds=10, created_at=late_utc - timedelta(hours=1)),
+    ])
+    db_session.commit()
+
+    repo = AnalyticsRepository(db_session)
+    start = datetime(2024, 3, 9, tzinfo=timezone.utc)
+    end = datetime(2024, 3, 13, tzinfo=timezone.utc)
+
+    utc_rows = {(r["day"], r["quiz_type"]): r for r in repo.fetch_daily_session_totals(student.id, start, end, 0)}
+    assert utc_rows[(late_utc.date(), "multiple-choice")]["tests"] == 2
+    assert utc_rows[(late_utc.date(), "multiple-choice")]["active_seconds"] == 90
+    assert utc_rows[(late_utc.date(), None)]["duration_seconds"] == 10
+
+    # UTC+1: the 23:30 session moves to the next local day
+    shifted = {(r["day"], r["quiz_type"]): r["tests"] for r in repo.fetch_daily_session_totals(student.id, start, end, 60)}
+    assert shifted[(late_utc.date() + timedelta(days=1), "multiple-choice")] == 1
+    assert shifted[(late_utc.date(), "multiple-choice")] == 1
+
+
+def test_analytics_endpoints_answer_304_until_data_changes(client, monkeypatch):
+    from modules.analytics.calculator import AnalyticsCalculator
+    from modules.analytics.service import AnalyticsService
+
+    register_response = client.post("/register", json={"name": "EtagUser", "password": "StrongPass1!"})
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    urls = ["/analytics/weak-points", "/analytics/metrics?days=7", "/analytics/learning-trend?days=7"]
+
+    etags = {}
+    for url in urls:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        etags[url] = response.headers["etag"]
+    assert len(set(etags.values())) == len(urls)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("analytics recomputed for a fresh ETag")
+
+    monkeypatch.setattr(AnalyticsCalculator, "build_results_from_mastery", staticmethod(_fail))
+    monkeypatch.setattr(AnalyticsService, "get_recent_metrics", _fail)
+    monkeypatch.setattr(AnalyticsService, "get_learning_trend", _fail)
+    for url in urls:
+        response = client.get(url, headers={**headers, "If-None-Match": f"W/{etags[url]}"})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etags[url]
+        assert response.content == b""
+    monkeypatch.undo()
+
+    client.post("/quiz/result", json={
+        "score": 1,
+        "total_questions": 1,
+        "quiz_type": "multiple-choice",
+        "xp_earned": 10,
+        "detailed_results": [{"topic": "Math", "is_correct": True}]
+    }, headers=headers)
+
+    response = client.get(urls[0], headers={**headers, "If-None-Match": etags[urls[0]]})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etags[urls[0]]
+
+
+def test_dashboard_combines_sections_in_one_response(client):
+    register_response = client.post("/register", json={"name": "DashboardUser", "password": "StrongPass1!"})
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    client.post("/quiz/result", json={
+        "score": 1,
+        "total_questions": 2,
+        "quiz_type": "multiple-choice",
+        "xp_earned": 10,
+        "detailed_results": [{"topic": "Math", "is_correct": True}, {"topic": "Math", "is_correct": False}]
+    }, headers=headers)
+
+    dashboard = client.get("/analytics/dashboard?days=7&tz_offset_minutes=60", headers=headers)
+    assert dashboard.status_code == 200
+    payload = dashboard.json()
+    assert payload == {
+        "weak_points": client.get("/analytics/weak-points", headers=headers).json(),
+        "metrics": client.get("/analytics/metrics?days=7&tz_offset_minutes=60", headers=headers).json(),
+        "learning_trend": client.get(
+            "/analytics/learning-trend?days=7&tz_offset_minutes=60", headers=headers
+        ).json(),
+    }
+
+    partial = client.get("/analytics/dashboard?sections=metrics,learning_trend&days=7", headers=headers)
+    assert set(partial.json()) == {"metrics", "learning_trend"}
+    assert partial.headers["etag"] != dashboard.headers["etag"]
+
+    assert client.get("/analytics/dashboard?sections=grades", headers=headers).status_code == 400
+
+
+def test_export_streams_answer_history_as_ndjson_and_csv(client, db_session, monkeypatch):
+    import csv
+    import io
+    import json
+    from modules.analytics import export
+
+    register_response = client.post("/register", json={"name": "ExportUser", "password": "StrongPass1!"})
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    for correct in (True, False):
+        client.post("/quiz/result", json={
+            "score": int(correct),
+            "total_questions": 2,
+            "quiz_type": "short_answer",
+            "xp_earned": 0,
+            "detailed_results": [{"topic": "Math", "is_correct": correct}, {"topic": "Física, \"quântica\"", "is_correct": True}]
+        }, headers=headers)
+    # Tiny chunks: the body arrives in several pieces
+    monkeypatch.setattr(export, "_CHUNK_BYTES", 1)
+
+    response = client.get("/analytics/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r["raw_concept"], r["is_correct"]) for r in rows] == [
+        ("Math", True), ("Física, \"quântica\"", True), ("Math", False), ("Física, \"quântica\"", True)
+    ]
+    assert set(rows[0]) == set(export.EXPORT_COLUMNS)
+
+    response = client.get("/analytics/export?format=csv", headers=headers)
+    assert response.headers["content-disposition"].endswith('.csv"')
+    parsed = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["raw_concept"] for r in parsed] == [r["raw_concept"] for r in rows]
+    assert parsed[2]["is_correct"] == "False"
+
+    assert client.get("/analytics/export?format=xml", headers=headers).status_code == 400
@@ -0,0 +1,111 @@
+import json
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+from benchmarks.analytics_bench import generate_history
+from migrations import run_migrations
+from models import (
+    ConceptMasteryStatus, ConceptReviewStatus, HourlyActivityRollupStatus, LearningTrendCheckpoint, QuizResult
+)
+from modules.analytics import rebuild
+from modules.analytics.rebuild import recompute_student, run_recompute, shard_students
+
+
+def _built(db, model) -> set[int]:
+    return {row[0] for row in db.query(model.student_id).all()}
+
+
+def test_shards_are_stable_id_ranges():
+    assert shard_students([5, 1, 2, 450, 2], 200) == {0: [1, 2, 5], 2: [450]}
+
+
+def test_recompute_rebuilds_every_table_and_resumes_from_checkpoint(db_session, tmp_path):
+    generate_history(db_session, seed=3, answers=40, students=3)
+    sessions = sessionmaker(bind=db_session.get_bind(), autoflush=False)
+    checkpoint = tmp_path / "rebuild.json"
+    logs = []
+
+    summary = run_recompute(
+        [1, 2, 3], session_factory=sessions, shard_size=2,
+        checkpoint_path=str(checkpoint), trend_offsets=[0, 60], log=logs.append
+    )
+
+    assert summary["students"] == 3 and summary["failed_students"] == []
+    for model in (ConceptMasteryStatus, HourlyActivityRollupStatus, ConceptReviewStatus):
+        assert _built(db_session, model) == {1, 2, 3}
+    offsets = db_session.query(LearningTrendCheckpoint.tz_offset_minutes).filter(
+        LearningTrendCheckpoint.student_id == 1
+    ).all()
+    assert sorted(row[0] for row in offsets) == [0, 60]
+    assert json.loads(checkpoint.read_text())["completed_shards"] == [0, 1]
+    assert logs[-1].startswith("[2/2 shards] 3/3 students")
+
+    # Interrupted run: only the shard missing from the checkpoint is redone
+    checkpoint.write_text(json.dumps({"shard_size": 2, "completed_shards": [1], "failed_students": []}))
+    summary = run_recompute(
+        [1, 2, 3], session_factory=sessions, shard_size=2,
+        checkpoint_path=str(checkpoint), log=logs.append
+    )
+    assert summary["students"] == 1
+    assert any(line.startswith("Resuming: 1/2") for line in logs)
+
+
+def test_resume_retries_the_students_that_failed(db_session, tmp_path, monkeypatch):
+    generate_history(db_session, seed=4, answers=20, students=3)
+    sessions = sessionmaker(bind=db_session.get_bind(), autoflush=False)
+    checkpoint = tmp_path / "rebuild.json"
+    recompute_student = rebuild.recompute_student
+
+    def _fail_student_2(db, student_id, trend_offsets):
+        if student_id == 2:
+            raise RuntimeError("boom")
+        recompute_student(db, student_id, trend_offsets)
+
+    monkeypatch.setattr(rebuild, "recompute_student", _fail_student_2)
+    summary = run_recompute([1, 2, 3], session_factory=sessions, shard_size=2,
+                            checkpoint_path=str(checkpoint), log=lambda _: None)
+    assert summary["students"] == 3 and summary["failed_students"] == [2]
+    assert json.loads(checkpoint.read_text())["failed_students"] == [2]
+
+    # Every shard is completed, but the rerun still owes student 2 a retry
+    monkeypatch.setattr(rebuild, "recompute_student", recompute_student)
+    summary = run_recompute([1, 2, 3], session_factory=sessions, shard_size=2,
+                            checkpoint_path=str(checkpoint), log=lambda _: None)
+    assert summary["students"] == 1 and summary["failed_students"] == []
+    assert json.loads(checkpoint.read_text())["failed_students"] == []
+    assert _built(db_session, ConceptMasteryStatus) == {1, 2, 3}
+
+
+def test_recompute_runs_shards_in_a_process_pool(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    run_migrations(engine, log=lambda _: None)
+    db = sessionmaker(bind=engine)()
+    try:
+        generate_history(db, seed=5, answers=30, students=4)
+        assert db.query(func.count(QuizResult.id)).scalar() == 12
+
+        summary = run_recompute([1, 2, 3, 4], database_url=url, workers=2, shard_size=2, log=lambda _: None)
+
+        assert summary == {**summary, "shards": 3, "students": 4, "failed_students": []}
+        assert _built(db, ConceptMasteryStatus) == {1, 2, 3, 4}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_recompute_holds_the_student_lock_for_every_table(db_session):
+    generate_history(db_session, seed=6, answers=10, students=1)
+    locks = []
+
+    def _capture(state):
+        if state.is_select and state.statement._for_update_arg is not None:
+            locks.extend(getattr(d, "name", None) for d in state.statement.get_final_froms())
+
+    event.listen(db_session, "do_orm_execute", _capture)
+    try:
+        recompute_student(db_session, 1, [])
+    finally:
+        event.remove(db_session, "do_orm_execute", _capture)
+
+    # SQLite drops FOR UPDATE; on PostgreSQL each rebuild waits for in-flight quiz saves
+    assert locks.count("students") == 3
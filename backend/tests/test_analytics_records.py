@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from modules.analytics.calculator import AnalyticsCalculator
+from modules.analytics.records import AnalyticsRecord, TYPE_OTHER, TYPE_UNSET, as_records
+
+
+def test_record_normalizes_timestamps_and_quiz_types():
+    aware = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    records = as_records([
+        {"is_correct": 1, "raw_concept": "DNA", "created_at": aware, "quiz_type": "short_answer"},
+        {"is_correct": None, "raw_concept": "DNA", "created_at": aware.replace(tzinfo=None), "quiz_type": None},
+        {"is_correct": True, "raw_concept": "DNA", "created_at": aware.isoformat(), "quiz_type": "legacy"},
+        {"is_correct": True, "raw_concept": "DNA", "created_at": "not-a-date", "quiz_type": "open-ended"},
+    ])
+
+    assert [r.epoch for r in records] == [aware.timestamp(), aware.timestamp(), aware.timestamp(), None]
+    assert [r.type_code for r in records] == [1, TYPE_UNSET, TYPE_OTHER, 2]
+    assert [r.is_correct for r in records] == [True, False, True, True]
+    assert records[0].quiz_type == "short_answer"
+    assert not hasattr(records[0], "__dict__")
+
+
+def test_build_results_accepts_records_and_dicts_alike():
+    rows = [
+        {"is_correct": i % 2 == 0, "raw_concept": "dna", "created_at": datetime(2024, 1, 1 + i), "quiz_type": "multiple-choice"}
+        for i in range(6)
+    ]
+    pairs = [("Biologia", "DNA")]
+
+    from_dicts = AnalyticsCalculator.build_results(pairs, rows)
+    from_records = AnalyticsCalculator.build_results(pairs, [AnalyticsRecord.from_dict(r) for r in rows])
+
+    assert from_dicts == from_records
+    assert from_records[0]["score_data_mcq"]["attempts_count"] == 6
@@ -176,6 +176,38 @@ class TestAnalyticsService:
         assert mcq_data["score"] == 1.0
         assert mcq_data["status_label"] == "Forte"
 
+    # ==================== SNAPSHOT TESTS ====================
+
+    def test_snapshot_shared_across_consumers(self, service, analytics_repo, material_repo):
+        """A snapshot is computed once and reused by every consumer for the same student/material."""
+        material_repo.get_concept_pairs.return_value = [("Biology", "Cell")]
+        analytics_repo.fetch_question_analytics.return_value = [
+            {"topic_name": "Biology", "concept_name": "Cell", "is_correct": True, "quiz_type": "multiple-choice"}
+            for _ in range(7)
+        ]
+
+        snapshot = service.build_snapshot(student_id=1, material_id=2)
+        service.get_adaptive_topics(1, 2, snapshot=snapshot)
+        service.check_short_answer_readiness(1, 2, snapshot=snapshot)
+        service.build_mcq_quiz_concepts(1, 2, total_questions=3, snapshot=snapshot)
+        service.build_short_quiz_concepts(1, 2, total_questions=3, snapshot=snapshot)
+        service.build_open_quiz_concepts(1, 2, total_concepts=3, snapshot=snapshot)
+
+        assert analytics_repo.fetch_question_analytics.call_count == 1
+
+    def test_snapshot_ignored_for_other_material(self, service, analytics_repo, material_repo):
+        """A snapshot built for another material is not reused."""
+        material_repo.get_concept_pairs.return_value = [("Biology", "Cell")]
+        analytics_repo.fetch_question_analytics.return_value = []
+
+        analytics_repo.fetch_concept_attempt_counts.return_value = []
+
+        snapshot = service.build_snapshot(student_id=1, material_id=2)
+        service.check_short_answer_readiness(1, 3, snapshot=snapshot)
+
+        assert analytics_repo.fetch_question_analytics.call_count == 1
+        analytics_repo.fetch_concept_attempt_counts.assert_called_once_with(1, 3, "multiple-choice")
+
     # ==================== ADAPTIVE TOPICS TESTS ====================
 
     def test_get_adaptive_topics_only_uses_established(self, service, analytics_repo, material_repo):
@@ -374,64 +406,59 @@ class TestAnalyticsService:
 
     # ==================== CHECK SHORT ANSWER READINESS ====================
 
-    def test_short_readiness_all_concepts_confident(self, service):
-        """Ready when all concepts have building/established MCQ confidence."""
-        service.get_weak_points = Mock(return_value=[
-            {"concept": "A", "score_data_mcq": {"confidence_level": "established", "score": 0.8, "attempts_count": 7}},
-            {"concept": "B", "score_data_mcq": {"confidence_level": "building", "score": 0.6, "attempts_count": 5}},
-        ])
+    def _attempt_counts(self, analytics_repo, material_repo, attempts: dict):
+        material_repo.get_concept_pairs_for_student.return_value = [("T", c) for c in attempts]
+        analytics_repo.fetch_concept_attempt_counts.return_value = [
+            {"topic_name": "T", "concept_name": c, "attempts": n} for c, n in attempts.items() if n
+        ]
+
+    def test_short_readiness_all_concepts_confident(self, service, analytics_repo, material_repo):
+        """Ready when all concepts have building/established MCQ confidence (>= 5 attempts)."""
+        self._attempt_counts(analytics_repo, material_repo, {"A": 7, "B": 5})
         result = service.check_short_answer_readiness(student_id=1)
         assert result["is_ready"] is True
         assert result["ready_concepts"] == 2
         assert result["total_concepts"] == 2
+        analytics_repo.fetch_concept_attempt_counts.assert_called_once_with(1, None, "multiple-choice")
+        analytics_repo.fetch_question_analytics.assert_not_called()
 
-    def test_short_readiness_not_ready_when_exploring(self, service):
+    def test_short_readiness_not_ready_when_exploring(self, service, analytics_repo, material_repo):
         """Not ready when some concepts are still exploring."""
-        service.get_weak_points = Mock(return_value=[
-            {"concept": "A", "score_data_mcq": {"confidence_level": "established", "score": 0.9, "attempts_count": 10}},
-            {"concept": "B", "score_data_mcq": {"confidence_level": "exploring", "score": None, "attempts_count": 3}},
-            {"concept": "C", "score_data_mcq": {"confidence_level": "not_seen", "score": None, "attempts_count": 0}},
-        ])
+        self._attempt_counts(analytics_repo, material_repo, {"A": 10, "B": 4, "C": 0})
         result = service.check_short_answer_readiness(student_id=1)
         assert result["is_ready"] is False
         assert result["ready_concepts"] == 1
         assert result["total_concepts"] == 3
 
-    def test_short_readiness_not_ready_when_empty(self, service):
+    def test_short_readiness_not_ready_when_empty(self, service, analytics_repo, material_repo):
         """Not ready when there are no concepts."""
-        service.get_weak_points = Mock(return_value=[])
+        self._attempt_counts(analytics_repo, material_repo, {})
         result = service.check_short_answer_readiness(student_id=1)
         assert result["is_ready"] is False
         assert result["total_concepts"] == 0
 
     # ==================== CHECK OPEN-ENDED READINESS ====================
 
-    def test_open_readiness_all_concepts_confident(self, service):
-        """Ready when all concepts have building/established Short confidence."""
-        service.get_weak_points = Mock(return_value=[
-            {"concept": "A", "score_data_short": {"confidence_level": "established", "score": 0.8, "attempts_count": 7}},
-            {"concept": "B", "score_data_short": {"confidence_level": "building", "score": 0.6, "attempts_count": 5}},
-        ])
+    def test_open_readiness_all_concepts_confident(self, service, analytics_repo, material_repo):
+        """Ready when all concepts have building/established Short confidence (>= 4 attempts)."""
+        self._attempt_counts(analytics_repo, material_repo, {"A": 7, "B": 4})
         result = service.check_open_ended_readiness(student_id=1)
         assert result["is_ready"] is True
         assert result["ready_concepts"] == 2
         assert result["total_concepts"] == 2
+        analytics_repo.fetch_concept_attempt_counts.assert_called_once_with(1, None, "short_answer")
 
-    def test_open_readiness_not_ready_when_exploring(self, service):
+    def test_open_readiness_not_ready_when_exploring(self, service, analytics_repo, material_repo):
         """Not ready when some concepts are still exploring in Short."""
-        service.get_weak_points = Mock(return_value=[
-            {"concept": "A", "score_data_short": {"confidence_level": "established", "score": 0.9, "attempts_count": 10}},
-            {"concept": "B", "score_data_short": {"confidence_level": "exploring", "score": None, "attempts_count": 3}},
-            {"concept": "C", "score_data_short": {"confidence_level": "not_seen", "score": None, "attempts_count": 0}},
-        ])
+        self._attempt_counts(analytics_repo, material_repo, {"A": 10, "B": 3, "C": 0})
         result = service.check_open_ended_readiness(student_id=1)
         assert result["is_ready"] is False
         assert result["ready_concepts"] == 1
         assert result["total_concepts"] == 3
 
-    def test_open_readiness_not_ready_when_empty(self, service):
+    def test_open_readiness_not_ready_when_empty(self, service, analytics_repo, material_repo):
         """Not ready when there are no concepts."""
-        service.get_weak_points = Mock(return_value=[])
+        self._attempt_counts(analytics_repo, material_repo, {})
         result = service.check_open_ended_readiness(student_id=1)
         assert result["is_ready"] is False
         assert result["total_concepts"] == 0
@@ -823,10 +850,10 @@ class TestAnalyticsService:
         day0 = datetime.combine(today, time(12, 0), tzinfo=timezone.utc)
         day1 = datetime.combine(today - timedelta(days=1), time(12, 0), tzinfo=timezone.utc)
 
-        analytics_repo.fetch_quiz_sessions.return_value = [
-            {"created_at": day0, "quiz_type": "multiple-choice", "duration_seconds": 600, "active_seconds": 500},
-            {"created_at": day0, "quiz_type": "short_answer", "duration_seconds": 1200, "active_seconds": 1100},
-            {"created_at": day1, "quiz_type": "open-ended", "duration_seconds": 2000, "active_seconds": 1900}
+        analytics_repo.fetch_daily_session_totals.return_value = [
+            {"day": day0.date(), "quiz_type": "multiple-choice", "tests": 1, "duration_seconds": 600, "active_seconds": 500},
+            {"day": day0.date(), "quiz_type": "short_answer", "tests": 1, "duration_seconds": 1200, "active_seconds": 1100},
+            {"day": day1.date(), "quiz_type": "open-ended", "tests": 1, "duration_seconds": 2000, "active_seconds": 1900}
         ]
 
         metrics = service.get_recent_metrics(student_id=1, days=2, tz_offset_minutes=0)
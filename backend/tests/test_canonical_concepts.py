@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+from models import CanonicalConcept, Concept, QuestionAnalytics, QuizResult, Student, Topic
+from modules.analytics.repository import LearningTrendRepository
+from modules.analytics.trend import trend_concept_key
+from modules.materials.deletion import MaterialDeletionTransaction
+from modules.materials.repository import CanonicalConceptRepository, MaterialUpsertRepository
+from modules.materials.upsert import MaterialUpserter
+
+
+def _upserter(db_session):
+    return MaterialUpserter(MaterialUpsertRepository(db_session), concept_index=CanonicalConceptRepository(db_session))
+
+
+def _canonical_by_concept(db_session, material_id) -> dict[str, int]:
+    rows = (
+        db_session.query(Concept.name, Concept.canonical_concept_id)
+        .join(Topic, Concept.topic_id == Topic.id)
+        .filter(Topic.study_material_id == material_id)
+    )
+    return {name: canonical_id for name, canonical_id in rows}
+
+
+def _canonical_names(db_session, student_id) -> set[str]:
+    rows = db_session.query(CanonicalConcept.norm_name).filter(CanonicalConcept.student_id == student_id)
+    return {row[0] for row in rows}
+
+
+def test_same_concept_name_shares_one_canonical_id_across_materials(db_session):
+    student = Student(name="CanonicalUser", hashed_password="x")
+    db_session.add(student)
+    db_session.commit()
+    upserter = _upserter(db_session)
+
+    bio = upserter.upsert(student.id, "bio", "bio.txt", {"Genética": ["DNA", "Gene"]})
+    chem = upserter.upsert(student.id, "chem", "chem.txt", {"Moléculas": ["dna ", "Ácido"]})
+
+    bio_ids, chem_ids = _canonical_by_concept(db_session, bio.id), _canonical_by_concept(db_session, chem.id)
+    assert bio_ids["DNA"] == chem_ids["dna "]
+    assert len({*bio_ids.values(), *chem_ids.values()}) == 3
+    assert _canonical_names(db_session, student.id) == {"dna", "gene", "ácido"}
+
+    # Re-analysis replaces the concepts: names no material uses any more are dropped
+    upserter.upsert(student.id, "chem", "chem.txt", {"Moléculas": ["Proteína"]})
+    assert _canonical_names(db_session, student.id) == {"dna", "gene", "proteína"}
+
+    assert MaterialDeletionTransaction(db_session).delete_with_cleanup(student.id, bio.id)
+    assert _canonical_names(db_session, student.id) == {"proteína"}
+
+
+def test_trend_events_key_concepts_by_canonical_id(db_session):
+    student = Student(name="CanonicalTrendUser", hashed_password="x")
+    db_session.add(student)
+    db_session.commit()
+    upserter = _upserter(db_session)
+    materials = [
+        upserter.upsert(student.id, "a", "a.txt", {"Genética": ["DNA"]}),
+        upserter.upsert(student.id, "b", "b.txt", {"Biologia": ["DNA"]}),
+    ]
+    for material in materials:
+        concept_id = db_session.query(Concept.id).join(Topic).filter(Topic.study_material_id == material.id).scalar()
+        result = QuizResult(student_id=student.id, study_material_id=material.id, score=1, total_questions=1,
+                            quiz_type="multiple-choice")
+        db_session.add(result)
+        db_session.flush()
+        db_session.add(QuestionAnalytics(quiz_result_id=result.id, topic="DNA", concept_id=concept_id, is_correct=True))
+    db_session.commit()
+
+    events = LearningTrendRepository(db_session).fetch_question_events(student.id, None, datetime.now(timezone.utc))
+
+    keys = {trend_concept_key(record) for record in events}
+    assert len(events) == 2
+    assert len(keys) == 1 and keys.pop().startswith("c:")
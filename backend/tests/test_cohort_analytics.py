@@ -0,0 +1,91 @@
+import pytest
+from security import get_password_hash
+from models import Student
+from modules.analytics import cohort
+from modules.analytics.cohort import CohortAnalyticsService
+from modules.analytics.repository import CohortAnalyticsRepository
+from modules.materials.repository import MaterialConceptRepository, MaterialUpsertRepository
+from modules.materials.upsert import MaterialUpserter
+from modules.quizzes.repository import QuizResultPersistenceRepository
+
+SHARED_TEXT = "Capítulo 1: a célula e o DNA."
+TOPICS = {"Biologia": ["Célula", "DNA"]}
+
+
+def _student_with_material(db_session, name: str, text: str = SHARED_TEXT):
+    student = Student(name=name, hashed_password=get_password_hash("StrongPass1!"))
+    db_session.add(student)
+    db_session.commit()
+    material = MaterialUpserter(MaterialUpsertRepository(db_session)).upsert(student.id, text, "aula.txt", TOPICS)
+    return student, material
+
+
+def _answer(db_session, student, material, correct: list[bool]):
+    concept_ids = MaterialConceptRepository(db_session).get_concept_id_map(material.id)
+    QuizResultPersistenceRepository(db_session).record_quiz_result(
+        student_id=student.id,
+        score=sum(correct),
+        total=len(correct),
+        quiz_type="multiple-choice",
+        analytics_data=[
+            {"topic": "Célula", "concept_id": concept_ids.get("célula"), "is_correct": ok} for ok in correct
+        ],
+        material_id=material.id,
+        xp_earned=0,
+        duration_seconds=60,
+        active_seconds=60
+    )
+
+
+def _service(db_session, workers: int = 0):
+    return CohortAnalyticsService(
+        CohortAnalyticsRepository(db_session),
+        MaterialConceptRepository(db_session),
+        workers=workers
+    )
+
+
+def _seed_cohort(db_session):
+    owner, owner_material = _student_with_material(db_session, "Owner")
+    _answer(db_session, owner, owner_material, [True] * 7)
+    for i in range(3):
+        student, material = _student_with_material(db_session, f"Peer{i}")
+        _answer(db_session, student, material, [i != 0] * 5 + [False] * i)
+    outsider, other_material = _student_with_material(db_session, "Outsider", text="Outro material")
+    _answer(db_session, outsider, other_material, [False] * 7)
+    return owner, owner_material
+
+
+def test_cohort_groups_students_sharing_material(db_session):
+    owner, material = _seed_cohort(db_session)
+
+    report = _service(db_session).get_material_cohort(owner.id, material.id)
+
+    assert report["materials"] == 4
+    assert report["students"] == 4
+    cell = next(c for c in report["concepts"] if c["concept"] == "Célula")
+    # Owner 7/7, peers 0/5, 5/6 and 5/7
+    assert cell["mcq"]["confidence"] == {"established": 2, "building": 2}
+    assert cell["mcq"]["scored_students"] == 4
+    assert cell["mcq"]["mean_score"] == pytest.approx((1.0 + 0.0 + 5 / 6 + 5 / 7) / 4)
+    assert cell["mcq"]["median_score"] == pytest.approx((5 / 6 + 5 / 7) / 2)
+    dna = next(c for c in report["concepts"] if c["concept"] == "DNA")
+    assert dna["mcq"]["confidence"] == {"not_seen": 4}
+
+
+def test_cohort_process_pool_matches_serial(db_session, monkeypatch):
+    owner, material = _seed_cohort(db_session)
+    expected = _service(db_session).get_material_cohort(owner.id, material.id)
+
+    monkeypatch.setattr(cohort, "COHORT_PARALLEL_MIN_STUDENTS", 1)
+    assert _service(db_session, workers=2).get_material_cohort(owner.id, material.id) == expected
+
+
+def test_cohort_is_not_exposed_to_students(client, db_session):
+    # No teacher/class scope exists yet: a student must not read other accounts' mastery
+    register = client.post("/register", json={"name": "CohortOwner", "password": "StrongPass1!"})
+    headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+    owner_id = register.json()["user"]["id"]
+    material = MaterialUpserter(MaterialUpsertRepository(db_session)).upsert(owner_id, SHARED_TEXT, "aula.txt", TOPICS)
+
+    assert client.get(f"/analytics/cohort?material_id={material.id}", headers=headers).status_code == 404
@@ -0,0 +1,307 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from security import get_password_hash
+from models import (
+    Student, StudyMaterial, Topic, Concept, QuizResult, QuestionAnalytics,
+    ConceptMastery, ConceptMasteryStatus
+)
+from modules.analytics.calculator import AnalyticsCalculator
+from modules.analytics import decay
+from modules.analytics.repository import (
+    AnalyticsRepository, ConceptMasteryRepository, ConceptWindowRepository, DecayedMasteryRepository
+)
+from modules.analytics.service import AnalyticsService
+from modules.materials.deletion import MaterialDeletionTransaction
+from modules.materials.repository import MaterialConceptRepository
+from modules.quizzes.repository import QuizResultPersistenceRepository
+
+
+def _setup(db_session):
+    student = Student(name="MasteryUser", hashed_password=get_password_hash("StrongPass1!"))
+    db_session.add(student)
+    db_session.commit()
+    material = StudyMaterial(student_id=student.id, source="m.txt", text="content", is_active=True)
+    db_session.add(material)
+    db_session.commit()
+    topic = Topic(study_material_id=material.id, name="Biologia")
+    db_session.add(topic)
+    db_session.commit()
+    cell = Concept(topic_id=topic.id, name="Célula")
+    dna = Concept(topic_id=topic.id, name="DNA")
+    db_session.add_all([cell, dna])
+    db_session.commit()
+    return student, material, cell, dna
+
+
+def _save(repo, student, material, quiz_type, answers):
+    assert repo.record_quiz_result(
+        student_id=student.id,
+        score=0,
+        total=len(answers),
+        quiz_type=quiz_type,
+        analytics_data=answers,
+        material_id=material.id,
+        xp_earned=0,
+        duration_seconds=60,
+        active_seconds=60
+    )
+
+
+def _services(db_session):
+    legacy = AnalyticsService(AnalyticsRepository(db_session), MaterialConceptRepository(db_session))
+    mastery = AnalyticsService(
+        AnalyticsRepository(db_session),
+        MaterialConceptRepository(db_session),
+        ConceptMasteryRepository(db_session)
+    )
+    return legacy, mastery
+
+
+def test_incremental_mastery_matches_full_history(db_session):
+    student, material, cell, dna = _setup(db_session)
+    repo = QuizResultPersistenceRepository(db_session)
+
+    for i in range(6):
+        _save(repo, student, material, "multiple-choice", [
+            {"topic": "Célula", "concept_id": cell.id, "is_correct": i % 2 == 0},
+            {"topic": "DNA", "concept_id": dna.id, "is_correct": True},
+            {"topic": "Órfão", "is_correct": i % 3 == 0},
+        ])
+    _save(repo, student, material, "short_answer", [
+        {"topic": "célula", "is_correct": True},
+    ])
+    _save(repo, student, material, "open-ended", [
+        {"topic": "DNA", "concept_id": dna.id, "is_correct": False},
+    ])
+
+    legacy, mastery = _services(db_session)
+    assert mastery.get_weak_points(student.id, material.id) == legacy.get_weak_points(student.id, material.id)
+    assert mastery.get_weak_points(student.id) == legacy.get_weak_points(student.id)
+
+    row = db_session.query(ConceptMastery).filter(
+        ConceptMastery.concept_id == cell.id,
+        ConceptMastery.quiz_type == "multiple-choice"
+    ).one()
+    assert row.attempts_count == 6
+
+
+def test_mastery_window_is_capped_and_newest_first():
+    old = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    recent = [[old + (9 - i) * 60, 0] for i in range(7)]
+    rows = [{
+        "concept_name": "DNA",
+        "topic_name": "Biologia",
+        "raw_concept": "DNA",
+        "quiz_type": "multiple-choice",
+        "recent_results": recent,
+        "attempts_count": 20,
+    }]
+
+    results = AnalyticsCalculator.build_results_from_mastery([("Biologia", "DNA")], rows)
+
+    assert results[0]["total_questions_mcq"] == 20
+    assert results[0]["total_questions"] == 20
+    assert results[0]["score_data_mcq"]["score"] == 0
+
+
+def test_legacy_history_is_rebuilt_on_first_read(db_session):
+    student, material, cell, _ = _setup(db_session)
+    base = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    for i in range(3):
+        result = QuizResult(
+            student_id=student.id,
+            study_material_id=material.id,
+            score=1,
+            total_questions=1,
+            quiz_type="multiple-choice",
+            created_at=base + timedelta(days=i)
+        )
+        db_session.add(result)
+        db_session.flush()
+        db_session.add(QuestionAnalytics(
+            quiz_result_id=result.id, topic="Célula", concept_id=cell.id, is_correct=i == 2
+        ))
+    db_session.commit()
+    assert db_session.get(ConceptMasteryStatus, student.id) is None
+
+    legacy, mastery = _services(db_session)
+    assert mastery.get_weak_points(student.id, material.id) == legacy.get_weak_points(student.id, material.id)
+    assert db_session.get(ConceptMasteryStatus, student.id) is not None
+
+    row = db_session.query(ConceptMastery).filter(ConceptMastery.concept_id == cell.id).one()
+    assert row.recent_results.startswith(f"[[{(base + timedelta(days=2)).timestamp()}, 1]")
+
+
+def test_delete_material_removes_mastery_rows(db_session):
+    student, material, cell, _ = _setup(db_session)
+    _save(QuizResultPersistenceRepository(db_session), student, material, "multiple-choice", [
+        {"topic": "Célula", "concept_id": cell.id, "is_correct": True},
+    ])
+    assert db_session.query(ConceptMastery).count() == 1
+
+    assert MaterialDeletionTransaction(db_session).delete_with_cleanup(student.id, material.id) is True
+    assert db_session.query(ConceptMastery).count() == 0
+
+
+def test_sql_window_fetch_matches_full_history(db_session):
+    student, material, cell, dna = _setup(db_session)
+    repo = QuizResultPersistenceRepository(db_session)
+    for i in range(10):
+        _save(repo, student, material, "multiple-choice", [
+            {"topic": "Célula", "concept_id": cell.id, "is_correct": i < 4},
+            {"topic": "Célula", "concept_id": cell.id, "is_correct": i % 2 == 0},
+            {"topic": "dna", "is_correct": i > 6},
+        ])
+
+    legacy, _ = _services(db_session)
+    windowed = AnalyticsService(
+        AnalyticsRepository(db_session),
+        MaterialConceptRepository(db_session),
+        ConceptWindowRepository(db_session)
+    )
+    assert windowed.get_weak_points(student.id, material.id) == legacy.get_weak_points(student.id, material.id)
+
+    rows = ConceptWindowRepository(db_session).fetch_mastery(student.id, material.id)
+    cell_row = next(r for r in rows if r["concept_id"] == cell.id)
+    assert cell_row["attempts_count"] == 20
+    assert len(cell_row["recent_results"]) == 7
+    assert cell_row["concept_name"] == "Célula"
+
+
+def test_readiness_counts_match_snapshot_gates(db_session):
+    student, material, cell, dna = _setup(db_session)
+    repo = QuizResultPersistenceRepository(db_session)
+    legacy, _ = _services(db_session)
+
+    def _gates():
+        snapshot = legacy.build_snapshot(student.id, material.id)
+        for check in (legacy.check_short_answer_readiness, legacy.check_open_ended_readiness):
+            assert check(student.id, material.id) == check(student.id, material.id, snapshot=snapshot)
+        return legacy.check_short_answer_readiness(student.id, material.id)
+
+    assert _gates()["is_ready"] is False
+    _save(repo, student, material, "multiple-choice", [
+        {"topic": "Célula", "concept_id": cell.id, "is_correct": True} for _ in range(5)
+    ])
+    assert _gates() == {"is_ready": False, "total_concepts": 2, "ready_concepts": 1}
+    # Legacy name-only answers resolve onto the material concept; orphans become extra concepts
+    _save(repo, student, material, "multiple-choice", [
+        {"topic": "dna", "is_correct": False} for _ in range(5)
+    ])
+    assert _gates()["is_ready"] is True
+    _save(repo, student, material, "short_answer", [{"topic": "Órfão", "is_correct": True}])
+    assert _gates() == {"is_ready": False, "total_concepts": 3, "ready_concepts": 2}
+
+
+def test_decayed_sums_are_kept_incrementally_like_a_rebuild(db_session):
+    student, material, cell, dna = _setup(db_session)
+    repo = QuizResultPersistenceRepository(db_session)
+    for i in range(5):
+        _save(repo, student, material, "multiple-choice", [
+            {"topic": "Célula", "concept_id": cell.id, "is_correct": i != 2},
+            {"topic": "DNA", "concept_id": dna.id, "is_correct": False},
+        ])
+
+    def _states():
+        return {
+            (row.concept_id, row.quiz_type): (row.decayed_correct, row.decayed_weight)
+            for row in db_session.query(ConceptMastery).filter(ConceptMastery.student_id == student.id)
+        }
+
+    incremental = _states()
+    ConceptMasteryRepository(db_session).rebuild(student.id)
+    rebuilt = _states()
+
+    assert rebuilt.keys() == incremental.keys()
+    for key, (correct, weight) in rebuilt.items():
+        assert abs(correct - incremental[key][0]) < 1e-6
+        assert abs(weight - incremental[key][1]) < 1e-6
+    # Answers seconds apart barely decay
+    assert abs(rebuilt[(cell.id, "multiple-choice")][0] - 4) < 1e-3
+
+
+def test_decayed_scoring_drops_stale_concepts_back_to_exploring():
+    now = datetime(2024, 6, 1, tzinfo=timezone.utc).timestamp()
+    fresh = stale = decay.EMPTY_STATE
+    for i in range(7):
+        fresh = decay.fold(fresh, now - i * 60, True)
+        stale = decay.fold(stale, now - 60 * 86400 - i * 60, True)
+    rows = [
+        {"concept_name": "Célula", "topic_name": "Biologia", "quiz_type": "multiple-choice",
+         "attempts_count": 7, "decayed_state": fresh},
+        {"concept_name": "DNA", "topic_name": "Biologia", "quiz_type": "multiple-choice",
+         "attempts_count": 7, "decayed_state": stale},
+    ]
+
+    results = AnalyticsCalculator.build_results_from_decayed([("Biologia", "Célula"), ("Biologia", "DNA")], rows, now)
+    by_concept = {entry["concept"]: entry for entry in results}
+
+    assert by_concept["Célula"]["score_data_mcq"]["confidence_level"] == "established"
+    assert by_concept["Célula"]["score_data_mcq"]["score"] == 1.0
+    # 60 days is ~4.3 half-lives: 7 answers weigh less than one
+    assert by_concept["DNA"]["score_data_mcq"]["confidence_level"] == "exploring"
+    assert by_concept["DNA"]["total_questions_mcq"] == 7
+    assert by_concept["DNA"]["score_data_short"]["confidence_level"] == "not_seen"
+
+
+def test_decay_mode_service_reads_mastery_rows(db_session):
+    student, material, cell, dna = _setup(db_session)
+    repo = QuizResultPersistenceRepository(db_session)
+    for _ in range(7):
+        _save(repo, student, material, "multiple-choice", [
+            {"topic": "Célula", "concept_id": cell.id, "is_correct": True},
+        ])
+    service = AnalyticsService(
+        AnalyticsRepository(db_session),
+        MaterialConceptRepository(db_session),
+        DecayedMasteryRepository(db_session)
+    )
+
+    cell_entry = next(e for e in service.get_weak_points(student.id) if e["concept"] == "Célula")
+
+    assert cell_entry["score_data_mcq"]["confidence_level"] == "established"
+    assert service.get_data_version(student.id).endswith(datetime.now(timezone.utc).date().isoformat())
+
+
+def test_incremental_update_locks_the_student_and_mastery_rows(db_session):
+    student, material, cell, _ = _setup(db_session)
+    repo = QuizResultPersistenceRepository(db_session)
+    _save(repo, student, material, "multiple-choice", [{"topic": "Célula", "concept_id": cell.id, "is_correct": True}])
+
+    locked_tables = []
+
+    def _capture(state):
+        if state.is_select and state.statement._for_update_arg is not None:
+            locked_tables.extend(getattr(d, "name", None) for d in state.statement.get_final_froms())
+
+    event.listen(db_session, "do_orm_execute", _capture)
+    try:
+        _save(repo, student, material, "multiple-choice", [{"topic": "Célula", "concept_id": cell.id, "is_correct": False}])
+    finally:
+        event.remove(db_session, "do_orm_execute", _capture)
+
+    # SQLite drops FOR UPDATE when rendering; PostgreSQL serializes concurrent saves on these rows
+    assert "students" in locked_tables
+    assert "concept_mastery" in locked_tables
+
+
+def test_lazy_build_tolerates_a_status_row_built_concurrently(db_session, monkeypatch):
+    student, material, cell, _ = _setup(db_session)
+    student_id, material_id, cell_id = student.id, material.id, cell.id
+    assert ConceptMasteryRepository(db_session).rebuild(student_id)
+    db_session.expunge_all()
+
+    # Another request committed the status row after this one checked for it
+    get = db_session.get
+    monkeypatch.setattr(
+        db_session, "get", lambda model, key, **kw: None if model is ConceptMasteryStatus else get(model, key, **kw)
+    )
+    assert QuizResultPersistenceRepository(db_session).record_quiz_result(
+        student_id, 1, 1, "multiple-choice", [{"topic": "Célula", "concept_id": cell_id, "is_correct": True}],
+        material_id, 0, 60, 60
+    )
+    monkeypatch.undo()
+    rows = ConceptMasteryRepository(db_session).fetch_mastery(student_id, material_id)
+
+    assert [(row["concept_id"], row["attempts_count"]) for row in rows] == [(cell_id, 1)]
+    assert db_session.query(ConceptMasteryStatus).filter(ConceptMasteryStatus.student_id == student_id).count() == 1
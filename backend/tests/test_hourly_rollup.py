@@ -0,0 +1,179 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from models import (
+    HourlyActivityRollup, HourlyActivityRollupStatus, QuestionAnalytics, QuizResult, Student, StudyMaterial
+)
+from modules.analytics.repository import AnalyticsRepository, HourlyRollupRepository
+from modules.materials.deletion import MaterialDeletionTransaction
+from modules.quizzes.repository import QuizResultPersistenceRepository
+
+_FIELDS = ("tests", "active_seconds", "duration_seconds")
+
+
+def _student(db_session, name: str) -> Student:
+    student = Student(name=name, hashed_password="x")
+    db_session.add(student)
+    db_session.commit()
+    return student
+
+
+def _totals(rows: list[dict]) -> dict:
+    return {(r["day"], r["quiz_type"]): tuple(r[field] for field in _FIELDS) for r in rows}
+
+
+def _rollup_rows(db_session, student_id: int) -> dict:
+    return {
+        (row.hour_utc, row.quiz_type): (
+            row.sessions, row.active_seconds, row.duration_seconds, row.answers_correct, row.answers_total
+        )
+        for row in db_session.query(HourlyActivityRollup).filter(HourlyActivityRollup.student_id == student_id)
+    }
+
+
+def test_rollup_totals_match_raw_sessions_for_any_offset(db_session):
+    student = _student(db_session, "RollupTzUser")
+    base = datetime(2024, 3, 10, 0, 15)
+    sessions = [
+        QuizResult(student_id=student.id, score=1, total_questions=1, quiz_type=quiz_type,
+                   duration_seconds=60 + hour, active_seconds=(hour % 5) - 1,
+                   created_at=base + timedelta(hours=hour, minutes=hour * 7 % 60))
+        for hour in range(0, 72, 3)
+        for quiz_type in ("multiple-choice", "short_answer", None)[: 1 + hour % 3]
+    ]
+    db_session.add_all(sessions)
+    db_session.commit()
+
+    raw = AnalyticsRepository(db_session)
+    rollup = HourlyRollupRepository(db_session)
+    start = datetime(2024, 3, 9, tzinfo=timezone.utc)
+    end = datetime(2024, 3, 15, tzinfo=timezone.utc)
+
+    for offset in (-180, 0, 60, 330, 540):
+        start_local = start - timedelta(minutes=offset)
+        end_local = end - timedelta(minutes=offset)
+        assert _totals(rollup.fetch_daily_session_totals(student.id, start_local, end_local, offset)) == _totals(
+            raw.fetch_daily_session_totals(student.id, start_local, end_local, offset)
+        )
+
+    # Built once on first read; the half-hour offset above went to the raw query
+    assert db_session.get(HourlyActivityRollupStatus, student.id) is not None
+
+
+def test_saved_quizzes_update_rollup_like_a_rebuild(db_session):
+    student = _student(db_session, "RollupSaveUser")
+    rollup = HourlyRollupRepository(db_session)
+    rollup.rebuild(student.id)
+    persistence = QuizResultPersistenceRepository(db_session)
+
+    for quiz_type, answers in (("multiple-choice", [True, False, True]), ("multiple-choice", [False]),
+                               ("short_answer", [True, True])):
+        assert persistence.record_quiz_result(
+            student.id, sum(answers), len(answers), quiz_type,
+            [{"topic": "Math", "is_correct": correct} for correct in answers],
+            None, 10, 120, 100
+        )
+
+    incremental = _rollup_rows(db_session, student.id)
+    assert sum(row[0] for row in incremental.values()) == 3
+    assert sum(row[3] for row in incremental.values()) == 4
+    assert sum(row[4] for row in incremental.values()) == 6
+
+    rollup.rebuild(student.id)
+    assert _rollup_rows(db_session, student.id) == incremental
+
+
+def test_material_deletion_resets_rollup(db_session):
+    student = _student(db_session, "RollupDeleteUser")
+    material = StudyMaterial(student_id=student.id, source="a.txt", text="a")
+    db_session.add(material)
+    db_session.commit()
+    result = QuizResult(student_id=student.id, study_material_id=material.id, score=1, total_questions=1,
+                        quiz_type="multiple-choice", duration_seconds=30, active_seconds=20)
+    db_session.add(result)
+    db_session.flush()
+    db_session.add(QuestionAnalytics(quiz_result_id=result.id, topic="Math", is_correct=True))
+    db_session.commit()
+
+    rollup = HourlyRollupRepository(db_session)
+    rollup.rebuild(student.id)
+    assert _rollup_rows(db_session, student.id)
+
+    assert MaterialDeletionTransaction(db_session).delete_with_cleanup(student.id, material.id)
+
+    assert db_session.get(HourlyActivityRollupStatus, student.id) is None
+    assert _rollup_rows(db_session, student.id) == {}
+    now = datetime.now(timezone.utc)
+    assert rollup.fetch_daily_session_totals(student.id, now - timedelta(days=1), now + timedelta(hours=1)) == []
+
+
+def test_rebuild_only_reads_the_students_answers(db_session):
+    student = _student(db_session, "RollupPlanUser")
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if "question_analytics" in statement and statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        HourlyRollupRepository(db_session).rebuild(student.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    assert statements
+    for statement, parameters in statements:
+        plan = db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        details = [row[-1] for row in plan]
+        assert not any(detail.startswith("SCAN question_analytics") for detail in details), details
+
+
+def test_saves_in_the_same_hour_increment_the_row_in_sql(db_session):
+    student = _student(db_session, "RollupAtomicUser")
+    HourlyRollupRepository(db_session).rebuild(student.id)
+    persistence = QuizResultPersistenceRepository(db_session)
+    updates = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE ANALYTICS_HOURLY_ROLLUP"):
+            updates.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        for answers in ([True, False], [True]):
+            assert persistence.record_quiz_result(
+                student.id, sum(answers), len(answers), "multiple-choice",
+                [{"topic": "Math", "is_correct": correct} for correct in answers],
+                None, 10, 120, 100
+            )
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    assert updates and all("sessions + " in statement for statement in updates)
+    (row,) = _rollup_rows(db_session, student.id).values()
+    assert row == (2, 200, 240, 2, 3)
+
+
+def test_lazy_build_tolerates_a_status_row_built_concurrently(db_session, monkeypatch):
+    student = _student(db_session, "RollupRaceUser")
+    student_id = student.id
+    assert HourlyRollupRepository(db_session).rebuild(student_id)
+    db_session.expunge_all()
+
+    # Another request committed the status row after this one checked for it
+    get = db_session.get
+    monkeypatch.setattr(
+        db_session, "get",
+        lambda model, key, **kw: None if model is HourlyActivityRollupStatus else get(model, key, **kw)
+    )
+    assert QuizResultPersistenceRepository(db_session).record_quiz_result(
+        student_id, 1, 1, "multiple-choice", [{"topic": "Math", "is_correct": True}], None, 10, 120, 100
+    )
+    monkeypatch.undo()
+
+    (row,) = _rollup_rows(db_session, student_id).values()
+    assert row == (1, 100, 120, 1, 1)
+    assert db_session.query(HourlyActivityRollupStatus).filter(
+        HourlyActivityRollupStatus.student_id == student_id
+    ).count() == 1
@@ -4,7 +4,7 @@ from unittest.mock import patch, MagicMock
 # client comes from conftest
 
 
-@patch("modules.quizzes.ai_service.QuizAIService.generate_quiz")
+@patch("modules.quizzes.ai_service.QuizAIService.generate_quiz_async")
 @patch("modules.materials.repository.MaterialReadRepository.load")
 def test_topic_validation_rejects_invalid_topics_allows_valid(mock_load, mock_generate, client, auth_headers):
     """Validate topic input constraints without exercising LLM schema failures."""
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from security import get_password_hash
+from models import Student, StudyMaterial, QuizResult, QuestionAnalytics, LearningTrendCheckpoint, LearningTrendSnapshot
+from modules.analytics.repository import AnalyticsRepository, LearningTrendRepository
+from modules.analytics.service import AnalyticsService
+from modules.analytics.trend import LearningTrendEngine
+from modules.materials.deletion import MaterialDeletionTransaction
+from modules.materials.repository import MaterialConceptRepository
+
+
+def _seed(db_session):
+    student = Student(name="TrendUser", hashed_password=get_password_hash("StrongPass1!"))
+    db_session.add(student)
+    db_session.commit()
+    material = StudyMaterial(student_id=student.id, source="t.txt", text="content", is_active=True)
+    db_session.add(material)
+    db_session.commit()
+
+    now = datetime.now(timezone.utc)
+    quiz_types = ["multiple-choice", "short_answer", "open-ended"]
+    for i in range(40):
+        created_at = now - timedelta(days=20 - i // 2, hours=i % 5)
+        result = QuizResult(
+            student_id=student.id,
+            study_material_id=material.id,
+            score=0,
+            total_questions=3,
+            quiz_type=quiz_types[i % 3],
+            created_at=created_at.replace(tzinfo=None)
+        )
+        db_session.add(result)
+        db_session.flush()
+        for j in range(3):
+            db_session.add(QuestionAnalytics(
+                quiz_result_id=result.id,
+                topic=f"Conceito {(i + j) % 4}",
+                concept_id=(i + j) % 2 or None,
+                is_correct=(i * j) % 3 != 1
+            ))
+    db_session.commit()
+    return student, material
+
+
+def _services(db_session):
+    legacy = AnalyticsService(AnalyticsRepository(db_session), MaterialConceptRepository(db_session))
+    incremental = AnalyticsService(
+        AnalyticsRepository(db_session),
+        MaterialConceptRepository(db_session),
+        trend_repo=LearningTrendRepository(db_session)
+    )
+    return legacy, incremental
+
+
+def test_engine_running_average_matches_recount():
+    engine = LearningTrendEngine()
+    for i in range(12):
+        engine.apply("multiple-choice", "id:1", i % 3 == 0)
+    engine.apply("multiple-choice", "name:dna", True)
+
+    # id:1 window (last 7 of 12): indices 5..11 -> 6, 9 correct = 2/7; dna = 1/1
+    assert engine.level("multiple-choice") == round((2 / 7 + 1) / 2 * 100)
+    assert engine.level("short_answer") is None
+
+    restored = LearningTrendEngine(engine.to_state())
+    assert restored.level("multiple-choice") == engine.level("multiple-choice")
+
+
+def test_incremental_trend_matches_full_replay(db_session):
+    student, _ = _seed(db_session)
+    legacy, incremental = _services(db_session)
+
+    for tz in (0, 60, -300):
+        expected = legacy.get_learning_trend(student.id, days=30, tz_offset_minutes=tz, min_questions=2)
+        assert incremental.get_learning_trend(student.id, days=30, tz_offset_minutes=tz, min_questions=2) == expected
+        # Second call is served from snapshots
+        assert incremental.get_learning_trend(student.id, days=30, tz_offset_minutes=tz, min_questions=2) == expected
+
+    assert db_session.query(LearningTrendCheckpoint).count() == 3
+
+
+def test_incremental_trend_only_replays_after_checkpoint(db_session):
+    student, _ = _seed(db_session)
+    _, incremental = _services(db_session)
+    incremental.get_learning_trend(student.id, days=30)
+
+    with patch.object(LearningTrendRepository, "fetch_question_events", return_value=[]) as fetch:
+        incremental.get_learning_trend(student.id, days=90)
+
+    # Only today's answers are fetched once the checkpoint covers yesterday
+    assert fetch.call_count == 1
+    start_utc, end_utc = fetch.call_args.args[1:]
+    assert end_utc - start_utc == timedelta(days=1)
+
+
+def test_material_deletion_resets_trend_snapshots(db_session):
+    student, material = _seed(db_session)
+    _, incremental = _services(db_session)
+    incremental.get_learning_trend(student.id, days=30)
+    assert db_session.query(LearningTrendSnapshot).count() > 0
+
+    assert MaterialDeletionTransaction(db_session).delete_with_cleanup(student.id, material.id) is True
+
+    assert db_session.query(LearningTrendSnapshot).count() == 0
+    assert db_session.query(LearningTrendCheckpoint).count() == 0
+    trend = incremental.get_learning_trend(student.id, days=30)
+    assert all(day["by_level"]["multiple-choice"]["questions"] == 0 for day in trend["daily"])
@@ -1,9 +1,12 @@
+import asyncio
+import threading
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from modules.materials.document_service import DocumentService
+from modules.materials.use_cases import UploadMaterialUseCase
 from modules.quizzes.ai_service import QuizAIService
 from modules.quizzes.engine import MultipleChoiceStrategy
-from services.openai_caller import OpenAICaller
+from services.openai_caller import AsyncOpenAICaller, OpenAICaller
 
 class MockUploadedFile:
     def __init__(self, content, file_type):
@@ -57,3 +60,55 @@ def test_generate_quiz_no_key():
     strategy = MultipleChoiceStrategy()
     quiz = service.generate_quiz(strategy, "Texto")
     assert quiz is None
+
+def test_generate_quiz_async_awaits_async_caller():
+    mock_client = MagicMock()
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = (
+        '{"questions": [{"question": "Questao 1", "options": ["A", "B", "C", "D"], '
+        '"correctIndex": 0, "explanation": "Porque sim."}]}'
+    )
+    mock_client.chat_completions_create = AsyncMock(return_value=mock_response)
+
+    sync_caller = MagicMock()
+    service = QuizAIService(sync_caller, async_caller=AsyncOpenAICaller(mock_client))
+    quiz = asyncio.run(service.generate_quiz_async(MultipleChoiceStrategy(), "Texto de teste"))
+
+    assert quiz[0]["question"] == "Questao 1"
+    mock_client.chat_completions_create.assert_awaited_once()
+    sync_caller.call.assert_not_called()
+
+def test_evaluate_answer_async_falls_back_to_sync_caller():
+    caller = MagicMock()
+    caller.is_available.return_value = True
+    caller.call.return_value = '{"score": 80, "feedback": "Bom"}'
+    service = QuizAIService(caller)
+
+    result = asyncio.run(service.evaluate_answer_async(MagicMock(), "Texto", "Pergunta?", "Resposta"))
+
+    assert result == {"score": 80, "feedback": "Bom"}
+    caller.call.assert_called_once()
+
+
+def test_upload_runs_the_material_upsert_off_the_event_loop():
+    doc_service = MagicMock()
+    doc_service.extract_text.return_value = "Texto"
+    topic_service = MagicMock()
+    topic_service.extract_topics.return_value = {"Biologia": ["Celula"]}
+    upserter = MagicMock()
+    upsert_threads = []
+    upserter.upsert.side_effect = lambda *args: upsert_threads.append(threading.get_ident())
+    ai_service = MagicMock()
+    ai_service.is_available.return_value = True
+    use_case = UploadMaterialUseCase(doc_service, topic_service, upserter)
+
+    async def _upload():
+        result = await use_case.execute(1, b"Texto", "a.txt", "text/plain", ai_service)
+        return result, threading.get_ident()
+
+    result, loop_thread = asyncio.run(_upload())
+
+    assert result["topics"] == {"Biologia": ["Celula"]}
+    upserter.upsert.assert_called_once_with(1, "Texto", "a.txt", {"Biologia": ["Celula"]})
+    assert upsert_threads and upsert_threads[0] != loop_thread
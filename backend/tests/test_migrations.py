@@ -0,0 +1,117 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+from migrations import MIGRATIONS, applied_versions, run_migrations
+
+
+def _engine():
+    return create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+def _index_names(engine, table: str) -> set[str]:
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_run_migrations_creates_schema_and_hot_path_indexes():
+    engine = _engine()
+
+    applied = run_migrations(engine, log=lambda _: None)
+
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    assert {"ix_quiz_results_student_created", "ix_quiz_results_student_material"} <= _index_names(engine, "quiz_results")
+    assert {"ix_question_analytics_quiz_result_id", "ix_question_analytics_concept_id"} <= _index_names(
+        engine, "question_analytics"
+    )
+    assert "ix_topics_study_material_id" in _index_names(engine, "topics")
+    assert "ix_study_materials_student_active" in _index_names(engine, "study_materials")
+
+    # Second run is a no-op
+    assert run_migrations(engine, log=lambda _: None) == []
+
+
+def test_run_migrations_upgrades_legacy_database():
+    engine = _engine()
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE quiz_results (id INTEGER PRIMARY KEY, student_id INTEGER, study_material_id INTEGER, "
+            "score INTEGER, total_questions INTEGER, quiz_type VARCHAR, created_at DATETIME)"
+        ))
+
+    run_migrations(engine, log=lambda _: None)
+
+    columns = {col["name"] for col in inspect(engine).get_columns("quiz_results")}
+    assert {"duration_seconds", "active_seconds"} <= columns
+    assert "ix_quiz_results_student_created" in _index_names(engine, "quiz_results")
+    assert applied_versions(engine) == {version for version, _, _ in MIGRATIONS}
+
+
+def test_canonical_concepts_migration_backfills_existing_concepts():
+    engine = _engine()
+    run_migrations(engine, log=lambda _: None)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO students (id, name, hashed_password) VALUES (1, 'a', 'x')"))
+        connection.execute(text("INSERT INTO study_materials (id, student_id, source) VALUES (1, 1, 'a'), (2, 1, 'b')"))
+        connection.execute(text("INSERT INTO topics (id, study_material_id, name) VALUES (1, 1, 'T'), (2, 2, 'U')"))
+        connection.execute(text(
+            "INSERT INTO concepts (id, topic_id, name) VALUES (1, 1, 'Célula'), (2, 2, 'célula '), (3, 2, 'DNA')"
+        ))
+        connection.execute(text("DELETE FROM schema_migrations WHERE version = 8"))
+
+    assert run_migrations(engine, log=lambda _: None) == [8]
+
+    with engine.connect() as connection:
+        canonical = dict(connection.execute(text("SELECT id, canonical_concept_id FROM concepts")).all())
+        names = {row[0] for row in connection.execute(text("SELECT norm_name FROM canonical_concepts"))}
+    assert canonical[1] == canonical[2] != canonical[3]
+    assert names == {"célula", "dna"}
+
+
+
+def test_concept_mastery_unique_key_migration_drops_duplicate_rows():
+    engine = _engine()
+    run_migrations(engine, log=lambda _: None)
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX uq_concept_mastery_key"))
+        connection.execute(text("INSERT INTO students (id, name, hashed_password) VALUES (1, 'a', 'x')"))
+        connection.execute(text(
+            "INSERT INTO concept_mastery (student_id, study_material_id, concept_id, raw_concept, quiz_type, "
+            "recent_results, attempts_count) VALUES (1, 1, 1, 'A', 'mcq', '[]', 1), (1, 1, 1, 'A', 'mcq', '[]', 1)"
+        ))
+        connection.execute(text("INSERT INTO concept_mastery_status (student_id) VALUES (1)"))
+        connection.execute(text("DELETE FROM schema_migrations WHERE version = 9"))
+
+    assert run_migrations(engine, log=lambda _: None) == [9]
+
+    assert "uq_concept_mastery_key" in _index_names(engine, "concept_mastery")
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM concept_mastery")).scalar() == 0
+        assert connection.execute(text("SELECT COUNT(*) FROM concept_mastery_status")).scalar() == 0
+
+
+def test_concept_canonical_foreign_key_migration_rebuilds_concepts():
+    engine = _engine()
+    run_migrations(engine, log=lambda _: None)
+    with engine.begin() as connection:
+        # concepts as migration 008 used to leave it: a plain integer column
+        connection.execute(text("DROP TABLE concepts"))
+        connection.execute(text(
+            "CREATE TABLE concepts (id INTEGER PRIMARY KEY, topic_id INTEGER, name VARCHAR, canonical_concept_id INTEGER)"
+        ))
+        connection.execute(text("CREATE INDEX ix_concepts_name ON concepts (name)"))
+        connection.execute(text("INSERT INTO students (id, name, hashed_password) VALUES (1, 'a', 'x')"))
+        connection.execute(text("INSERT INTO canonical_concepts (id, student_id, norm_name, name) VALUES (5, 1, 'a', 'A')"))
+        connection.execute(text("INSERT INTO concepts (id, topic_id, name, canonical_concept_id) VALUES (1, 1, 'A', 5), (2, 1, 'B', 9)"))
+        connection.execute(text("DELETE FROM schema_migrations WHERE version = 10"))
+
+    assert run_migrations(engine, log=lambda _: None) == [10]
+
+    foreign_keys = inspect(engine).get_foreign_keys("concepts")
+    assert {
+        (fk["referred_table"], fk["options"].get("ondelete")) for fk in foreign_keys
+    } >= {("canonical_concepts", "SET NULL")}
+    assert {"ix_concepts_name", "ix_concepts_canonical_concept_id"} <= _index_names(engine, "concepts")
+    with engine.connect() as connection:
+        assert dict(connection.execute(text("SELECT id, canonical_concept_id FROM concepts")).all()) == {1: 5, 2: None}
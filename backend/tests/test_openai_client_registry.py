@@ -0,0 +1,108 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from services.openai_client_registry import OpenAIClientRegistry
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _registry(max_entries=2, clock=None):
+    return OpenAIClientRegistry(
+        max_entries=max_entries,
+        sync_factory=lambda key: MagicMock(name=f"sync-{key}"),
+        async_factory=lambda key: MagicMock(name=f"async-{key}", aclose=AsyncMock()),
+        clock=clock or _Clock(),
+    )
+
+
+def test_registry_reuses_clients_per_api_key():
+    registry = _registry()
+
+    first = registry.sync_client("sk-a")
+    assert registry.sync_client("sk-a") is first
+    assert registry.sync_client("sk-b") is not first
+    assert registry.async_client("sk-a") is registry.async_client("sk-a")
+
+    stats = registry.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert "sk-a" not in repr(list(registry._entries))
+
+
+def test_registry_evicts_least_recently_used_key_and_closes_it_after_grace():
+    clock = _Clock()
+    registry = _registry(max_entries=2, clock=clock)
+
+    client_a = registry.sync_client("sk-a")
+    client_b = registry.sync_client("sk-b")
+    registry.sync_client("sk-a")
+    registry.sync_client("sk-c")
+
+    assert registry.stats()["evictions"] == 1
+    assert registry.sync_client("sk-a") is client_a
+    assert registry.stats()["retired"] == 1
+    client_b.close.assert_not_called()
+
+    clock.now = 10_000
+    registry.sync_client("sk-a")
+    assert registry.stats()["retired"] == 0
+    client_b.close.assert_called_once()
+    client_a.close.assert_not_called()
+
+
+def test_registry_aclose_closes_live_and_retired_clients():
+    registry = _registry(max_entries=1)
+    sync_a = registry.sync_client("sk-a")
+    async_a = registry.async_client("sk-a")
+    sync_b = registry.sync_client("sk-b")
+
+    asyncio.run(registry.aclose())
+
+    sync_a.close.assert_called_once()
+    async_a.aclose.assert_awaited_once()
+    sync_b.close.assert_called_once()
+    assert registry.stats()["size"] == 0
+
+
+def test_registry_closes_evicted_async_clients_on_the_event_loop():
+    clock = _Clock()
+    registry = _registry(max_entries=1, clock=clock)
+
+    async def _scenario():
+        async_a = registry.async_client("sk-a")
+        registry.async_client("sk-b")
+        clock.now = 10_000
+        registry.async_client("sk-b")
+        await asyncio.sleep(0)
+        return async_a
+
+    async_a = asyncio.run(_scenario())
+    async_a.aclose.assert_awaited_once()
+    assert registry.stats()["pending_async_close"] == 0
+
+
+def test_registry_defers_async_close_when_expired_off_the_event_loop():
+    clock = _Clock()
+    registry = _registry(max_entries=1, clock=clock)
+    async_a = registry.async_client("sk-a")
+    registry.sync_client("sk-b")
+    clock.now = 10_000
+
+    # A sync caller in a worker thread can't close it; the next call on the loop does
+    registry.sync_client("sk-b")
+    async_a.aclose.assert_not_awaited()
+    assert registry.stats()["pending_async_close"] == 1
+
+    async def _on_loop():
+        registry.async_client("sk-b")
+        await asyncio.sleep(0)
+
+    asyncio.run(_on_loop())
+    async_a.aclose.assert_awaited_once()
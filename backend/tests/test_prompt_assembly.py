@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from modules.quizzes.prompts.assembly import PromptPrefixCache
+from modules.quizzes.prompts.builders import EvaluationPromptBuilder, PromptBuilder
+from services.llm_usage import LLMUsageStats, get_usage_stats
+from services.openai_caller import OpenAICaller
+
+MATERIAL = "A fotossíntese transforma luz em energia química. " * 20
+
+
+def test_quiz_prompts_share_a_byte_stable_prefix_with_the_material_text():
+    first = PromptBuilder.build_quiz_prompt("multiple-choice", MATERIAL, [], None, ["Luz", "Clorofila"])
+    second = PromptBuilder.build_quiz_prompt("multiple-choice", MATERIAL, ["Plantas"], None, ["Água"])
+    prefix = PromptBuilder.build_quiz_prefix("multiple-choice", MATERIAL)
+
+    assert first.startswith(prefix) and second.startswith(prefix)
+    assert MATERIAL.strip() in prefix
+    for request_part in ("Clorofila", "Água", "Plantas"):
+        assert request_part not in prefix
+    assert first.index(MATERIAL.strip()) < first.index("1. Luz")
+    assert PromptBuilder.build_quiz_prefix("short_answer", MATERIAL) != prefix
+
+
+def test_evaluation_prompt_puts_question_and_answer_after_the_material():
+    first = EvaluationPromptBuilder.build(MATERIAL, "O que faz a luz?", "Dá energia", quiz_type="short_answer")
+    second = EvaluationPromptBuilder.build(MATERIAL, "Onde ocorre?", "Nas folhas", quiz_type="short_answer")
+    prefix = EvaluationPromptBuilder.build_prefix(MATERIAL, "short_answer")
+
+    assert first.startswith(prefix) and second.startswith(prefix)
+    assert "O que faz a luz?" not in prefix
+    assert first.index(MATERIAL.strip()[:40]) < first.index("O que faz a luz?")
+
+
+def test_prefix_cache_renders_once_per_material_and_quiz_type():
+    cache = PromptPrefixCache(max_entries=2)
+    renders = []
+
+    def render(value):
+        return lambda: renders.append(value) or value
+
+    assert cache.get_or_render("quiz", "texto", "multiple-choice", render("p1")) == "p1"
+    assert cache.get_or_render("quiz", "texto", "multiple-choice", render("other")) == "p1"
+    cache.get_or_render("quiz", "texto", "short_answer", render("p2"))
+    cache.get_or_render("quiz", "outro texto", "short_answer", render("p3"))
+
+    assert renders == ["p1", "p2", "p3"]
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+
+def test_caller_records_cached_token_ratio_from_usage():
+    stats = get_usage_stats()
+    stats.reset()
+    client = MagicMock()
+    response = MagicMock()
+    response.choices[0].message.content = "{}"
+    response.usage = SimpleNamespace(prompt_tokens=1000, prompt_tokens_details=SimpleNamespace(cached_tokens=768))
+    client.chat_completions_create.return_value = response
+
+    OpenAICaller(client).call("prompt", "system", "gpt-4o-mini")
+    OpenAICaller(client).call("prompt", "system", "gpt-4o-mini")
+
+    assert stats.stats()["gpt-4o-mini"] == {
+        "calls": 2, "prompt_tokens": 2000, "cached_tokens": 1536, "cached_ratio": 0.768
+    }
+    stats.reset()
+
+
+def test_usage_stats_ignore_missing_usage():
+    stats = LLMUsageStats()
+    stats.record("gpt-4o-mini", None)
+    stats.record("gpt-4o-mini", SimpleNamespace(prompt_tokens=10, prompt_tokens_details=None))
+    assert stats.stats()["gpt-4o-mini"]["cached_ratio"] == 0.0
+
+
+def test_prompt_cache_stats_are_not_exposed_to_students(client):
+    register = client.post("/register", json={"name": "PromptStatsUser", "password": "StrongPass1!"})
+    headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+
+    assert client.get("/quiz/prompt-cache-stats", headers=headers).status_code == 404
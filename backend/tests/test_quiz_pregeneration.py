@@ -0,0 +1,193 @@
+import pytest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from schemas.study import QuizRequest
+from modules.quizzes.errors import QuizServiceError
+from modules.quizzes.deps import get_generate_quiz_use_case
+from modules.quizzes.pregeneration import PregeneratedQuizPool, QuizPregenerator
+from modules.quizzes.router import get_quiz_ai_service
+from modules.quizzes.use_cases import GenerateQuizUseCase
+from repositories.usage_repository import DailyUsageRepository
+from services.usage_service import UsageService
+
+
+def _build_use_case(pool, version="v1"):
+    topic = SimpleNamespace(name="Biologia", concepts=[SimpleNamespace(name="Celula")])
+    material_repo = Mock()
+    material_repo.load.return_value = SimpleNamespace(id=7, text="conteudo", total_xp=0, topics=[topic])
+
+    topic_selector = Mock()
+    topic_selector.select.return_value = ([], [])
+
+    strategy_factory = Mock()
+    strategy_factory.select_strategy.return_value = object()
+
+    analytics_service = Mock()
+    analytics_service.get_data_version.return_value = version
+    analytics_service.build_mcq_quiz_concepts.return_value = ["Celula"]
+    return GenerateQuizUseCase(material_repo, topic_selector, strategy_factory, analytics_service, pool)
+
+
+def _ai_service():
+    ai_service = Mock()
+    ai_service.is_available.return_value = True
+    ai_service.generate_quiz.return_value = [
+        {"question": "Q1?", "options": ["a", "b"], "correctIndex": 0, "concepts": ["Celula"]}
+    ]
+    return ai_service
+
+
+def test_pool_serves_matching_version_once():
+    pool = PregeneratedQuizPool(max_entries=2)
+    pool.put(1, 7, "multiple-choice", "v1", [{"question": "Q1?"}])
+    pool.put(1, 7, "short_answer", "v1", [{"question": "Q2?"}])
+
+    assert pool.take(1, 7, "multiple-choice", "v1") == [{"question": "Q1?"}]
+    assert pool.take(1, 7, "multiple-choice", "v1") is None
+    assert pool.take(1, 7, "short_answer", "v2") is None
+    assert pool.stats() == {"size": 0, "max_entries": 2, "hits": 1, "misses": 1, "stale": 1}
+
+
+def test_generate_quiz_serves_pregenerated_quiz_while_version_matches():
+    pool = PregeneratedQuizPool()
+    use_case = _build_use_case(pool)
+    ai_service = _ai_service()
+
+    assert use_case.pregenerate(1, "multiple-choice", ai_service) is True
+    assert ai_service.generate_quiz.call_count == 1
+
+    questions = use_case.execute(1, QuizRequest(quiz_type="multiple-choice"), ai_service)
+    assert questions[0]["question"] == "Q1?"
+    assert ai_service.generate_quiz.call_count == 1
+    use_case.analytics_service.build_snapshot.assert_called_once()
+
+    # Served once; a new version (e.g. after another quiz is saved) is never served the old quiz
+    use_case.pregenerate(1, "multiple-choice", ai_service)
+    use_case.analytics_service.get_data_version.return_value = "v2"
+    use_case.execute(1, QuizRequest(quiz_type="multiple-choice"), ai_service)
+    assert ai_service.generate_quiz.call_count == 3
+
+
+def test_pregenerator_pools_only_unlocked_types():
+    use_case = Mock()
+    use_case.pregenerate.side_effect = lambda student_id, quiz_type, ai, quota_check: quiz_type == "multiple-choice"
+    db = Mock()
+    pregenerator = QuizPregenerator(lambda: db, lambda session: use_case, _ai_service, workers=1)
+
+    assert pregenerator.run(1) == ["multiple-choice"]
+    assert use_case.pregenerate.call_count == 3
+    db.close.assert_called_once()
+
+    disabled = QuizPregenerator(lambda: db, lambda session: use_case, _ai_service, workers=0)
+    assert disabled.schedule(1) is False
+
+
+def test_pregenerate_checks_the_quota_before_calling_the_llm():
+    pool = PregeneratedQuizPool()
+    use_case = _build_use_case(pool)
+    ai_service = _ai_service()
+
+    assert use_case.pregenerate(1, "multiple-choice", ai_service, quota_check=lambda: False) is False
+    ai_service.generate_quiz.assert_not_called()
+    assert use_case.pregenerate(1, "multiple-choice", ai_service, quota_check=lambda: True) is True
+
+
+def test_pooled_quiz_is_charged_once_when_served(client, db_session, monkeypatch):
+    register = client.post("/register", json={"name": "PregenQuotaUser", "password": "StrongPass1!"})
+    headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+    student_id = register.json()["user"]["id"]
+    monkeypatch.setenv("TEST_MODE", "false")
+    monkeypatch.setenv("DAILY_AI_CALL_LIMIT", "5")
+
+    use_case = _build_use_case(PregeneratedQuizPool())
+    ai_service = _ai_service()
+    locked = {"is_ready": False, "ready_concepts": 0, "total_concepts": 1}
+    use_case.analytics_service.check_short_answer_readiness.return_value = locked
+    use_case.analytics_service.check_open_ended_readiness.return_value = locked
+    usage_service = UsageService(DailyUsageRepository(db_session))
+    pregenerator = QuizPregenerator(
+        lambda: SimpleNamespace(close=lambda: None), lambda session: use_case, lambda: ai_service, workers=1,
+        usage_factory=lambda session: usage_service
+    )
+
+    # Pooled but not served yet: nothing charged
+    assert pregenerator.run(student_id) == ["multiple-choice"]
+    assert DailyUsageRepository(db_session).get_count(student_id, date.today()) == 0
+
+    client.app.dependency_overrides[get_generate_quiz_use_case] = lambda: use_case
+    client.app.dependency_overrides[get_quiz_ai_service] = lambda: ai_service
+    try:
+        response = client.post("/generate-quiz", json={"quiz_type": "multiple-choice"}, headers=headers)
+    finally:
+        client.app.dependency_overrides.pop(get_generate_quiz_use_case, None)
+        client.app.dependency_overrides.pop(get_quiz_ai_service, None)
+
+    assert response.status_code == 200
+    assert response.json()["questions"][0]["question"] == "Q1?"
+    assert ai_service.generate_quiz.call_count == 1
+    db_session.expire_all()
+    assert DailyUsageRepository(db_session).get_count(student_id, date.today()) == 1
+
+
+def test_schedule_skips_own_key_students_and_spaces_runs():
+    clock = SimpleNamespace(now=0.0)
+    pregenerator = QuizPregenerator(
+        Mock, lambda session: Mock(), _ai_service, workers=1,
+        min_interval_seconds=60, clock=lambda: clock.now
+    )
+    pregenerator._executor = Mock()
+
+    assert pregenerator.schedule(1) is False
+    pregenerator.note_key_source(1, own_key=False)
+    assert pregenerator.schedule(1) is True
+    pregenerator._in_flight.clear()
+
+    clock.now = 30
+    assert pregenerator.schedule(1) is False
+    clock.now = 61
+    assert pregenerator.schedule(1) is True
+    pregenerator._in_flight.clear()
+
+    pregenerator.note_key_source(1, own_key=True)
+    clock.now = 200
+    assert pregenerator.schedule(1) is False
+    assert pregenerator._executor.submit.call_count == 2
+
+
+def test_save_during_a_run_reruns_it_once_afterwards():
+    pregenerator = QuizPregenerator(Mock, lambda session: Mock(), _ai_service, workers=1)
+    pregenerator.note_key_source(1, own_key=False)
+    pregenerator._executor = Mock()
+    runs = []
+    pregenerator.run = runs.append
+
+    assert pregenerator.schedule(1) is True
+    assert pregenerator.schedule(1) is True
+    assert pregenerator.schedule(1) is True
+    assert pregenerator._executor.submit.call_count == 1
+
+    # The in-flight run finishes: one rerun for the saves that arrived meanwhile
+    pregenerator._run_and_release(1)
+    assert pregenerator._executor.submit.call_count == 2
+    assert 1 in pregenerator._in_flight
+
+    pregenerator._run_and_release(1)
+    assert pregenerator._executor.submit.call_count == 2
+    assert runs == [1, 1]
+    assert 1 not in pregenerator._in_flight
+
+
+def test_pregenerate_skips_locked_quiz_type():
+    use_case = _build_use_case(PregeneratedQuizPool())
+    use_case.analytics_service.check_open_ended_readiness.return_value = {
+        "is_ready": False, "ready_concepts": 0, "total_concepts": 1
+    }
+    ai_service = _ai_service()
+
+    assert use_case.pregenerate(1, "open-ended", ai_service) is False
+    ai_service.generate_quiz.assert_not_called()
+    with pytest.raises(QuizServiceError) as exc:
+        use_case.execute(1, QuizRequest(quiz_type="open-ended"), ai_service)
+    assert exc.value.status_code == 403
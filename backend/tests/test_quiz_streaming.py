@@ -0,0 +1,64 @@
+import asyncio
+import json
+from unittest.mock import Mock
+
+from modules.quizzes.ai_service import QuizAIService
+from modules.quizzes.engine import MultipleChoiceStrategy
+from modules.quizzes.streaming import QuestionStreamParser
+
+
+COMPLETION = json.dumps({
+    "title": "Quiz {1}",
+    "questions": [
+        {"question": "O que é \"ATP\" {x}?", "options": ["a", "b]"], "correctIndex": 1, "concepts": ["ATP"]},
+        {"question": "Q2", "options": ["c", "d"], "correctIndex": 0, "concepts": ["Celula"]},
+    ],
+    "extra": [{"question": "ignored"}],
+}, ensure_ascii=False)
+
+
+def test_parser_emits_each_question_as_soon_as_it_closes():
+    parser = QuestionStreamParser()
+    emitted_at = []
+    questions = []
+    for position, char in enumerate(COMPLETION):
+        for question in parser.feed(char):
+            emitted_at.append(position)
+            questions.append(question)
+
+    assert [q["question"] for q in questions] == ['O que é "ATP" {x}?', "Q2"]
+    assert questions[0]["options"] == ["a", "b]"]
+    # The first question is complete long before the completion ends
+    assert emitted_at[0] < COMPLETION.index('"Q2"')
+
+
+def test_parser_skips_malformed_question_objects():
+    parser = QuestionStreamParser()
+    chunks = ['{"questions": [{"question": "Q1", "x": tru', 'e}, {"question": "Q2" "bad"}, ', '{"question": "Q3"}]}']
+    questions = [q for chunk in chunks for q in parser.feed(chunk)]
+    assert [q["question"] for q in questions] == ["Q1", "Q3"]
+
+
+class _StreamingCaller:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def is_available(self):
+        return True
+
+    async def stream(self, **kwargs):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def test_stream_quiz_yields_questions_from_async_caller_stream():
+    chunks = [COMPLETION[i:i + 7] for i in range(0, len(COMPLETION), 7)]
+    sync_caller = Mock()
+    service = QuizAIService(sync_caller, async_caller=_StreamingCaller(chunks))
+
+    async def collect():
+        return [q async for q in service.stream_quiz(MultipleChoiceStrategy(), "Texto")]
+
+    questions = asyncio.run(collect())
+    assert [q["question"] for q in questions] == ['O que é "ATP" {x}?', "Q2"]
+    sync_caller.call.assert_not_called()
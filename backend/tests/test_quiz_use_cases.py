@@ -1,6 +1,7 @@
+import asyncio
 import pytest
 from types import SimpleNamespace
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 from schemas.study import QuizRequest
 from modules.quizzes.use_cases import GenerateQuizUseCase
 from modules.quizzes.errors import QuizServiceError
@@ -54,3 +55,109 @@ def test_generate_quiz_fails_after_retry_when_llm_missing_concepts():
 
     with pytest.raises(QuizServiceError):
         use_case.execute(1, request, ai_service)
+
+
+def test_generate_quiz_async_awaits_native_async_service_and_retries():
+    use_case = _build_use_case()
+    request = QuizRequest(topics=[], quiz_type="short_answer")
+
+    ai_service = Mock()
+    ai_service.is_available.return_value = True
+    ai_service.generate_quiz_async = AsyncMock(side_effect=[
+        [{"question": "Q1?"}],
+        [{"question": "Q1?", "concepts": ["Celula"]}],
+    ])
+
+    questions = asyncio.run(use_case.execute_async(1, request, ai_service))
+
+    assert len(questions) == 1
+    assert ai_service.generate_quiz_async.await_count == 2
+    ai_service.generate_quiz.assert_not_called()
+
+
+def test_generate_quiz_async_runs_sync_only_service_in_thread():
+    use_case = _build_use_case()
+    request = QuizRequest(topics=[], quiz_type="short_answer")
+
+    ai_service = Mock()
+    ai_service.is_available.return_value = True
+    ai_service.generate_quiz.return_value = [{"question": "Q1?", "concepts": ["Celula"]}]
+
+    questions = asyncio.run(use_case.execute_async(1, request, ai_service))
+
+    assert len(questions) == 1
+    ai_service.generate_quiz.assert_called_once()
+
+
+def test_generate_quiz_builds_single_analytics_snapshot():
+    use_case = _build_use_case()
+    analytics_service = Mock()
+    snapshot = object()
+    analytics_service.build_snapshot.return_value = snapshot
+    analytics_service.check_short_answer_readiness.return_value = {
+        "is_ready": True, "ready_concepts": 1, "total_concepts": 1
+    }
+    analytics_service.build_short_quiz_concepts.return_value = ["Celula"]
+    use_case.analytics_service = analytics_service
+    request = QuizRequest(topics=[], quiz_type="short_answer")
+
+    ai_service = Mock()
+    ai_service.is_available.return_value = True
+    ai_service.generate_quiz.return_value = [{"question": "Q1?", "concepts": ["Celula"]}]
+
+    use_case.execute(1, request, ai_service)
+
+    analytics_service.build_snapshot.assert_called_once_with(1, 1)
+    analytics_service.get_weak_points.assert_not_called()
+    assert use_case.topic_selector.select.call_args.kwargs["snapshot"] is snapshot
+    # Gates are answered by their own count query, before the snapshot is built
+    analytics_service.check_short_answer_readiness.assert_called_once_with(1, 1)
+    assert analytics_service.build_short_quiz_concepts.call_args.kwargs["snapshot"] is snapshot
+
+
+def _collect_stream(use_case, request, ai_service):
+    async def collect():
+        questions = await use_case.execute_stream(1, request, ai_service)
+        return [q async for q in questions]
+
+    return asyncio.run(collect())
+
+
+def test_generate_quiz_stream_skips_questions_without_concepts():
+    use_case = _build_use_case()
+    request = QuizRequest(topics=[], quiz_type="multiple-choice")
+
+    class StreamingService:
+        def is_available(self):
+            return True
+
+        async def stream_quiz(self, *args):
+            yield {"question": "Q1?", "options": ["a", "b"], "correctIndex": 0}
+            yield {"question": "Q2?", "options": ["a", "b"], "correctIndex": 1, "concepts": ["Celula"]}
+
+    questions = _collect_stream(use_case, request, StreamingService())
+
+    assert [q["question"] for q in questions] == ["Q2?"]
+    assert questions[0]["options"][questions[0]["correctIndex"]] == "b"
+
+
+def test_generate_quiz_stream_falls_back_to_full_generation_when_stream_is_empty():
+    use_case = _build_use_case()
+    request = QuizRequest(topics=[], quiz_type="short_answer")
+
+    class EmptyStreamService:
+        def __init__(self):
+            self.generate_quiz = Mock(return_value=[{"question": "Q1?", "concepts": ["Celula"]}])
+
+        def is_available(self):
+            return True
+
+        async def stream_quiz(self, *args):
+            return
+            yield
+
+    service = EmptyStreamService()
+    questions = _collect_stream(use_case, request, service)
+
+    assert [q["question"] for q in questions] == ["Q1?"]
+    service.generate_quiz.assert_called_once()
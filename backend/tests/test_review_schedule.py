@@ -0,0 +1,126 @@
+from collections import Counter
+from datetime import timedelta
+from models import ConceptReviewSchedule, ConceptReviewStatus, Concept, Student, StudyMaterial, Topic
+from modules.analytics import review
+from modules.analytics.repository import AnalyticsRepository, ReviewScheduleRepository
+from modules.analytics.service import AnalyticsService
+from modules.materials.deletion import MaterialDeletionTransaction
+from modules.materials.repository import MaterialConceptRepository
+from modules.quizzes.repository import QuizResultPersistenceRepository
+
+
+def _setup(db_session):
+    student = Student(name="ReviewUser", hashed_password="x")
+    db_session.add(student)
+    db_session.commit()
+    material = StudyMaterial(student_id=student.id, source="r.txt", text="content", is_active=True)
+    db_session.add(material)
+    db_session.commit()
+    topic = Topic(study_material_id=material.id, name="Biologia")
+    db_session.add(topic)
+    db_session.commit()
+    concepts = {name: Concept(topic_id=topic.id, name=name) for name in ("Célula", "DNA", "Mitose", "RNA")}
+    db_session.add_all(concepts.values())
+    db_session.commit()
+    return student, material, concepts
+
+
+def _save(db_session, student, material, quiz_type, answers):
+    assert QuizResultPersistenceRepository(db_session).record_quiz_result(
+        student.id, 0, len(answers), quiz_type,
+        [{"topic": concept.name, "concept_id": concept.id, "is_correct": ok} for concept, ok in answers],
+        material.id, 0, 60, 60
+    )
+
+
+def _rows(db_session, student_id):
+    return {
+        (row.concept_id, row.quiz_type): (row.repetitions, row.interval_days, row.ease, row.due_at)
+        for row in db_session.query(ConceptReviewSchedule).filter(ConceptReviewSchedule.student_id == student_id)
+    }
+
+
+def test_schedule_grows_interval_on_pass_and_resets_on_fail():
+    state = review.ReviewState()
+    intervals = []
+    for _ in range(3):
+        state = review.schedule(state, True)
+        intervals.append(state.interval_days)
+    assert intervals == [1.0, 3.0, 3.0 * 2.7]
+
+    failed = review.schedule(state, False)
+    assert (failed.repetitions, failed.interval_days) == (0, 0.0)
+    assert failed.ease == state.ease - 0.2
+
+
+def test_saved_quizzes_schedule_like_a_rebuild(db_session):
+    student, material, concepts = _setup(db_session)
+    ReviewScheduleRepository(db_session).rebuild(student.id)
+    cell, dna = concepts["Célula"], concepts["DNA"]
+
+    _save(db_session, student, material, "multiple-choice", [(cell, True), (dna, True), (dna, False)])
+    _save(db_session, student, material, "multiple-choice", [(cell, True)])
+    _save(db_session, student, material, "short_answer", [(dna, True)])
+
+    incremental = _rows(db_session, student.id)
+    repetitions, interval, _, due_at = incremental[(cell.id, "multiple-choice")]
+    assert (repetitions, interval) == (2, 3.0)
+    # One wrong answer fails the whole review of DNA in that quiz
+    assert incremental[(dna.id, "multiple-choice")][:2] == (0, 0.0)
+    assert incremental[(dna.id, "short_answer")][:2] == (1, 1.0)
+
+    ReviewScheduleRepository(db_session).rebuild(student.id)
+    assert _rows(db_session, student.id) == incremental
+
+    assert MaterialDeletionTransaction(db_session).delete_with_cleanup(student.id, material.id)
+    assert _rows(db_session, student.id) == {}
+
+
+def test_due_queue_orders_overdue_then_unseen_then_upcoming(db_session):
+    student, material, concepts = _setup(db_session)
+    _save(db_session, student, material, "open-ended", [(concepts["Célula"], True), (concepts["DNA"], False)])
+    service = AnalyticsService(
+        AnalyticsRepository(db_session),
+        MaterialConceptRepository(db_session),
+        review_repo=ReviewScheduleRepository(db_session),
+    )
+
+    assert service.build_open_quiz_concepts(student.id, material.id, total_concepts=4) == [
+        "DNA", "Mitose", "RNA", "Célula"
+    ]
+    assert service.build_open_quiz_concepts(student.id, material.id, {"Célula", "RNA"}, total_concepts=8) == [
+        "RNA", "Célula"
+    ]
+
+    mcq = service.build_mcq_quiz_concepts(student.id, material.id, total_questions=10)
+    assert sum(Counter(mcq).values()) == 10
+    assert set(mcq) == set(concepts)
+
+    # Once Célula's interval has passed it is overdue again
+    db_session.query(ConceptReviewSchedule).filter(
+        ConceptReviewSchedule.concept_id == concepts["Célula"].id
+    ).update({ConceptReviewSchedule.due_at: ConceptReviewSchedule.due_at - timedelta(days=2)})
+    db_session.commit()
+    assert service.build_open_quiz_concepts(student.id, material.id, total_concepts=2) == ["Célula", "DNA"]
+
+
+def test_lazy_build_tolerates_a_status_row_built_concurrently(db_session, monkeypatch):
+    student, material, concepts = _setup(db_session)
+    student_id, material_id, cell_id = student.id, material.id, concepts["Célula"].id
+    assert ReviewScheduleRepository(db_session).rebuild(student_id)
+    db_session.expunge_all()
+
+    # Another request committed the status row after this one checked for it
+    get = db_session.get
+    monkeypatch.setattr(
+        db_session, "get", lambda model, key, **kw: None if model is ConceptReviewStatus else get(model, key, **kw)
+    )
+    assert QuizResultPersistenceRepository(db_session).record_quiz_result(
+        student_id, 1, 1, "multiple-choice", [{"topic": "Célula", "concept_id": cell_id, "is_correct": True}],
+        material_id, 0, 60, 60
+    )
+    monkeypatch.undo()
+
+    repo = ReviewScheduleRepository(db_session)
+    assert repo.fetch_scheduled_concepts(student_id, material_id, "multiple-choice") == {"Célula"}
+    assert db_session.query(ConceptReviewStatus).filter(ConceptReviewStatus.student_id == student_id).count() == 1
@@ -1,3 +1,4 @@
+import json
 from unittest.mock import Mock
 from io import BytesIO
 import time
@@ -161,7 +162,7 @@ def test_generate_open_ended_quiz_when_ready(client, monkeypatch):
     monkeypatch.setattr(
         AnalyticsService,
         "check_open_ended_readiness",
-        lambda self, student_id, material_id=None: {
+        lambda self, student_id, material_id=None, snapshot=None: {
             "is_ready": True,
             "total_concepts": 1,
             "ready_concepts": 1
@@ -170,7 +171,7 @@ def test_generate_open_ended_quiz_when_ready(client, monkeypatch):
     monkeypatch.setattr(
         AnalyticsService,
         "build_open_quiz_concepts",
-        lambda self, student_id, material_id=None, allowed_concepts=None, total_concepts=8: ["History"]
+        lambda self, student_id, material_id=None, allowed_concepts=None, total_concepts=8, snapshot=None: ["History"]
     )
 
     _override_quiz_ai_service(client.app, [
@@ -364,3 +365,38 @@ def test_generate_quiz_without_material(client):
     
     assert quiz_response.status_code == 400
     assert "No material found" in quiz_response.json()["detail"]
+
+
+def test_generate_quiz_stream_sends_question_events(client):
+    """Integration test: /generate-quiz/stream sends one SSE event per question, then done."""
+    unique_name = f"StreamUser{int(time.time()*100)}"
+    register_response = client.post("/register", json={"name": unique_name, "password": "StrongPass1!"})
+    token = register_response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    files = {"file": ("test.txt", BytesIO(b"Data."), "text/plain")}
+    _override_material_ai_service(client.app, {"Topic": ["Topic"]})
+    try:
+        client.post("/upload", files=files, headers=headers)
+    finally:
+        client.app.dependency_overrides.pop(materials_get_ai_service, None)
+
+    questions = [
+        {"concepts": ["Topic"], "question": f"Q{i}", "options": ["A", "B"], "correctIndex": 0, "explanation": "E"}
+        for i in range(2)
+    ]
+    _override_quiz_ai_service(client.app, questions)
+    try:
+        quiz_request = {"topics": [], "quiz_type": "multiple-choice", "api_key": "sk-test"}
+        response = client.post("/generate-quiz/stream", json=quiz_request, headers=headers)
+    finally:
+        client.app.dependency_overrides.pop(get_quiz_ai_service, None)
+        client.app.dependency_overrides.pop(get_eval_ai_service, None)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n", 1) for block in response.text.strip().split("\n\n")]
+    assert [name for name, _ in events] == ["event: question", "event: question", "event: done"]
+    first = json.loads(events[0][1].removeprefix("data: "))
+    assert first["question"] == "Q0"
+    assert first["options"][first["correctIndex"]] == "A"
@@ -48,25 +48,25 @@ const AnalyticsPage = ({
 }) => {
     const tzOffset = useMemo(() => -new Date().getTimezoneOffset(), []);
 
+    // One request for both charts
     const {
-        data: metrics,
+        data: dashboard,
         loading,
         error: errorMsg
     } = useAsyncData(
-        () => studyService.getMetrics(30, tzOffset),
+        () => studyService.getDashboard({
+            sections: ['metrics', 'learning_trend'],
+            days: 30,
+            tzOffsetMinutes: tzOffset,
+            minQuestions: 1
+        }),
         [tzOffset],
         'Nao foi possivel carregar as metricas.'
     );
-
-    const {
-        data: learningTrend,
-        loading: trendLoading,
-        error: trendError
-    } = useAsyncData(
-        () => studyService.getLearningTrend(30, tzOffset, 1),
-        [tzOffset],
-        'Nao foi possivel carregar a evolucao.'
-    );
+    const metrics = dashboard ? dashboard.metrics : null;
+    const learningTrend = dashboard ? dashboard.learning_trend : null;
+    const trendLoading = loading;
+    const trendError = errorMsg ? 'Nao foi possivel carregar a evolucao.' : '';
 
     const { daily, totals } = useMemo(() => {
         if (!metrics) {
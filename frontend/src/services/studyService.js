@@ -50,9 +50,10 @@ export const studyService = {
         });
     },
     getWeakPoints: async (materialId) => {
-        let url = `/analytics/weak-points?t=${Date.now()}`;
+        // No cache-buster: the API answers with an ETag and the browser revalidates (304)
+        let url = '/analytics/weak-points';
         if (materialId) {
-            url += `&material_id=${materialId}`;
+            url += `?material_id=${materialId}`;
         }
         const res = await api.get(url);
         return res.data;
@@ -60,8 +61,7 @@ export const studyService = {
     getMetrics: async (days = 30, tzOffsetMinutes = 0) => {
         const params = new URLSearchParams({
             days: String(days),
-            tz_offset_minutes: String(tzOffsetMinutes),
-            t: String(Date.now())
+            tz_offset_minutes: String(tzOffsetMinutes)
         });
         const res = await api.get(`/analytics/metrics?${params.toString()}`);
         return res.data;
@@ -70,12 +70,26 @@ export const studyService = {
         const params = new URLSearchParams({
             days: String(days),
             tz_offset_minutes: String(tzOffsetMinutes),
-            min_questions: String(minQuestions),
-            t: String(Date.now())
+            min_questions: String(minQuestions)
         });
         const res = await api.get(`/analytics/learning-trend?${params.toString()}`);
         return res.data;
     },
+    getDashboard: async ({ sections = [], days = 30, tzOffsetMinutes = 0, minQuestions = 1, materialId } = {}) => {
+        const params = new URLSearchParams({
+            days: String(days),
+            tz_offset_minutes: String(tzOffsetMinutes),
+            min_questions: String(minQuestions)
+        });
+        if (sections.length > 0) {
+            params.set('sections', sections.join(','));
+        }
+        if (materialId) {
+            params.set('material_id', String(materialId));
+        }
+        const res = await api.get(`/analytics/dashboard?${params.toString()}`);
+        return res.data;
+    },
     updateAvatar: async (avatar) => {
         const res = await api.post('/gamification/avatar', { avatar });
         return res.data;
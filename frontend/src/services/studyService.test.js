@@ -87,4 +87,16 @@ describe('studyService', () => {
         expect(url).toContain('tz_offset_minutes=120');
         expect(url).toContain('min_questions=3');
     });
+
+    it('getDashboard requests the selected sections in one call', async () => {
+        api.get.mockResolvedValue({ data: { metrics: {}, learning_trend: {} } });
+
+        await studyService.getDashboard({ sections: ['metrics', 'learning_trend'], days: 30, tzOffsetMinutes: 60 });
+
+        expect(api.get).toHaveBeenCalledTimes(1);
+        const url = api.get.mock.calls[0][0];
+        expect(url).toContain('/analytics/dashboard?');
+        expect(url).toContain('sections=metrics%2Clearning_trend');
+        expect(url).toContain('tz_offset_minutes=60');
+    });
 });